@@ -0,0 +1,142 @@
+"""
+run the test cases of a test case file without the GUI
+
+usage: python batch.py test_case.txt [-o outputDir] [-w workers] [--unordered] [--clip] [--mmap] [--cache cacheDir]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from voronoi import Voronoi, Point, iterTestCases, formatVoronoi
+from resultcache import VoronoiResultCache
+
+CANVAS_WIDTH = 600
+CANVAS_HEIGHT = 600
+CASES_PER_WORKER = 4
+
+# the result cache of each cache directory in this process
+resultCaches = {}
+
+class TestCaseFormatError(Exception):
+    """
+    the ValueError of iterTestCases, so an error raised while building a case is not taken for a format error
+    """
+
+def readTestCases(file, useMmap: bool = False):
+    """
+    iterTestCases with its ValueError raised as TestCaseFormatError
+    """
+    try:
+        yield from iterTestCases(file, useMmap)
+    except ValueError as error:
+        raise TestCaseFormatError(error) from error
+
+def buildTestCase(index: int, testCase: list[tuple], canvasWidth: int, canvasHeight: int, clip: bool = False, cacheDirectory: str = None):
+    """
+    build one test case, return (index, number of points, output text, seconds)
+    :param clip: output the edges clipped to the canvas, the clipping and formatting run on numpy arrays
+    :param cacheDirectory: directory of the VoronoiResultCache shared by the processes, no cache if None
+    """
+    startTime = time.perf_counter()
+    cache = None
+    if(cacheDirectory != None):
+        if(cacheDirectory not in resultCaches):
+            resultCaches[cacheDirectory] = VoronoiResultCache(directory=cacheDirectory)
+        cache = resultCaches[cacheDirectory]
+    voronoi = Voronoi(canvasWidth=canvasWidth, canvasHeight=canvasHeight, cache=cache)
+    voronoi.buildVoronoiDiagram([Point(x, y) for x, y in testCase])
+    if(clip):
+        from vectorized import formatSegments
+        output = formatSegments(voronoi.points, voronoi.getClippedEdges())
+    else:
+        output = formatVoronoi(voronoi.points, voronoi.edges)
+    return index, len(testCase), output, time.perf_counter() - startTime
+
+def runTestCases(testCases, workers: int, ordered: bool = True, canvasWidth: int = CANVAS_WIDTH, canvasHeight: int = CANVAS_HEIGHT, clip: bool = False, cacheDirectory: str = None):
+    """
+    yield the result of buildTestCase for each test case.
+    only a few cases per worker are in flight, so the test cases can be a generator of any size
+    """
+    if(workers == 1):
+        for index, testCase in enumerate(testCases):
+            yield buildTestCase(index, testCase, canvasWidth, canvasHeight, clip, cacheDirectory)
+        return
+
+    testCases = enumerate(testCases)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        finished = {}
+        nextIndex = 0
+        exhausted = False
+        while(True):
+            while(not exhausted and len(pending) + len(finished) < workers * CASES_PER_WORKER):
+                item = next(testCases, None)
+                if(item == None):
+                    exhausted = True
+                    break
+                pending.add(executor.submit(buildTestCase, item[0], item[1], canvasWidth, canvasHeight, clip, cacheDirectory))
+
+            if(len(pending) == 0):
+                break
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                if(ordered):
+                    finished[result[0]] = result
+                else:
+                    yield result
+
+            # output in the order of the test file
+            while(nextIndex in finished):
+                yield finished.pop(nextIndex)
+                nextIndex = nextIndex + 1
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build the voronoi diagram of every test case in a test case file')
+    parser.add_argument('testFile', help='test case file')
+    parser.add_argument('-o', '--output', help='directory for the output files(one file per case), default to stdout')
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count(), help='number of worker processes')
+    parser.add_argument('--unordered', action='store_true', help='output the cases as soon as they finish')
+    parser.add_argument('--width', type=int, default=CANVAS_WIDTH, help='canvas width')
+    parser.add_argument('--height', type=int, default=CANVAS_HEIGHT, help='canvas height')
+    parser.add_argument('--clip', action='store_true', help='clip the edges to the canvas(needs numpy)')
+    parser.add_argument('--mmap', action='store_true', help='read the test case file through mmap')
+    parser.add_argument('--cache', help='directory of the cached results, the cases built before are not built again')
+    args = parser.parse_args(argv)
+
+    if(args.clip):
+        try:
+            import vectorized
+        except ImportError as error:
+            print(f'--clip needs numpy: {error}', file=sys.stderr)
+            return 1
+
+    if(args.output):
+        os.makedirs(args.output, exist_ok=True)
+
+    caseCount = 0
+    pointCount = 0
+    startTime = time.perf_counter()
+    try:
+        for index, count, output, seconds in runTestCases(readTestCases(args.testFile, args.mmap), max(1, args.workers), not args.unordered, args.width, args.height, args.clip, args.cache):
+            if(args.output):
+                with open(os.path.join(args.output, f'case{index+1}.txt'), 'w') as writeFile:
+                    writeFile.write(output)
+            else:
+                sys.stdout.write(f'# case {index+1}\n')
+                sys.stdout.write(output)
+            print(f'case {index+1}: {count} points {seconds:.4f}s', file=sys.stderr)
+            caseCount = caseCount + 1
+            pointCount = pointCount + count
+    except TestCaseFormatError as error:
+        print(f'Format Error: {error}', file=sys.stderr)
+        return 1
+
+    totalTime = time.perf_counter() - startTime
+    print(f'{caseCount} cases, {pointCount} points in {totalTime:.3f}s ({caseCount / totalTime:.1f} cases/s, {pointCount / totalTime:.1f} points/s)', file=sys.stderr)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,310 @@
+"""
+scaling benchmark of Voronoi.buildVoronoiDiagram
+
+every case runs in its own process, the time of each phase(sort, divide, merge of each level, record building and
+edge extraction) and the peak memory are written to a json file so different runs can be compared.
+with more than one worker count, the speedup of each case over the fewest workers is added.
+with --profile the counters of the merges(BuildProfile of voronoi.py) are added to each case, and another build of the
+case runs under cProfile, its report is written next to the json file as <output>_<distribution>_<size>_x<workers>.prof
+and .txt
+
+usage: python benchmark.py [-o benchmark_result.json] [--sizes 10 100 1000] [--distributions uniform grid] [--timeout 600] [--pack] [--algorithm fortune] [--workers 1 2 4 8] [--profile]
+"""
+import argparse
+import cProfile
+import json
+import math
+import multiprocessing
+import os
+import platform
+import pstats
+import random
+import sys
+import time
+import tracemalloc
+import voronoi
+from fortune import buildFortuneEdges
+from voronoi import ALGORITHMS, Point, VoronoiGraph, sortPoints
+
+CANVAS_WIDTH = 600
+CANVAS_HEIGHT = 600
+SIZES = [10, 100, 1000, 10000, 100000]
+CLUSTER_COUNT = 10
+CLUSTER_SPREAD = 20
+# functions listed in the text report of cProfile
+PROFILE_REPORT_LINES = 40
+
+def generateUniform(size: int, rand: random.Random) -> list[tuple]:
+    return [(rand.uniform(0, CANVAS_WIDTH), rand.uniform(0, CANVAS_HEIGHT)) for _ in range(size)]
+
+def generateClustered(size: int, rand: random.Random) -> list[tuple]:
+    centers = [(rand.uniform(0, CANVAS_WIDTH), rand.uniform(0, CANVAS_HEIGHT)) for _ in range(CLUSTER_COUNT)]
+    points = []
+    for i in range(size):
+        centerX, centerY = centers[i % CLUSTER_COUNT]
+        x = min(max(rand.gauss(centerX, CLUSTER_SPREAD), 0), CANVAS_WIDTH)
+        y = min(max(rand.gauss(centerY, CLUSTER_SPREAD), 0), CANVAS_HEIGHT)
+        points.append((x, y))
+    return points
+
+def generateCollinear(size: int, rand: random.Random) -> list[tuple]:
+    return [(CANVAS_WIDTH * (i + 0.5) / size, CANVAS_HEIGHT / 2) for i in range(size)]
+
+def generateCocircular(size: int, rand: random.Random) -> list[tuple]:
+    radius = min(CANVAS_WIDTH, CANVAS_HEIGHT) * 0.4
+    return [(CANVAS_WIDTH / 2 + radius * math.cos(2 * math.pi * i / size), CANVAS_HEIGHT / 2 + radius * math.sin(2 * math.pi * i / size)) for i in range(size)]
+
+def generateGrid(size: int, rand: random.Random) -> list[tuple]:
+    # the nearest square grid to the size
+    side = max(1, round(math.sqrt(size)))
+    spacingX = CANVAS_WIDTH / side
+    spacingY = CANVAS_HEIGHT / side
+    return [(spacingX * (i + 0.5), spacingY * (j + 0.5)) for i in range(side) for j in range(side)]
+
+DISTRIBUTIONS = {
+    'uniform': generateUniform,
+    'clustered': generateClustered,
+    'collinear': generateCollinear,
+    'cocircular': generateCocircular,
+    'grid': generateGrid,
+}
+
+class PhaseTimer():
+    """
+    wrap the merge and record building of VoronoiGraph to time them, only used inside the benchmark process
+    """
+    def __init__(self):
+        self.mergeLevels = {}
+        self.recordSeconds = 0
+
+    def install(self):
+        merge = VoronoiGraph.mergeVoronoiDiagram
+        recordMerge = VoronoiGraph.recordMerge
+        createVoronoiRecord = voronoi.createVoronoiRecord
+        timer = self
+
+        def timedMerge(graph, low, middle, high, *args):
+            # merges of subgraphs with the same number of sites (up to a power of 2) are in the same level
+            level = (high - low - 1).bit_length()
+            recordSeconds = timer.recordSeconds
+            startTime = time.perf_counter()
+            result = merge(graph, low, middle, high, *args)
+            seconds = time.perf_counter() - startTime - (timer.recordSeconds - recordSeconds)
+            count, total = timer.mergeLevels.get(level, (0, 0))
+            timer.mergeLevels[level] = (count + 1, total + seconds)
+            return result
+
+        def timedRecordMerge(graph, *args):
+            startTime = time.perf_counter()
+            recordMerge(graph, *args)
+            timer.recordSeconds = timer.recordSeconds + time.perf_counter() - startTime
+
+        def timedCreateVoronoiRecord(*args):
+            startTime = time.perf_counter()
+            voronoiRecord = createVoronoiRecord(*args)
+            timer.recordSeconds = timer.recordSeconds + time.perf_counter() - startTime
+            return voronoiRecord
+
+        VoronoiGraph.mergeVoronoiDiagram = timedMerge
+        VoronoiGraph.recordMerge = timedRecordMerge
+        voronoi.createVoronoiRecord = timedCreateVoronoiRecord
+
+def buildDiagram(points: list[tuple], recordSteps: bool, canvasWidth: int, canvasHeight: int, timer: PhaseTimer = None, pack: bool = False, algorithm: str = 'divide', workers: int = 1, profile: bool = False) -> dict:
+    """
+    the same steps as Voronoi.buildVoronoiDiagram, timed one by one.
+    with workers the merges in the worker processes are not timed, waiting for them is counted in divideSeconds
+    :param pack: also pack the graph with toArrayGraph and extract the edges from the packed graph
+    :param profile: add the totals and levels of the BuildProfile as mergeProfile
+    """
+    result = {}
+    startTime = time.perf_counter()
+    sortedPoints = sortPoints([Point(x, y) for x, y in points])
+    result['sortSeconds'] = time.perf_counter() - startTime
+
+    if(algorithm == 'fortune'):
+        # the sweep line has no merge, records or graph, only the clipped edges
+        startTime = time.perf_counter()
+        edges = buildFortuneEdges([(point.x, point.y) for point in sortedPoints], canvasWidth, canvasHeight)
+        result['sweepSeconds'] = time.perf_counter() - startTime
+        result['sites'] = len(sortedPoints)
+        result['edges'] = len(edges)
+        result['totalSeconds'] = result['sortSeconds'] + result['sweepSeconds']
+        return result
+
+    startTime = time.perf_counter()
+    graph = VoronoiGraph(canvasWidth, canvasHeight, recordSteps, profile=profile)
+    graph.createVoronoiGraph(sortedPoints, workers)
+    createSeconds = time.perf_counter() - startTime
+    # the workers are capped by the cpus and the size, 0 when the whole build ran here
+    result['slabs'] = graph.slabCount
+    if(graph.profile != None):
+        result['mergeProfile'] = graph.profile.toDict()
+
+    # the export to an ArrayVoronoiGraph is timed apart from the build
+    mergeRecords = graph.mergeRecords
+    if(pack):
+        startTime = time.perf_counter()
+        graph = graph.toArrayGraph()
+        result['packSeconds'] = time.perf_counter() - startTime
+
+    startTime = time.perf_counter()
+    edges = graph.getEdges()
+    result['extractSeconds'] = time.perf_counter() - startTime
+
+    # materialize the merged graph of every step in order, which is what the step by step execution does
+    startTime = time.perf_counter()
+    for mergeRecord in mergeRecords:
+        mergeRecord.newVornoiRecord.edges
+    result['recordViewSeconds'] = time.perf_counter() - startTime
+
+    result['sites'] = len(sortedPoints)
+    result['edges'] = len(edges)
+    result['mergeRecords'] = len(mergeRecords)
+    if(timer != None):
+        mergeSeconds = sum(total for count, total in timer.mergeLevels.values())
+        result['divideSeconds'] = createSeconds - mergeSeconds - timer.recordSeconds
+        result['mergeSeconds'] = mergeSeconds
+        result['mergeLevels'] = [{'level': level, 'maxSites': 2 ** level, 'merges': count, 'seconds': total} for level, (count, total) in sorted(timer.mergeLevels.items())]
+        result['recordSeconds'] = timer.recordSeconds
+    result['totalSeconds'] = result['sortSeconds'] + createSeconds + result.get('packSeconds', 0) + result['extractSeconds']
+    return result
+
+def writeProfileReport(profiler: cProfile.Profile, profileFile: str):
+    """
+    the raw stats for pstats or a viewer in profileFile, and the functions of the most cumulative time as text beside it
+    """
+    profiler.dump_stats(profileFile)
+    with open(os.path.splitext(profileFile)[0] + '.txt', 'w') as writeFile:
+        stats = pstats.Stats(profiler, stream=writeFile)
+        stats.sort_stats('cumulative').print_stats(PROFILE_REPORT_LINES)
+
+def runCase(connection, distribution: str, size: int, seed: int, recordSteps: bool, measureMemory: bool, canvasWidth: int, canvasHeight: int, pack: bool = False, algorithm: str = 'divide', workers: int = 1, profileFile: str = None):
+    """
+    entry of the benchmark process, send the result of one case back through the connection
+    :param profileFile: profile the case with cProfile into this file, and add the merge counters
+    """
+    try:
+        points = DISTRIBUTIONS[distribution](size, random.Random(seed))
+        timer = PhaseTimer()
+        timer.install()
+        result = buildDiagram(points, recordSteps, canvasWidth, canvasHeight, timer, pack, algorithm, workers, profileFile != None)
+
+        if(profileFile != None):
+            # cProfile slows down the build like tracing, so it profiles another build
+            profiler = cProfile.Profile()
+            profiler.runcall(buildDiagram, points, recordSteps, canvasWidth, canvasHeight, pack=pack, algorithm=algorithm, workers=workers)
+            writeProfileReport(profiler, profileFile)
+            result['profileFile'] = profileFile
+
+        if(measureMemory):
+            # tracing slows down the build, so the memory is measured in another build, only this process is traced
+            tracemalloc.start()
+            buildDiagram(points, recordSteps, canvasWidth, canvasHeight, pack=pack, algorithm=algorithm, workers=workers)
+            result['peakMemoryBytes'] = tracemalloc.get_traced_memory()[1]
+            result['bytesPerSite'] = result['peakMemoryBytes'] / result['sites']
+            tracemalloc.stop()
+        result['status'] = 'ok'
+    except Exception as error:
+        result = {'status': 'error', 'error': f'{type(error).__name__}: {error}'}
+    connection.send(result)
+    connection.close()
+
+def benchmark(distribution: str, size: int, seed: int, recordSteps: bool, measureMemory: bool, timeout: float, canvasWidth: int = CANVAS_WIDTH, canvasHeight: int = CANVAS_HEIGHT, pack: bool = False, algorithm: str = 'divide', workers: int = 1, profileFile: str = None) -> dict:
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=runCase, args=(sender, distribution, size, seed, recordSteps, measureMemory, canvasWidth, canvasHeight, pack, algorithm, workers, profileFile))
+    process.start()
+    sender.close()
+    if(receiver.poll(timeout)):
+        try:
+            result = receiver.recv()
+        except EOFError:
+            result = {'status': 'crashed'}
+    else:
+        result = {'status': 'timeout'}
+        process.terminate()
+    process.join()
+    result.update({'distribution': distribution, 'size': size, 'seed': seed, 'recordSteps': recordSteps, 'pack': pack, 'algorithm': algorithm, 'workers': workers})
+    return result
+
+def addScalingExponent(results: list[dict]):
+    """
+    the exponent k of time ~ n^k between two neighboring sizes of the same distribution and workers, k well above 1 means superlinear blowup
+    """
+    previous = {}
+    for result in sorted(results, key=lambda result: result['size']):
+        if(result['status'] != 'ok'):
+            continue
+        last = previous.get((result['distribution'], result['workers']))
+        if(last != None and result['sites'] > last['sites'] and last['totalSeconds'] > 0):
+            result['scalingExponent'] = math.log(result['totalSeconds'] / last['totalSeconds']) / math.log(result['sites'] / last['sites'])
+        previous[(result['distribution'], result['workers'])] = result
+
+def addSpeedup(results: list[dict]):
+    """
+    the speedup of each case over the same distribution and size with the fewest workers
+    """
+    baseline = {}
+    for result in sorted(results, key=lambda result: result['workers']):
+        if(result['status'] != 'ok'):
+            continue
+        first = baseline.setdefault((result['distribution'], result['size']), result)
+        if(result['totalSeconds'] > 0):
+            result['speedup'] = first['totalSeconds'] / result['totalSeconds']
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Scaling benchmark of Voronoi.buildVoronoiDiagram')
+    parser.add_argument('-o', '--output', default='benchmark_result.json', help='json file of the results')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help='number of points')
+    parser.add_argument('--distributions', nargs='+', default=list(DISTRIBUTIONS), choices=list(DISTRIBUTIONS))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=600, help='seconds before a case is given up')
+    parser.add_argument('--no-records', action='store_true', help='build without the merge records of the step by step execution')
+    parser.add_argument('--no-memory', action='store_true', help='skip the peak memory measurement')
+    parser.add_argument('--pack', action='store_true', help='also time packing the graph into an ArrayVoronoiGraph(toArrayGraph)')
+    parser.add_argument('--algorithm', default='divide', choices=ALGORITHMS, help='fortune builds the clipped edges only, so the records are skipped')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1], help='numbers of worker processes of divide and conquer, more than one skips the records')
+    parser.add_argument('--profile', action='store_true', help='add the merge counters and write a cProfile report of every case')
+    args = parser.parse_args(argv)
+    if(args.algorithm == 'fortune' and max(args.workers) > 1):
+        parser.error('more than one worker needs the divide and conquer algorithm')
+
+    results = []
+    cases = [(distribution, size, workers) for distribution in args.distributions for size in sorted(args.sizes) for workers in sorted(args.workers)]
+    for distribution, size, workers in cases:
+        recordSteps = not args.no_records and args.algorithm == 'divide' and workers == 1
+        profileFile = f'{os.path.splitext(args.output)[0]}_{distribution}_{size}_x{workers}.prof' if args.profile else None
+        result = benchmark(distribution, size, args.seed, recordSteps, not args.no_memory, args.timeout, pack=args.pack, algorithm=args.algorithm, workers=workers, profileFile=profileFile)
+        results.append(result)
+        label = f"{distribution:>10} {size:>7}" + (f" x{workers}" if len(args.workers) > 1 else '')
+        if(result['status'] == 'ok'):
+            memory = f" {result['peakMemoryBytes'] / 1e6:.1f}MB ({result['bytesPerSite']:.0f} bytes/site)" if 'peakMemoryBytes' in result else ''
+            if('sweepSeconds' in result):
+                print(f"{label}: {result['totalSeconds']:.3f}s (sort {result['sortSeconds']:.3f}s, sweep {result['sweepSeconds']:.3f}s){memory}")
+            else:
+                pack = f", pack {result['packSeconds']:.3f}s" if 'packSeconds' in result else ''
+                print(f"{label}: {result['totalSeconds']:.3f}s (divide {result['divideSeconds']:.3f}s, merge {result['mergeSeconds']:.3f}s, record {result['recordSeconds']:.3f}s{pack}, extract {result['extractSeconds']:.3f}s){memory}")
+                if('mergeProfile' in result):
+                    totals = result['mergeProfile']['totals']
+                    print(f"{'':>18} {totals['merges']} merges, {totals['hyperPlaneEdges']} hyperplane edges, {totals['intersectionTests']} intersection tests, {totals['removeEdgeCalls']} removeEdge calls, {totals['cleanupFaces']} cleanup faces")
+        else:
+            print(f"{label}: {result['status']} {result.get('error', '')}")
+    addScalingExponent(results)
+    addSpeedup(results)
+    for result in results:
+        if(result.get('workers', 1) > 1 and 'speedup' in result):
+            print(f"{result['distribution']:>10} {result['size']:>7} x{result['workers']}: speedup {result['speedup']:.2f} ({result.get('slabs', 0)} ranges in other processes)")
+
+    with open(args.output, 'w') as writeFile:
+        json.dump({
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'canvasWidth': CANVAS_WIDTH,
+            'canvasHeight': CANVAS_HEIGHT,
+            'results': results,
+        }, writeFile, indent=2)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
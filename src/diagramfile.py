@@ -0,0 +1,166 @@
+"""
+binary voronoi diagram file
+
+the sites and edges are stored as contiguous float64 arrays without rounding, and the half-edge arrays of
+ArrayVoronoiGraph can be stored with them. the file is memory-mapped when it is opened, so the arrays are used in place
+and the Point and Edge objects are only created when they are asked for.
+
+layout(little-endian, every array starts at a multiple of 8 bytes):
+    header: magic b'VORD', version, flags, canvas width, canvas height, number of sites, number of edges
+    sites: x, y of every site
+    edges: x1, y1, x2, y2 of every edge
+    topology(flags & FLAG_TOPOLOGY): the length of every column of ArrayVoronoiGraph.COLUMNS, then the columns in order
+"""
+import mmap
+import struct
+import sys
+from array import array
+from voronoi import ArrayVoronoiGraph, Edge, Point
+
+MAGIC = b'VORD'
+VERSION = 1
+FLAG_TOPOLOGY = 1
+HEADER = struct.Struct('<4sHHddQQ')
+COLUMN_LENGTHS = struct.Struct(f'<{len(ArrayVoronoiGraph.COLUMNS)}Q')
+
+def getPadding(size: int) -> int:
+    return -size % 8
+
+def writeArray(writeFile, values: array):
+    if(sys.byteorder != 'little'):
+        values = array(values.typecode, values)
+        values.byteswap()
+    values.tofile(writeFile)
+    writeFile.write(bytes(getPadding(len(values) * values.itemsize)))
+
+def createVoronoiBinaryFile(file, points: list[Point], edges: list[Edge], canvasWidth: float = 0, canvasHeight: float = 0, arrayGraph: ArrayVoronoiGraph = None):
+    """
+    write the sites and the edges, the edges are written as they are(Voronoi.edges is sorted and starts from the left)
+    :param arrayGraph: the topology of the diagram, not written if None
+    """
+    siteArray = array('d')
+    for point in points:
+        siteArray.append(point.x)
+        siteArray.append(point.y)
+    edgeArray = array('d')
+    for edge in edges:
+        edgeArray.extend((edge.start.x, edge.start.y, edge.end.x, edge.end.y))
+
+    with open(file, 'wb') as writeFile:
+        writeFile.write(HEADER.pack(MAGIC, VERSION, FLAG_TOPOLOGY if arrayGraph != None else 0, canvasWidth, canvasHeight, len(points), len(edges)))
+        writeArray(writeFile, siteArray)
+        writeArray(writeFile, edgeArray)
+        if(arrayGraph != None):
+            columns = [getattr(arrayGraph, name) for name in ArrayVoronoiGraph.COLUMNS]
+            writeFile.write(COLUMN_LENGTHS.pack(*(len(column) for column in columns)))
+            for column in columns:
+                writeArray(writeFile, column if isinstance(column, array) else array(column.format, column))
+
+def openVoronoiBinaryFile(file) -> 'VoronoiBinaryFile':
+    """
+    raise ValueError if the file is not a binary voronoi file of a known version
+    """
+    return VoronoiBinaryFile(file)
+
+
+class VoronoiBinaryFile():
+    """
+    memory-mapped binary voronoi file, the arrays are memoryviews of the file.
+    close it after the views(and numpy arrays made from them) are dropped
+    """
+    version: int
+    canvasWidth: float
+    canvasHeight: float
+    siteCount: int
+    edgeCount: int
+    sites: memoryview
+    edges: memoryview
+    arrayGraph: ArrayVoronoiGraph
+
+    def __init__(self, file):
+        with open(file, 'rb') as readFile:
+            try:
+                self.mappedFile = mmap.mmap(readFile.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ValueError('empty voronoi binary file')
+        try:
+            self.load()
+        except Exception:
+            self.close()
+            raise
+
+    def load(self):
+        if(len(self.mappedFile) < HEADER.size):
+            raise ValueError('truncated voronoi binary file')
+        magic, self.version, flags, self.canvasWidth, self.canvasHeight, self.siteCount, self.edgeCount = HEADER.unpack_from(self.mappedFile, 0)
+        if(magic != MAGIC):
+            raise ValueError('not a voronoi binary file')
+        if(self.version != VERSION):
+            raise ValueError(f'unsupported voronoi binary file version {self.version}, expected {VERSION}')
+
+        self.offset = HEADER.size
+        self.sites = self.readArray('d', self.siteCount * 2)
+        self.edges = self.readArray('d', self.edgeCount * 4)
+        self.arrayGraph = None
+        if(flags & FLAG_TOPOLOGY):
+            if(len(self.mappedFile) < self.offset + COLUMN_LENGTHS.size):
+                raise ValueError('truncated voronoi binary file')
+            lengths = COLUMN_LENGTHS.unpack_from(self.mappedFile, self.offset)
+            self.offset = self.offset + COLUMN_LENGTHS.size
+            self.arrayGraph = ArrayVoronoiGraph(self.canvasWidth, self.canvasHeight)
+            for name, length in zip(ArrayVoronoiGraph.COLUMNS, lengths):
+                setattr(self.arrayGraph, name, self.readArray(getattr(self.arrayGraph, name).typecode, length))
+
+    def readArray(self, typecode: str, length: int):
+        """
+        the next array of the file, a memoryview of the file on a little-endian machine and a copy otherwise
+        """
+        size = length * array(typecode).itemsize
+        if(len(self.mappedFile) < self.offset + size):
+            raise ValueError('truncated voronoi binary file')
+        view = memoryview(self.mappedFile)[self.offset:self.offset+size].cast(typecode)
+        self.offset = self.offset + size + getPadding(size)
+        if(sys.byteorder != 'little'):
+            values = array(typecode, view)
+            view.release()
+            values.byteswap()
+            return values
+        return view
+
+    def getPoints(self) -> list[Point]:
+        sites = self.sites
+        return [Point(sites[i], sites[i+1]) for i in range(0, len(sites), 2)]
+
+    def getEdges(self) -> list[Edge]:
+        edges = self.edges
+        return [Edge(Point(edges[i], edges[i+1]), Point(edges[i+2], edges[i+3])) for i in range(0, len(edges), 4)]
+
+    def getSiteArray(self):
+        """
+        the sites as an (n, 2) numpy array without copying, numpy is only needed by this method and getEdgeArray
+        """
+        import numpy
+        return numpy.frombuffer(self.sites, dtype='d').reshape(-1, 2)
+
+    def getEdgeArray(self):
+        """
+        the edges as an (n, 4) numpy array of x1, y1, x2, y2 without copying
+        """
+        import numpy
+        return numpy.frombuffer(self.edges, dtype='d').reshape(-1, 4)
+
+    def close(self):
+        views = [self.__dict__.pop('sites', None), self.__dict__.pop('edges', None)]
+        arrayGraph = self.__dict__.pop('arrayGraph', None)
+        if(arrayGraph != None):
+            views.extend(getattr(arrayGraph, name) for name in ArrayVoronoiGraph.COLUMNS)
+        for view in views:
+            if(isinstance(view, memoryview)):
+                view.release()
+        self.mappedFile.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
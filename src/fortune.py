@@ -0,0 +1,375 @@
+"""
+fortune's sweep line algorithm of the voronoi diagram
+
+the sweep line moves down the canvas(y increasing). site and circle events are kept in a heap and the arcs of the
+beach line in a treap ordered by x, so every event takes O(log n). only plain (x, y) tuples are used, the edges are
+clipped to the canvas
+"""
+import heapq
+import random
+from math import sqrt
+
+SITE_EVENT = 1
+# a circle event is handled before the site event at the same place
+CIRCLE_EVENT = 0
+# the edges shorter than this after the clipping are dropped, they come from the voronoi points shared by more than 3 faces
+MIN_EDGE_LENGTH = 1e-9
+
+def getBreakPointX(leftSite: tuple, rightSite: tuple, sweepY: float) -> float:
+    """
+    x of the break point between the parabola of leftSite(on the left) and rightSite(on the right)
+    when the sweep line is at sweepY
+    """
+    leftX, leftY = leftSite
+    rightX, rightY = rightSite
+    if(leftY == rightY):
+        return (leftX + rightX) / 2
+    # the parabola of the site on the sweep line is a vertical line
+    if(leftY == sweepY):
+        return leftX
+    if(rightY == sweepY):
+        return rightX
+
+    # parabola of a site: y = (x^2 - 2 * siteX * x + siteX^2 + siteY^2 - sweepY^2) / (2 * (siteY - sweepY))
+    leftDenominator = 2 * (leftY - sweepY)
+    rightDenominator = 2 * (rightY - sweepY)
+    a = 1 / leftDenominator - 1 / rightDenominator
+    b = -2 * (leftX / leftDenominator - rightX / rightDenominator)
+    c = (leftX * leftX + leftY * leftY - sweepY * sweepY) / leftDenominator - (rightX * rightX + rightY * rightY - sweepY * sweepY) / rightDenominator
+    squareRoot = sqrt(max(b * b - 4 * a * c, 0))
+    # the left parabola is below the right one on the left of the break point, which is the root (-b - squareRoot) / 2a.
+    # use the form without cancellation
+    if(b >= 0):
+        return (-b - squareRoot) / (2 * a)
+    return 2 * c / (-b + squareRoot)
+
+def getCircumcenter(site1: tuple, site2: tuple, site3: tuple) -> tuple:
+    """
+    :return: center of the circle through the 3 sites, None if they are collinear
+    """
+    x1, y1 = site1
+    x2, y2 = site2
+    x3, y3 = site3
+    determinant = 2 * (x1 * (y2 - y3) + x2 * (y3 - y1) + x3 * (y1 - y2))
+    if(determinant == 0):
+        return None
+    square1 = x1 * x1 + y1 * y1
+    square2 = x2 * x2 + y2 * y2
+    square3 = x3 * x3 + y3 * y3
+    centerX = (square1 * (y2 - y3) + square2 * (y3 - y1) + square3 * (y1 - y2)) / determinant
+    centerY = (square1 * (x3 - x2) + square2 * (x1 - x3) + square3 * (x2 - x1)) / determinant
+    return centerX, centerY
+
+def clipLine(x: float, y: float, directionX: float, directionY: float, minT: float, maxT: float, width: float, height: float) -> tuple:
+    """
+    liang-barsky clipping of (x, y) + t * (directionX, directionY), minT <= t <= maxT, to the canvas
+    :return: (x1, y1, x2, y2) or None if nothing is in the canvas
+    """
+    for p, q in ((-directionX, x), (directionX, width - x), (-directionY, y), (directionY, height - y)):
+        if(p == 0):
+            if(q < 0):
+                return None
+        elif(p < 0):
+            minT = max(minT, q / p)
+        else:
+            maxT = min(maxT, q / p)
+    if(minT > maxT):
+        return None
+    return (x + minT * directionX, y + minT * directionY, x + maxT * directionX, y + maxT * directionY)
+
+
+class Arc():
+    """
+    arc of the beach line and node of the treap.
+    the break point between the arc and the next arc traces the end `side` of `edge`
+    """
+    __slots__ = ('site', 'prev', 'next', 'edge', 'side', 'event', 'left', 'right', 'parent', 'priority')
+
+    def __init__(self, site: tuple, priority: float):
+        self.site = site
+        self.prev = None
+        self.next = None
+        self.edge = None
+        self.side = 0
+        self.event = None
+        self.left = None
+        self.right = None
+        self.parent = None
+        self.priority = priority
+
+
+class SweepEdge():
+    """
+    voronoi edge between two sites, an end is the voronoi point or None if it is open in the direction of that end
+    """
+    __slots__ = ('leftSite', 'rightSite', 'vertices', 'directions')
+
+    def __init__(self, leftSite: tuple, rightSite: tuple):
+        self.leftSite = leftSite
+        self.rightSite = rightSite
+        self.vertices = [None, None]
+        # the break point of the left site(left) and the right site(right) moves in directions[1]
+        directionX = leftSite[1] - rightSite[1]
+        directionY = rightSite[0] - leftSite[0]
+        self.directions = [(-directionX, -directionY), (directionX, directionY)]
+
+
+class CircleEvent():
+    __slots__ = ('arc', 'center', 'valid')
+
+    def __init__(self, arc: Arc, center: tuple):
+        self.arc = arc
+        self.center = center
+        self.valid = True
+
+
+class BeachLine():
+    """
+    treap of the arcs in the order of x, the arcs are also linked by prev and next
+    """
+    def __init__(self, seed: int = 0):
+        self.root = None
+        self.random = random.Random(seed)
+
+    def createArc(self, site: tuple) -> Arc:
+        return Arc(site, self.random.random())
+
+    def findArc(self, x: float, sweepY: float) -> Arc:
+        """
+        the arc above x
+        """
+        arc = self.root
+        while(True):
+            if(arc.prev != None and x < getBreakPointX(arc.prev.site, arc.site, sweepY)):
+                if(arc.left == None):
+                    return arc
+                arc = arc.left
+            elif(arc.next != None and x > getBreakPointX(arc.site, arc.next.site, sweepY)):
+                if(arc.right == None):
+                    return arc
+                arc = arc.right
+            else:
+                return arc
+
+    def getLastArc(self) -> Arc:
+        arc = self.root
+        while(arc.right != None):
+            arc = arc.right
+        return arc
+
+    def insertAfter(self, arc: Arc, newArc: Arc):
+        """
+        insert newArc right after arc, arc is None for the first arc
+        """
+        if(arc == None):
+            self.root = newArc
+            return
+        newArc.prev = arc
+        newArc.next = arc.next
+        if(arc.next != None):
+            arc.next.prev = newArc
+        arc.next = newArc
+
+        # newArc is the leftmost node of the right subtree
+        if(arc.right == None):
+            arc.right = newArc
+            newArc.parent = arc
+        else:
+            parent = arc.right
+            while(parent.left != None):
+                parent = parent.left
+            parent.left = newArc
+            newArc.parent = parent
+        while(newArc.parent != None and newArc.priority < newArc.parent.priority):
+            self.rotateUp(newArc)
+
+    def remove(self, arc: Arc):
+        # rotate the arc down to a leaf
+        while(arc.left != None or arc.right != None):
+            if(arc.right == None or (arc.left != None and arc.left.priority < arc.right.priority)):
+                self.rotateUp(arc.left)
+            else:
+                self.rotateUp(arc.right)
+        if(arc.parent == None):
+            self.root = None
+        elif(arc.parent.left == arc):
+            arc.parent.left = None
+        else:
+            arc.parent.right = None
+
+        if(arc.prev != None):
+            arc.prev.next = arc.next
+        if(arc.next != None):
+            arc.next.prev = arc.prev
+
+    def rotateUp(self, arc: Arc):
+        parent = arc.parent
+        grandParent = parent.parent
+        if(parent.left == arc):
+            parent.left = arc.right
+            if(arc.right != None):
+                arc.right.parent = parent
+            arc.right = parent
+        else:
+            parent.right = arc.left
+            if(arc.left != None):
+                arc.left.parent = parent
+            arc.left = parent
+        parent.parent = arc
+        arc.parent = grandParent
+        if(grandParent == None):
+            self.root = arc
+        elif(grandParent.left == parent):
+            grandParent.left = arc
+        else:
+            grandParent.right = arc
+
+
+class FortuneSweep():
+    """
+    build the voronoi edges of the sites with fortune's algorithm
+    """
+    def __init__(self, sites: list[tuple]):
+        """
+        :param sites: (x, y) of the sites without duplicate
+        """
+        self.sites = sites
+        self.beachLine = BeachLine()
+        self.events = []
+        self.edges: list[SweepEdge] = []
+        # tie breaker of the events at the same place
+        self.eventCount = 0
+
+    def run(self):
+        self.events = [(y, x, SITE_EVENT, i, None) for i, (x, y) in enumerate(self.sites)]
+        heapq.heapify(self.events)
+        self.eventCount = len(self.sites)
+        firstSiteY = None
+        while(len(self.events) > 0):
+            y, x, kind, _, event = heapq.heappop(self.events)
+            if(kind == SITE_EVENT):
+                if(firstSiteY == None):
+                    firstSiteY = y
+                self.handleSiteEvent((x, y), y == firstSiteY)
+            elif(event.valid):
+                self.handleCircleEvent(event, y)
+        return self.edges
+
+    def handleSiteEvent(self, site: tuple, onFirstRow: bool):
+        beachLine = self.beachLine
+        if(beachLine.root == None):
+            beachLine.insertAfter(None, beachLine.createArc(site))
+            return
+
+        # the sites on the first row have no arc above them, they are added from left to right with vertical edges
+        if(onFirstRow):
+            lastArc = beachLine.getLastArc()
+            edge = SweepEdge(lastArc.site, site)
+            self.edges.append(edge)
+            lastArc.edge = edge
+            lastArc.side = 1
+            beachLine.insertAfter(lastArc, beachLine.createArc(site))
+            return
+
+        # split the arc above the site into two and put the arc of the site between them
+        arc = beachLine.findArc(site[0], site[1])
+        if(arc.event != None):
+            arc.event.valid = False
+            arc.event = None
+        edge = SweepEdge(arc.site, site)
+        self.edges.append(edge)
+        newArc = beachLine.createArc(site)
+        rightArc = beachLine.createArc(arc.site)
+        rightArc.edge = arc.edge
+        rightArc.side = arc.side
+        arc.edge = edge
+        arc.side = 1
+        newArc.edge = edge
+        newArc.side = 0
+        beachLine.insertAfter(arc, newArc)
+        beachLine.insertAfter(newArc, rightArc)
+        self.addCircleEvent(arc, site[1])
+        self.addCircleEvent(rightArc, site[1])
+
+    def handleCircleEvent(self, event: CircleEvent, sweepY: float):
+        arc = event.arc
+        prevArc = arc.prev
+        nextArc = arc.next
+        vertex = event.center
+        # the two break points around the arc meet at the voronoi point
+        prevArc.edge.vertices[prevArc.side] = vertex
+        arc.edge.vertices[arc.side] = vertex
+
+        # the new break point starts from the voronoi point
+        edge = SweepEdge(prevArc.site, nextArc.site)
+        edge.vertices[0] = vertex
+        self.edges.append(edge)
+        prevArc.edge = edge
+        prevArc.side = 1
+
+        for neighbor in (prevArc, nextArc):
+            if(neighbor.event != None):
+                neighbor.event.valid = False
+                neighbor.event = None
+        self.beachLine.remove(arc)
+        self.addCircleEvent(prevArc, sweepY)
+        self.addCircleEvent(nextArc, sweepY)
+
+    def addCircleEvent(self, arc: Arc, sweepY: float):
+        """
+        add the event where the arc disappears if the break points around it converge
+        """
+        if(arc.prev == None or arc.next == None or arc.prev.site == arc.next.site):
+            return
+        (x1, y1), (x2, y2), (x3, y3) = arc.prev.site, arc.site, arc.next.site
+        # the break points only converge when the sites turn counterclockwise on the screen
+        if((x2 - x1) * (y3 - y1) - (x3 - x1) * (y2 - y1) <= 0):
+            return
+        center = getCircumcenter(arc.prev.site, arc.site, arc.next.site)
+        if(center == None):
+            return
+        radius = sqrt((x2 - center[0]) ** 2 + (y2 - center[1]) ** 2)
+        event = CircleEvent(arc, center)
+        arc.event = event
+        self.eventCount = self.eventCount + 1
+        heapq.heappush(self.events, (max(center[1] + radius, sweepY), center[0], CIRCLE_EVENT, self.eventCount, event))
+
+def getClippedEdge(edge: SweepEdge, width: float, height: float) -> tuple:
+    """
+    :return: (x1, y1, x2, y2) of the part of the edge in the canvas, x1 < x2 or x1 == x2 and y1 <= y2,
+    None if it is not in the canvas
+    """
+    startVertex, endVertex = edge.vertices
+    if(startVertex != None and endVertex != None):
+        segment = clipLine(startVertex[0], startVertex[1], endVertex[0] - startVertex[0], endVertex[1] - startVertex[1], 0, 1, width, height)
+    elif(startVertex != None):
+        segment = clipLine(startVertex[0], startVertex[1], *edge.directions[1], 0, float('inf'), width, height)
+    elif(endVertex != None):
+        segment = clipLine(endVertex[0], endVertex[1], *edge.directions[0], 0, float('inf'), width, height)
+    else:
+        # the whole bisector of the two sites
+        midX = (edge.leftSite[0] + edge.rightSite[0]) / 2
+        midY = (edge.leftSite[1] + edge.rightSite[1]) / 2
+        segment = clipLine(midX, midY, *edge.directions[1], float('-inf'), float('inf'), width, height)
+
+    if(segment == None):
+        return None
+    x1, y1, x2, y2 = segment
+    if(abs(x2 - x1) <= MIN_EDGE_LENGTH and abs(y2 - y1) <= MIN_EDGE_LENGTH):
+        return None
+    if(x1 < x2 or x1 == x2 and y1 <= y2):
+        return segment
+    return (x2, y2, x1, y1)
+
+def buildFortuneEdges(sites: list[tuple], width: float, height: float) -> list[tuple]:
+    """
+    :param sites: (x, y) of the sites without duplicate
+    :return: (x1, y1, x2, y2) of the voronoi edges clipped to the canvas, sorted by the start point and then the end point
+    """
+    edges = []
+    for edge in FortuneSweep(sites).run():
+        segment = getClippedEdge(edge, width, height)
+        if(segment != None):
+            edges.append(segment)
+    edges.sort()
+    return edges
@@ -0,0 +1,403 @@
+"""
+nearest site queries on a uniform grid over the sites and the canvas
+
+the face containing a point is the face of the nearest site. every bucket of the grid keeps the sites which can be the
+nearest site of a point in it: the sites not farther from the bucket than the smallest distance within which every
+point of the bucket has a site. a query only measures the sites of its bucket, a few on average. the index only uses
+the sites, so it works for the diagrams of both algorithms. inserting or removing a site only changes the buckets
+around it
+"""
+from array import array
+from math import ceil, sqrt
+
+# the average number of sites in a bucket, a finer grid leaves fewer sites to measure in a query
+SITES_PER_BUCKET = 0.5
+# the sites nearest to the center of a bucket, which are tested against the other sites of the bucket
+DOMINATORS = 4
+# the most sites of a bucket in the table of locateMany, the buckets with more sites are measured one at a time
+TABLE_WIDTH = 16
+# the grid is too fine or too coarse for the sites when the average sites per bucket is off by this factor
+UNBALANCED_FACTOR = 4
+
+class SiteLocator():
+    """
+    a site has a slot, which is kept until the site is removed. the candidates of bucket b are bucketCandidates[b],
+    the (x, y, slot) of its sites sorted by (x, y), so the first of the nearest sites at the same distance is the
+    smallest in the order of Voronoi.points. bucket b covers column b % columns and row b // columns of the grid
+    """
+    sites: list
+    siteX: list
+    siteY: list
+    siteSlots: dict
+    freeSlots: list
+    siteCount: int
+    sitesPerBucket: float
+    left: float
+    top: float
+    right: float
+    bottom: float
+    bucketWidth: float
+    bucketHeight: float
+    columns: int
+    rows: int
+    grid: tuple
+    bucketPoints: list
+    bucketCandidates: list
+    coverDistances: array
+    siteBuckets: list
+    arrays: tuple
+
+    def __init__(self, points: list, canvasWidth: float, canvasHeight: float, sitesPerBucket: float = SITES_PER_BUCKET):
+        """
+        :param points: the sites, different points
+        :param sitesPerBucket: the average number of sites in a bucket, which sets the size of the grid
+        """
+        self.sites = list(points)
+        self.siteX = [point.x for point in points]
+        self.siteY = [point.y for point in points]
+        self.siteSlots = {(point.x, point.y): slot for slot, point in enumerate(points)}
+        self.freeSlots = []
+        self.siteCount = len(points)
+        self.sitesPerBucket = sitesPerBucket
+        # the grid covers the canvas and every site, the queries outside it are measured against every site
+        self.left = min(0, min(self.siteX, default=0))
+        self.top = min(0, min(self.siteY, default=0))
+        self.right = max(canvasWidth, max(self.siteX, default=0))
+        self.bottom = max(canvasHeight, max(self.siteY, default=0))
+        width = self.right - self.left
+        height = self.bottom - self.top
+        bucketCount = max(1, ceil(len(points) / sitesPerBucket))
+        if(width <= 0 or height <= 0):
+            self.columns = self.rows = 1
+        else:
+            self.columns = max(1, round(sqrt(bucketCount * width / height)))
+            self.rows = max(1, ceil(bucketCount / self.columns))
+        self.bucketWidth = max(width, 1e-9) / self.columns
+        self.bucketHeight = max(height, 1e-9) / self.rows
+        self.grid = (self.left, self.top, self.right, self.bottom, self.bucketWidth, self.bucketHeight, self.columns, self.rows)
+        # the buckets of each slot, only built by the first removeSite
+        self.siteBuckets = None
+        self.arrays = None
+        self.createBuckets()
+
+    def getBucket(self, x: float, y: float) -> int:
+        """
+        the bucket containing (x, y), -1 if it is outside the grid
+        """
+        if(x < self.left or x > self.right or y < self.top or y > self.bottom):
+            return -1
+        # the right and the bottom border belong to the last bucket
+        column = min(int((x - self.left) / self.bucketWidth), self.columns - 1)
+        row = min(int((y - self.top) / self.bucketHeight), self.rows - 1)
+        return row * self.columns + column
+
+    def getBucketBounds(self, bucket: int) -> tuple[float, float, float, float]:
+        """
+        left, top, right, bottom of the bucket
+        """
+        left = self.left + (bucket % self.columns) * self.bucketWidth
+        top = self.top + (bucket // self.columns) * self.bucketHeight
+        return left, top, left + self.bucketWidth, top + self.bucketHeight
+
+    def createBuckets(self):
+        # the sites lying in each bucket
+        self.bucketPoints = [[] for _ in range(self.columns * self.rows)]
+        for slot in range(len(self.sites)):
+            self.bucketPoints[self.getBucket(self.siteX[slot], self.siteY[slot])].append(slot)
+        self.bucketCandidates = [()] * (self.columns * self.rows)
+        self.coverDistances = array('d', [float('inf')]) * (self.columns * self.rows)
+        for bucket in range(self.columns * self.rows):
+            self.setCandidates(bucket, self.findCandidates(bucket))
+
+    def findCandidates(self, bucket: int) -> list[int]:
+        """
+        the slots of the sites which can be the nearest site of a point in the bucket, from the sites around it
+        """
+        siteX = self.siteX
+        siteY = self.siteY
+        columns = self.columns
+        rows = self.rows
+        row = bucket // columns
+        column = bucket % columns
+        left, top, right, bottom = self.getBucketBounds(bucket)
+        # the sites of the ring r around a bucket are at least (r - 1) * ringDistance from it
+        ringDistance = min(self.bucketWidth, self.bucketHeight)
+        coverDistance = float('inf')
+        nearbySites = []
+        ring = 0
+        # every point of the bucket has a site within coverDistance, so the sites farther than that from the
+        # bucket are never the nearest
+        while(ring <= max(rows, columns) and ((ring - 1) * ringDistance) ** 2 <= coverDistance):
+            for ringRow in range(row - ring, row + ring + 1):
+                if(ringRow < 0 or ringRow >= rows):
+                    continue
+                step = 1 if ringRow == row - ring or ringRow == row + ring else 2 * ring
+                for ringColumn in range(column - ring, column + ring + 1, max(step, 1)):
+                    if(ringColumn < 0 or ringColumn >= columns):
+                        continue
+                    for slot in self.bucketPoints[ringRow * columns + ringColumn]:
+                        x = siteX[slot]
+                        y = siteY[slot]
+                        farX = max(x - left, right - x)
+                        farY = max(y - top, bottom - y)
+                        coverDistance = min(coverDistance, farX * farX + farY * farY)
+                        nearbySites.append(slot)
+            ring = ring + 1
+        # the rounding error must not drop a site at the limit
+        coverDistance = coverDistance * (1 + 1e-9)
+        candidates = []
+        for slot in nearbySites:
+            x = siteX[slot]
+            y = siteY[slot]
+            nearX = max(left - x, 0, x - right)
+            nearY = max(top - y, 0, y - bottom)
+            if(nearX * nearX + nearY * nearY <= coverDistance):
+                candidates.append(slot)
+        # a site is never the nearest if a site near the center is closer at the 4 corners, since the points
+        # closer to one of two sites form a half plane: 2 * corner . (site - dominator) < |site|^2 - |dominator|^2
+        centerX = (left + right) / 2
+        centerY = (top + bottom) / 2
+        candidates.sort(key=lambda slot: (siteX[slot] - centerX) ** 2 + (siteY[slot] - centerY) ** 2)
+        dominators = candidates[:DOMINATORS]
+        keptCandidates = []
+        for slot in candidates:
+            x = siteX[slot]
+            y = siteY[slot]
+            norm = x * x + y * y
+            for dominator in dominators:
+                dominatorX = siteX[dominator]
+                dominatorY = siteY[dominator]
+                dominatorNorm = dominatorX * dominatorX + dominatorY * dominatorY
+                differenceX = x - dominatorX
+                differenceY = y - dominatorY
+                farthest = 2 * (max(left * differenceX, right * differenceX) + max(top * differenceY, bottom * differenceY))
+                if(farthest < norm - dominatorNorm - 1e-9 * (norm + dominatorNorm)):
+                    break
+            else:
+                keptCandidates.append(slot)
+        return keptCandidates
+
+    def setCandidates(self, bucket: int, candidates: list[int]):
+        """
+        make the sites the candidates of the bucket. its cover distance is the smallest distance within which every
+        point of the bucket has one of them, so it stays right when a site which is not a candidate is removed
+        """
+        siteX = self.siteX
+        siteY = self.siteY
+        left, top, right, bottom = self.getBucketBounds(bucket)
+        coverDistance = float('inf')
+        for slot in candidates:
+            farX = max(siteX[slot] - left, right - siteX[slot])
+            farY = max(siteY[slot] - top, bottom - siteY[slot])
+            coverDistance = min(coverDistance, farX * farX + farY * farY)
+        self.coverDistances[bucket] = coverDistance * (1 + 1e-9)
+        if(self.siteBuckets != None):
+            for _, _, slot in self.bucketCandidates[bucket]:
+                self.siteBuckets[slot].discard(bucket)
+            for slot in candidates:
+                self.siteBuckets[slot].add(bucket)
+        self.bucketCandidates[bucket] = tuple(sorted((siteX[slot], siteY[slot], slot) for slot in candidates))
+
+    def isBalanced(self) -> bool:
+        """
+        whether the grid still fits the number of sites, the locator should be built again if not
+        """
+        expectedSites = self.columns * self.rows * self.sitesPerBucket
+        if(self.columns * self.rows == 1):
+            return self.siteCount <= expectedSites * UNBALANCED_FACTOR
+        return expectedSites <= self.siteCount * UNBALANCED_FACTOR and self.siteCount <= expectedSites * UNBALANCED_FACTOR
+
+    def insertSite(self, point) -> bool:
+        """
+        add a site, which is a candidate of the buckets where it can be the nearest site. these buckets hold a part of
+        its face, which is connected, so they are found from the bucket of the site through the neighboring buckets
+        :return: False if the site is outside the grid and the locator is not changed, it should be built again
+        """
+        x = point.x
+        y = point.y
+        home = self.getBucket(x, y)
+        if(home == -1):
+            return False
+        if(len(self.freeSlots) > 0):
+            slot = self.freeSlots.pop()
+            self.sites[slot] = point
+            self.siteX[slot] = x
+            self.siteY[slot] = y
+        else:
+            slot = len(self.sites)
+            self.sites.append(point)
+            self.siteX.append(x)
+            self.siteY.append(y)
+            if(self.siteBuckets != None):
+                self.siteBuckets.append(set())
+        self.siteSlots[(x, y)] = slot
+        self.siteCount = self.siteCount + 1
+        self.bucketPoints[home].append(slot)
+        self.arrays = None
+
+        siteX = self.siteX
+        siteY = self.siteY
+        visited = {home}
+        stack = [home]
+        while(len(stack) > 0):
+            bucket = stack.pop()
+            left, top, right, bottom = self.getBucketBounds(bucket)
+            nearX = max(left - x, 0, x - right)
+            nearY = max(top - y, 0, y - bottom)
+            coverDistance = self.coverDistances[bucket]
+            if(nearX * nearX + nearY * nearY > coverDistance):
+                continue
+            farX = max(x - left, right - x)
+            farY = max(y - top, bottom - y)
+            coverDistance = min(coverDistance, (farX * farX + farY * farY) * (1 + 1e-9))
+            # the old candidates farther than the new cover distance are never the nearest
+            candidates = [slot]
+            for candidateX, candidateY, candidate in self.bucketCandidates[bucket]:
+                nearX = max(left - candidateX, 0, candidateX - right)
+                nearY = max(top - candidateY, 0, candidateY - bottom)
+                if(nearX * nearX + nearY * nearY <= coverDistance):
+                    candidates.append(candidate)
+            self.setCandidates(bucket, candidates)
+            row = bucket // self.columns
+            column = bucket % self.columns
+            for neighborRow in range(max(row - 1, 0), min(row + 2, self.rows)):
+                for neighborColumn in range(max(column - 1, 0), min(column + 2, self.columns)):
+                    neighbor = neighborRow * self.columns + neighborColumn
+                    if(neighbor not in visited):
+                        visited.add(neighbor)
+                        stack.append(neighbor)
+        return True
+
+    def removeSite(self, point) -> bool:
+        """
+        remove a site, the buckets it was a candidate of look for their candidates again among the sites around them
+        :return: False if the site is not in the locator
+        """
+        slot = self.siteSlots.pop((point.x, point.y), None)
+        if(slot == None):
+            return False
+        if(self.siteBuckets == None):
+            self.siteBuckets = [set() for _ in range(len(self.sites))]
+            for bucket, candidates in enumerate(self.bucketCandidates):
+                for _, _, candidate in candidates:
+                    self.siteBuckets[candidate].add(bucket)
+        self.bucketPoints[self.getBucket(self.siteX[slot], self.siteY[slot])].remove(slot)
+        self.sites[slot] = None
+        self.siteX[slot] = self.siteY[slot] = float('inf')
+        self.freeSlots.append(slot)
+        self.siteCount = self.siteCount - 1
+        self.arrays = None
+        for bucket in list(self.siteBuckets[slot]):
+            self.setCandidates(bucket, self.findCandidates(bucket))
+        return True
+
+    def locate(self, x: float, y: float):
+        """
+        the site nearest to (x, y), the smallest in (x, y) of the nearest sites at the same distance. None if there is
+        no site
+        """
+        # getBucket inlined, this runs on every mouse motion
+        left, top, right, bottom, bucketWidth, bucketHeight, columns, rows = self.grid
+        if(x < left or x > right or y < top or y > bottom):
+            candidates = sorted((siteX, siteY, slot) for slot, (siteX, siteY) in enumerate(zip(self.siteX, self.siteY)) if self.sites[slot] != None)
+        else:
+            column = int((x - left) / bucketWidth)
+            row = int((y - top) / bucketHeight)
+            if(column == columns):
+                column = column - 1
+            if(row == rows):
+                row = row - 1
+            candidates = self.bucketCandidates[row * columns + column]
+            if(len(candidates) == 1):
+                return self.sites[candidates[0][2]]
+        nearest = -1
+        nearestDistance = float('inf')
+        for siteX, siteY, slot in candidates:
+            dx = siteX - x
+            dy = siteY - y
+            distance = dx * dx + dy * dy
+            if(distance < nearestDistance):
+                nearest = slot
+                nearestDistance = distance
+        return None if nearest == -1 else self.sites[nearest]
+
+    def getArrays(self) -> tuple:
+        """
+        the numpy arrays of locateMany, made again after the sites change: the x and y of the sites sorted by (x, y),
+        the bucket offsets and the bucket sites(CSR, indexes into the sorted sites) and the candidate table, the sites of
+        every bucket as a (buckets, TABLE_WIDTH or less) array padded with -1 where the rows of the buckets with more
+        sites are left empty
+        """
+        if(self.arrays == None):
+            import numpy
+            order = sorted((slot for slot in range(len(self.sites)) if self.sites[slot] != None), key=lambda slot: (self.siteX[slot], self.siteY[slot]))
+            rank = [-1] * len(self.sites)
+            for index, slot in enumerate(order):
+                rank[slot] = index
+            siteX = numpy.array([self.siteX[slot] for slot in order], dtype=numpy.float64)
+            siteY = numpy.array([self.siteY[slot] for slot in order], dtype=numpy.float64)
+            counts = numpy.array([len(candidates) for candidates in self.bucketCandidates], dtype=numpy.int64)
+            offset = numpy.concatenate(([0], numpy.cumsum(counts)))
+            # the candidates are sorted by (x, y), so their indexes are increasing
+            bucketSites = numpy.array([rank[slot] for candidates in self.bucketCandidates for _, _, slot in candidates], dtype=numpy.int64)
+            width = max(1, min(int(counts.max(initial=0)), TABLE_WIDTH))
+            table = numpy.full((len(counts), width), -1, dtype=numpy.int64)
+            filled = counts <= width
+            table[(numpy.arange(width) < counts[:, None]) & filled[:, None]] = bucketSites[numpy.repeat(filled, counts)]
+            self.arrays = (siteX, siteY, offset, bucketSites, table)
+        return self.arrays
+
+    def locateMany(self, xs, ys, chunkSize: int = 65536):
+        """
+        locate of every point as the index of the site in the sites sorted by (x, y), which is Voronoi.points
+        :return: int64 numpy array of indexes in the shape of the points(-1 if there is no site). without numpy, xs and
+        ys are sequences of the same length and the list of indexes is given by locate
+        """
+        try:
+            import numpy
+        except ImportError:
+            return self.locateManyWithoutNumpy(xs, ys)
+        xs, ys = numpy.broadcast_arrays(numpy.asarray(xs, dtype=numpy.float64), numpy.asarray(ys, dtype=numpy.float64))
+        shape = xs.shape
+        xs = xs.ravel()
+        ys = ys.ravel()
+        result = numpy.full(len(xs), -1, dtype=numpy.int64)
+        if(self.siteCount == 0):
+            return result.reshape(shape)
+        siteX, siteY, offset, bucketSites, table = self.getArrays()
+        crowdedBuckets = numpy.diff(offset) > table.shape[1]
+        # the padding of the table points to a site at infinity
+        paddedX = numpy.append(siteX, numpy.inf)
+        paddedY = numpy.append(siteY, numpy.inf)
+        for start in range(0, len(xs), chunkSize):
+            x = xs[start:start+chunkSize]
+            y = ys[start:start+chunkSize]
+            inside = (x >= self.left) & (x <= self.right) & (y >= self.top) & (y <= self.bottom)
+            column = numpy.minimum(numpy.floor((x - self.left) / self.bucketWidth), self.columns - 1)
+            row = numpy.minimum(numpy.floor((y - self.top) / self.bucketHeight), self.rows - 1)
+            bucket = numpy.where(inside, row * self.columns + column, 0).astype(numpy.int64)
+            candidates = table[bucket]
+            dx = paddedX[candidates] - x[:, None]
+            dy = paddedY[candidates] - y[:, None]
+            nearest = candidates[numpy.arange(len(x)), numpy.argmin(dx * dx + dy * dy, axis=1)]
+            # the points in a crowded bucket are measured one bucket at a time
+            crowded = numpy.flatnonzero(inside & crowdedBuckets[bucket])
+            for crowdedBucket in numpy.unique(bucket[crowded]):
+                queries = crowded[bucket[crowded] == crowdedBucket]
+                sites = bucketSites[offset[crowdedBucket]:offset[crowdedBucket+1]]
+                distances = (siteX[sites] - x[queries, None]) ** 2 + (siteY[sites] - y[queries, None]) ** 2
+                nearest[queries] = sites[numpy.argmin(distances, axis=1)]
+            # the points outside the grid are measured against every site
+            for index in numpy.flatnonzero(~inside):
+                nearest[index] = numpy.argmin((siteX - x[index]) ** 2 + (siteY - y[index]) ** 2)
+            result[start:start+chunkSize] = nearest
+        return result.reshape(shape)
+
+    def locateManyWithoutNumpy(self, xs, ys) -> list[int]:
+        sites = sorted((point.x, point.y) for point in self.sites if point != None)
+        indexes = {site: index for index, site in enumerate(sites)}
+        result = []
+        for x, y in zip(xs, ys):
+            site = self.locate(x, y)
+            result.append(-1 if site == None else indexes[(site.x, site.y)])
+        return result
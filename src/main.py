@@ -2,9 +2,12 @@ from tkinter import *
 from tkinter import ttk
 from tkinter import filedialog
 from tkinter import messagebox
-from voronoi import Voronoi, Point, voronoiFileParser, createVoronoiFile, testCaseParser
+from voronoi import Voronoi, Point, Edge, voronoiFileParser, createVoronoiFile, iterTestCases, isInDistrict, BuildCancelledError
+from diagramfile import createVoronoiBinaryFile, openVoronoiBinaryFile
+from resultcache import VoronoiResultCache
 import bisect
-import sys
+import threading
+from collections import OrderedDict
 
 WINDOW_WIDTH = 800
 WINDOW_HEIGHT = 800
@@ -13,6 +16,21 @@ CANVAS_HEIGHT = 600
 RADIUS = 3
 VORONOI_DOT_COLOR = 'black'
 VORONOI_LINE_COLOR = 'black'
+# redraw the whole listbox with one insert when more than this part of the points changes
+LISTBOX_REDRAW_RATIO = 0.5
+# the layers of a merge record in the order they are stacked, and the layers shown in each of the 5 steps of a merge
+STEP_LAYERS = ('leftHull', 'rightHull', 'mergedHull', 'tangent', 'left', 'right', 'hyperPlane', 'merged')
+STEP_PHASE_LAYERS = (
+    ('leftHull', 'rightHull'),
+    ('mergedHull', 'tangent', 'left', 'right'),
+    ('mergedHull', 'tangent', 'left', 'right', 'hyperPlane'),
+    ('left', 'right', 'hyperPlane'),
+    ('merged',),
+)
+# number of merge records whose layers are kept on the canvas(hidden)
+STEP_LAYER_CACHE_SIZE = 16
+# milliseconds between the checks of a build running in the background
+BUILD_POLL_INTERVAL = 50
 
 class App(Tk):
     def __init__(self, *args, **kwargs):
@@ -20,10 +38,29 @@ class App(Tk):
         self.title('Voronoi Diagram')
         self.geometry(f'{WINDOW_WIDTH}x{WINDOW_HEIGHT}')
         self.resizable(False, False)
-        self.voronoi = Voronoi(canvasWidth=CANVAS_WIDTH, canvasHeight=CANVAS_HEIGHT)
-        self.testCases = []
+        # pressing Run again or running a test case again gives the cached edges
+        self.voronoi = Voronoi(canvasWidth=CANVAS_WIDTH, canvasHeight=CANVAS_HEIGHT, cache=VoronoiResultCache())
+        # the test cases are read from the file one at a time, and from the start again after the last one
+        self.testFile = None
+        self.testCases = None
         self.currentTestCase = 0
         self.points = []
+        # canvas items of the points and the edges on the canvas by their coordinates, only the changed ones are redrawn
+        self.dotItems = {}
+        self.edgeItems = {}
+        # coordinates of the points in the listbox, in the order of the listbox
+        self.listedPoints = []
+        # index of the merge records whose layers are drawn(hidden until shown), the least recently shown first
+        self.stepLayers = OrderedDict()
+        self.stepLayerRecords = None
+        self.shownStepLayers = []
+        # the build running in the background thread, None when no build is running
+        self.buildThread = None
+        self.buildCancel = threading.Event()
+        self.buildResult = None
+        self.buildProgress = (0, 0)
+        # whether the running build keeps the merge records, its first step is shown when it is done
+        self.buildRecordSteps = False
 
         # creating a frame
         mainFrame = ttk.Frame(self, padding="20 20 20 20")
@@ -58,12 +95,17 @@ class App(Tk):
         saveButton.grid(row=1, column=2, sticky=(N, W, E, S), padx=10, pady=10)
         runNextTestCase = ttk.Button(upper, text = 'Run Test Case', command=self.runNextTestCase)
         runNextTestCase.grid(row=1, column=3, sticky=(N, W, E, S), padx=10, pady=10)
+        self.cancelButton = ttk.Button(upper, text='Cancel', command=self.cancelBuild, state='disabled')
+        self.cancelButton.grid(row=0, column=4, sticky=(N, W, E, S), padx=10, pady=10)
 
         # label
         self.position = StringVar()
         self.position.set("position : (0,0)")
         positionLabel = Label(upper, textvariable= self.position)
         positionLabel.grid(row=1, column=4, rowspan=1)
+        self.buildStatus = StringVar()
+        buildStatusLabel = Label(upper, textvariable=self.buildStatus)
+        buildStatusLabel.grid(row=0, column=5, rowspan=1)
 
         # listBox
         self.pointListBox = Listbox(bottomRight, height=37)
@@ -74,145 +116,350 @@ class App(Tk):
 
         # event binding
         self.canvas.bind('<Button-1>', self.drawDot)
+        self.canvas.bind('<B1-Motion>', self.dragDot)
+        self.canvas.bind('<ButtonRelease-1>', self.dropDot)
+        self.canvas.bind('<Button-3>', self.deleteDot)
         self.canvas.bind('<Motion>', self.showPosition)
+        self.draggedPoint = None
+
+    def hasDiagram(self) -> bool:
+        """
+        whether the diagram on the canvas is built from the points, so an edit only updates the faces around it
+        """
+        return len(self.voronoi.edges) > 0 and len(self.voronoi.points) == len(self.points)
+
+    def findDot(self, x, y) -> Point:
+        """
+        the point drawn under the mouse, None if there is none
+        """
+        nearestPoint = None
+        nearestDistance = (2 * RADIUS) ** 2
+        for point in self.points:
+            pointDistance = (point.x - x) ** 2 + (point.y - y) ** 2
+            if(pointDistance <= nearestDistance):
+                nearestPoint = point
+                nearestDistance = pointDistance
+        return nearestPoint
+
+    def isBuilding(self) -> bool:
+        return self.buildThread != None
 
     def drawDot(self, event):
-        bisect.insort(self.points, Point(event.x, event.y), key = lambda point: (point.x, point.y))
-        self.clearScreen()
-        for point in self.points:
-            self.pointListBox.insert(END, '({0},{1})'.format(point.x, point.y))
-            self.canvas.create_oval(point.x-RADIUS, point.y-RADIUS, point.x+RADIUS, point.y+RADIUS, fill=VORONOI_DOT_COLOR, outline='')
+        # the points can not change while they are built in the background
+        if(self.isBuilding()):
+            return
+        # pressing on a point drags it
+        self.draggedPoint = self.findDot(event.x, event.y)
+        if(self.draggedPoint != None):
+            return
+
+        point = Point(event.x, event.y)
+        if(self.hasDiagram()):
+            # the diagram on the canvas is updated around the new site instead of being rebuilt
+            if(self.voronoi.insertSite(point)):
+                bisect.insort(self.points, point, key = lambda point: (point.x, point.y))
+            self.drawVoronoi()
+            return
+
+        bisect.insort(self.points, point, key = lambda point: (point.x, point.y))
+        self.drawDots()
+
+    def dragDot(self, event):
+        if(self.draggedPoint == None or not isInDistrict(CANVAS_WIDTH, CANVAS_HEIGHT, event.x, event.y)):
+            return
+        point = Point(event.x, event.y)
+        if(self.hasDiagram()):
+            if(not self.voronoi.moveSite(self.draggedPoint, point)):
+                return
+            self.points.remove(self.draggedPoint)
+            bisect.insort(self.points, point, key = lambda point: (point.x, point.y))
+            self.draggedPoint = point
+            self.drawVoronoi()
+            return
+
+        self.points.remove(self.draggedPoint)
+        bisect.insort(self.points, point, key = lambda point: (point.x, point.y))
+        self.draggedPoint = point
+        self.drawDots()
+
+    def dropDot(self, event):
+        self.draggedPoint = None
+
+    def deleteDot(self, event):
+        if(self.isBuilding()):
+            return
+        point = self.findDot(event.x, event.y)
+        if(point == None):
+            return
+        if(self.hasDiagram()):
+            self.voronoi.removeSite(point)
+            self.points.remove(point)
+            self.drawVoronoi()
+            return
+
+        self.points.remove(point)
+        self.drawDots()
+
+    def drawDots(self):
+        self.clearStepLayers()
+        self.updateDots(self.points)
+        self.updateEdges([])
+
+    def updateDots(self, points: list[Point]):
+        """
+        add and remove the ovals(tagged 'dot') and the listbox entries of the points that changed since the last update.
+        points are sorted by x and then by y
+        """
+        keys = [(point.x, point.y) for point in points]
+        keySet = set(keys)
+        removedKeys = [key for key in self.dotItems if key not in keySet]
+        addedKeys = [key for key in keys if key not in self.dotItems]
+        for key in removedKeys:
+            self.canvas.delete(self.dotItems.pop(key))
+        for x, y in addedKeys:
+            self.dotItems[(x, y)] = self.canvas.create_oval(x-RADIUS, y-RADIUS, x+RADIUS, y+RADIUS, fill=VORONOI_DOT_COLOR, outline='', tags='dot')
+        # the dots stay above the edges and the step items
+        self.canvas.tag_raise('dot')
+
+        # the same point clicked twice before Run is listed twice, so the listbox is redrawn
+        if(len(removedKeys) + len(addedKeys) > len(keys) * LISTBOX_REDRAW_RATIO or len(keySet) != len(keys)):
+            self.pointListBox.delete(0, END)
+            if(len(keys) > 0):
+                self.pointListBox.insert(END, *('({0},{1})'.format(x, y) for x, y in keys))
+        else:
+            for key in removedKeys:
+                index = bisect.bisect_left(self.listedPoints, key)
+                self.pointListBox.delete(index)
+                self.listedPoints.pop(index)
+            for key in addedKeys:
+                index = bisect.bisect_left(self.listedPoints, key)
+                self.pointListBox.insert(index, '({0},{1})'.format(key[0], key[1]))
+                self.listedPoints.insert(index, key)
+        self.listedPoints = keys
+
+    def updateEdges(self, edges: list[Edge]):
+        """
+        add and remove the lines(tagged 'edge') of the edges that changed since the last update
+        """
+        keys = set((edge.start.x, edge.start.y, edge.end.x, edge.end.y) for edge in edges)
+        for key in [key for key in self.edgeItems if key not in keys]:
+            self.canvas.delete(self.edgeItems.pop(key))
+        for key in keys:
+            if(key not in self.edgeItems):
+                self.edgeItems[key] = self.canvas.create_line(*key, fill=VORONOI_LINE_COLOR, width=2, tags='edge')
 
     def showPosition(self, event):
-        self.position.set(f'position : ({event.x}, {event.y})')
+        if(self.hasDiagram()):
+            site = self.voronoi.locate(event.x, event.y)
+            self.position.set(f'position : ({event.x}, {event.y}) site : ({site.x}, {site.y})')
+        else:
+            self.position.set(f'position : ({event.x}, {event.y})')
 
     def run(self):
+        self.startBuild(False)
+
+    def startBuild(self, recordSteps: bool):
+        """
+        :param recordSteps: keep the merge records and show the first step when the build is done
+        """
+        if(self.isBuilding()):
+            return
         if(len(self.points) == 0):
             messagebox.showerror("Error", "No point given")
             return
 
-        self.voronoi.buildVoronoiDiagram(self.points)
-        self.drawVoronoi()
+        # the diagram is built on another Voronoi in a background thread so the window keeps responding, and
+        # self.voronoi is only replaced when the build finishes. a cancelled build leaves the app as it was
+        voronoi = Voronoi(self.voronoi.canvasWidth, self.voronoi.canvasHeight, algorithm=self.voronoi.algorithm, cache=self.voronoi.cache)
+        points = list(self.points)
+        self.buildCancel.clear()
+        self.buildResult = None
+        self.buildProgress = (0, 0)
+        self.buildRecordSteps = recordSteps
+        self.buildThread = threading.Thread(target=self.buildInBackground, args=(voronoi, points, recordSteps), daemon=True)
+        self.cancelButton.configure(state='normal')
+        self.buildStatus.set('building')
+        self.buildThread.start()
+        self.after(BUILD_POLL_INTERVAL, self.pollBuild)
+
+    def buildInBackground(self, voronoi: Voronoi, points: list[Point], recordSteps: bool = False):
+        """
+        run in the background thread, only buildProgress and buildResult are shared with the main thread.
+        buildResult is ('done', voronoi), ('cancelled', None) or ('error', exception)
+        """
+        def progress(mergeCount, totalMerges):
+            self.buildProgress = (mergeCount, totalMerges)
+            if(self.buildCancel.is_set()):
+                raise BuildCancelledError()
+
+        try:
+            voronoi.buildVoronoiDiagram(points, recordSteps=recordSteps, progress=progress)
+            # the locator of the mouse position is built here instead of on the first motion
+            voronoi.getSiteLocator()
+            self.buildResult = ('done', voronoi)
+        except BuildCancelledError:
+            self.buildResult = ('cancelled', None)
+        except Exception as error:
+            self.buildResult = ('error', error)
+
+    def pollBuild(self):
+        """
+        show the progress of the background build, and draw the diagram when it is done. Tk is only used here
+        """
+        if(self.buildThread.is_alive()):
+            mergeCount, totalMerges = self.buildProgress
+            if(totalMerges > 0):
+                self.buildStatus.set(f'merge {mergeCount}/{totalMerges}')
+            self.after(BUILD_POLL_INTERVAL, self.pollBuild)
+            return
+
+        self.buildThread.join()
+        self.buildThread = None
+        self.cancelButton.configure(state='disabled')
+        status, result = self.buildResult
+        self.buildResult = None
+        if(self.buildCancel.is_set()):
+            # cancelled after the last merge, or dropped by clear
+            status = 'cancelled'
+        if(status == 'done'):
+            self.buildStatus.set('')
+            self.voronoi = result
+            if(self.buildRecordSteps):
+                # the dots are drawn once for the steps of the diagram
+                self.voronoi.currentStep = 0
+                self.updateDots(self.voronoi.points)
+                self.showStep()
+            else:
+                self.drawVoronoi()
+        elif(status == 'cancelled'):
+            self.buildStatus.set('cancelled')
+        else:
+            self.buildStatus.set('')
+            messagebox.showerror("Error", f"Fail to build the voronoi diagram: {result}")
+
+    def cancelBuild(self):
+        """
+        the build stops after the merge it is doing
+        """
+        if(self.isBuilding()):
+            self.buildCancel.set()
+            self.buildStatus.set('cancelling')
 
     def runNextTestCase(self):
-        if(len(self.testCases) == 0):
+        if(self.isBuilding()):
+            return
+        if(self.testFile == None):
             messagebox.showerror("Error", "No test case imported")
             return
 
+        try:
+            testCase = next(self.testCases, None)
+            if(testCase == None):
+                self.testCases = iterTestCases(self.testFile, useMmap=True)
+                self.currentTestCase = 0
+                testCase = next(self.testCases)
+        except ValueError as error:
+            messagebox.showerror("Error", f"Format Error: {error}")
+            self.testFile = None
+            return
+
         self.clear()
-        for point in self.testCases[self.currentTestCase]:
+        for point in testCase:
             bisect.insort(self.points, Point(point[0], point[1]), key = lambda point: (point.x, point.y))
 
-        self.currentTestCase = (self.currentTestCase+1) % len(self.testCases)
+        self.currentTestCase = self.currentTestCase + 1
         self.run()
 
     def runStep(self):
-        self.clearScreen()
-        for point in self.points:
-            self.canvas.create_oval(point.x-RADIUS, point.y-RADIUS, point.x+RADIUS, point.y+RADIUS, fill=VORONOI_DOT_COLOR, outline='')
-            self.pointListBox.insert(END, '({0},{1})'.format(point.x, point.y))
-        
+        # the diagram is hidden and the layers of the step are shown over the points
+        self.canvas.itemconfigure('edge', state='hidden')
+        self.canvas.tag_raise('step')
+
         currentStepIndex = self.voronoi.currentStep // 5
         mergeOrFullGraph = self.voronoi.currentStep % 5
-        if(mergeOrFullGraph == 0):
-            # show left, right convexHull and tangent
-            for edge in self.voronoi.voronoiGraph.mergeRecords[currentStepIndex].leftVoronoiRecord.convexHull:
-                self.canvas.create_line(edge.start.x, edge.start.y, edge.end.x, edge.end.y, fill='purple', width=2)
-
-            for edge in self.voronoi.voronoiGraph.mergeRecords[currentStepIndex].rightVoronoiRecord.convexHull:
-                self.canvas.create_line(edge.start.x, edge.start.y, edge.end.x, edge.end.y, fill='purple', width=2)
-        elif(mergeOrFullGraph == 1):
-            # show merged convexHull
-            for edge in self.voronoi.voronoiGraph.mergeRecords[currentStepIndex].newVornoiRecord.convexHull:
-                self.canvas.create_line(edge.start.x, edge.start.y, edge.end.x, edge.end.y, fill='purple', width=2)
-            for edge in self.voronoi.voronoiGraph.mergeRecords[currentStepIndex].tangent:
-                self.canvas.create_line(edge.start.x, edge.start.y, edge.end.x, edge.end.y, fill='orange', width=2)
-            # show left, right voronoi
-            for point in self.voronoi.voronoiGraph.mergeRecords[currentStepIndex].leftVoronoiRecord.points:
-                self.canvas.create_oval(point.x-RADIUS, point.y-RADIUS, point.x+RADIUS, point.y+RADIUS, fill='blue', outline='')
-            for edge in self.voronoi.voronoiGraph.mergeRecords[currentStepIndex].leftVoronoiRecord.edges:
-                self.canvas.create_line(edge.start.x, edge.start.y, edge.end.x, edge.end.y, fill='blue', width=2)
-            for point in self.voronoi.voronoiGraph.mergeRecords[currentStepIndex].rightVoronoiRecord.points:
-                self.canvas.create_oval(point.x-RADIUS, point.y-RADIUS, point.x+RADIUS, point.y+RADIUS, fill='red', outline='')
-            for edge in self.voronoi.voronoiGraph.mergeRecords[currentStepIndex].rightVoronoiRecord.edges:
-                self.canvas.create_line(edge.start.x, edge.start.y, edge.end.x, edge.end.y, fill='red', width=2)
-
-        elif(mergeOrFullGraph == 2):
-            # show merged convexHull
-            for edge in self.voronoi.voronoiGraph.mergeRecords[currentStepIndex].newVornoiRecord.convexHull:
-                self.canvas.create_line(edge.start.x, edge.start.y, edge.end.x, edge.end.y, fill='purple', width=2)
-            for edge in self.voronoi.voronoiGraph.mergeRecords[currentStepIndex].tangent:
-                self.canvas.create_line(edge.start.x, edge.start.y, edge.end.x, edge.end.y, fill='orange', width=2)
-
-            # show left, right voronoi
-            for point in self.voronoi.voronoiGraph.mergeRecords[currentStepIndex].leftVoronoiRecord.points:
-                self.canvas.create_oval(point.x-RADIUS, point.y-RADIUS, point.x+RADIUS, point.y+RADIUS, fill='blue', outline='')
-            for edge in self.voronoi.voronoiGraph.mergeRecords[currentStepIndex].leftVoronoiRecord.edges:
-                self.canvas.create_line(edge.start.x, edge.start.y, edge.end.x, edge.end.y, fill='blue', width=2)
-            for point in self.voronoi.voronoiGraph.mergeRecords[currentStepIndex].rightVoronoiRecord.points:
-                self.canvas.create_oval(point.x-RADIUS, point.y-RADIUS, point.x+RADIUS, point.y+RADIUS, fill='red', outline='')
-            for edge in self.voronoi.voronoiGraph.mergeRecords[currentStepIndex].rightVoronoiRecord.edges:
-                self.canvas.create_line(edge.start.x, edge.start.y, edge.end.x, edge.end.y, fill='red', width=2)
-
-            # hyperplane
-            for edge in self.voronoi.voronoiGraph.mergeRecords[currentStepIndex].hyperPlane:
-                self.canvas.create_line(edge.start.x, edge.start.y, edge.end.x, edge.end.y, fill='Turquoise', width=2)
-        elif(mergeOrFullGraph == 3):
-            # show left, right voronoi
-            for point in self.voronoi.voronoiGraph.mergeRecords[currentStepIndex].leftVoronoiRecord.points:
-                self.canvas.create_oval(point.x-RADIUS, point.y-RADIUS, point.x+RADIUS, point.y+RADIUS, fill='blue', outline='')
-            for edge in self.voronoi.voronoiGraph.mergeRecords[currentStepIndex].leftVoronoiRecord.edges:
-                self.canvas.create_line(edge.start.x, edge.start.y, edge.end.x, edge.end.y, fill='blue', width=2)
-            for point in self.voronoi.voronoiGraph.mergeRecords[currentStepIndex].rightVoronoiRecord.points:
-                self.canvas.create_oval(point.x-RADIUS, point.y-RADIUS, point.x+RADIUS, point.y+RADIUS, fill='red', outline='')
-            for edge in self.voronoi.voronoiGraph.mergeRecords[currentStepIndex].rightVoronoiRecord.edges:
-                self.canvas.create_line(edge.start.x, edge.start.y, edge.end.x, edge.end.y, fill='red', width=2)
-
-            # hyperplane
-            for edge in self.voronoi.voronoiGraph.mergeRecords[currentStepIndex].hyperPlane:
-                self.canvas.create_line(edge.start.x, edge.start.y, edge.end.x, edge.end.y, fill='Turquoise', width=2)
-        elif(mergeOrFullGraph == 4):
-            # show full graph after merge
-            for point in self.voronoi.voronoiGraph.mergeRecords[currentStepIndex].newVornoiRecord.points:
-                self.canvas.create_oval(point.x-RADIUS, point.y-RADIUS, point.x+RADIUS, point.y+RADIUS, fill='blue', outline='')
-            for edge in self.voronoi.voronoiGraph.mergeRecords[currentStepIndex].newVornoiRecord.edges:
-                self.canvas.create_line(edge.start.x, edge.start.y, edge.end.x, edge.end.y, fill='blue', width=2)        
+        mergeRecords = self.voronoi.getMergeRecords()
+        if(self.stepLayerRecords is not mergeRecords):
+            self.clearStepLayers()
+            self.stepLayerRecords = mergeRecords
+        self.drawStepLayers(currentStepIndex, mergeRecords[currentStepIndex])
+
+        for tag in self.shownStepLayers:
+            self.canvas.itemconfigure(tag, state='hidden')
+        self.shownStepLayers = [f'step{currentStepIndex}{layer}' for layer in STEP_PHASE_LAYERS[mergeOrFullGraph]]
+        for tag in self.shownStepLayers:
+            self.canvas.itemconfigure(tag, state='normal')
+
+    def drawStepLayers(self, index: int, mergeRecord):
+        """
+        draw every layer of the merge record hidden, tagged 'step' and step{index}{layer}, if it is not drawn yet
+        """
+        if(index in self.stepLayers):
+            self.stepLayers.move_to_end(index)
+            return
+        while(len(self.stepLayers) >= STEP_LAYER_CACHE_SIZE):
+            oldIndex, oldRecord = self.stepLayers.popitem(last=False)
+            self.canvas.delete(f'step{oldIndex}')
+        self.stepLayers[index] = mergeRecord
+
+        def drawLines(edges, color, layer):
+            for edge in edges:
+                self.canvas.create_line(edge.start.x, edge.start.y, edge.end.x, edge.end.y, fill=color, width=2, state='hidden', tags=('step', f'step{index}', f'step{index}{layer}'))
+
+        def drawPoints(points, color, layer):
+            for point in points:
+                self.canvas.create_oval(point.x-RADIUS, point.y-RADIUS, point.x+RADIUS, point.y+RADIUS, fill=color, outline='', state='hidden', tags=('step', f'step{index}', f'step{index}{layer}'))
+
+        # in the order of STEP_LAYERS
+        drawLines(mergeRecord.leftVoronoiRecord.convexHull, 'purple', 'leftHull')
+        drawLines(mergeRecord.rightVoronoiRecord.convexHull, 'purple', 'rightHull')
+        drawLines(mergeRecord.newVornoiRecord.convexHull, 'purple', 'mergedHull')
+        drawLines(mergeRecord.tangent, 'orange', 'tangent')
+        drawPoints(mergeRecord.leftVoronoiRecord.points, 'blue', 'left')
+        drawLines(mergeRecord.leftVoronoiRecord.edges, 'blue', 'left')
+        drawPoints(mergeRecord.rightVoronoiRecord.points, 'red', 'right')
+        drawLines(mergeRecord.rightVoronoiRecord.edges, 'red', 'right')
+        drawLines(mergeRecord.hyperPlane, 'Turquoise', 'hyperPlane')
+        drawPoints(mergeRecord.newVornoiRecord.points, 'blue', 'merged')
+        drawLines(mergeRecord.newVornoiRecord.edges, 'blue', 'merged')
+
+    def clearStepLayers(self):
+        self.canvas.delete('step')
+        self.stepLayers.clear()
+        self.stepLayerRecords = None
+        self.shownStepLayers = []
 
     def nextStep(self):
-        if(self.voronoi.voronoiGraph == None or len(self.voronoi.voronoiGraph.mergeRecords) == 0):
-            self.voronoi.buildVoronoiDiagram(self.points)
-            self.voronoi.currentStep = 0
-        else:
-            self.voronoi.currentStep = (self.voronoi.currentStep + 1) % (len(self.voronoi.voronoiGraph.mergeRecords) * 5)
-
-        if(len(self.points) <= 2):
-            self.drawVoronoi()
-        else:
-            self.runStep()
+        if(self.isBuilding()):
+            return
+        # the first step is shown when the build with the merge records is done
+        if(not self.voronoi.hasMergeRecords()):
+            self.startBuild(True)
+            return
+        self.voronoi.currentStep = (self.voronoi.currentStep + 1) % (len(self.voronoi.getMergeRecords()) * 5)
+        self.showStep()
 
     def prevStep(self):
-        if(self.voronoi.voronoiGraph == None or len(self.voronoi.voronoiGraph.mergeRecords) == 0):
-            self.voronoi.buildVoronoiDiagram(self.points)
-            self.voronoi.currentStep = 0
-        else:
-            self.voronoi.currentStep = (self.voronoi.currentStep + (len(self.voronoi.voronoiGraph.mergeRecords)*5-1)) % (len(self.voronoi.voronoiGraph.mergeRecords) * 5)
+        if(self.isBuilding()):
+            return
+        if(not self.voronoi.hasMergeRecords()):
+            self.startBuild(True)
+            return
+        stepCount = len(self.voronoi.getMergeRecords()) * 5
+        self.voronoi.currentStep = (self.voronoi.currentStep + stepCount - 1) % stepCount
+        self.showStep()
 
+    def showStep(self):
+        # a diagram of at most 2 points has no merge
         if(len(self.voronoi.points) <= 2):
             self.drawVoronoi()
         else:
             self.runStep()
     
     def drawVoronoi(self):
-        self.pointListBox.delete(0, END)
-        self.canvas.delete('all')
-
-        for point in self.voronoi.points:
-            self.canvas.create_oval(point.x-RADIUS, point.y-RADIUS, point.x+RADIUS, point.y+RADIUS, fill=VORONOI_DOT_COLOR, outline='')
-            self.pointListBox.insert(END, '({0},{1})'.format(point.x, point.y))
-        
-        for edge in self.voronoi.edges:
-            self.canvas.create_line(edge.start.x, edge.start.y, edge.end.x, edge.end.y, fill=VORONOI_LINE_COLOR, width=2)
-            print(f"({edge.start.x, edge.start.y}) -> ({edge.end.x}, {edge.end.y})")
+        self.clearStepLayers()
+        self.updateEdges(self.voronoi.edges)
+        self.canvas.itemconfigure('edge', state='normal')
+        self.updateDots(self.voronoi.points)
 
     def saveVoronoi(self):
         if(len(self.voronoi.points) == 0 or len(self.voronoi.edges) == 0):
@@ -221,38 +468,58 @@ class App(Tk):
 
         file = filedialog.asksaveasfilename(
             title="Save Voronoi File",
-            filetypes=(("txt file", ".txt"),),
+            filetypes=(("txt file", ".txt"), ("voronoi binary file", ".vor")),
             defaultextension=".txt"
         )
-        if(file):
+        if(file and file.endswith('.vor')):
+            # the binary file keeps the exact coordinates and the topology of the graph
+            createVoronoiBinaryFile(file, self.voronoi.points, self.voronoi.edges, CANVAS_WIDTH, CANVAS_HEIGHT, self.voronoi.toArrayGraph())
+        elif(file):
             createVoronoiFile(file, self.voronoi.points, self.voronoi.edges)
 
     def importTest(self):
         self.currentTestCase = 0
-        self.testCases = []
+        self.testFile = None
+        self.testCases = None
 
         file = filedialog.askopenfilename(
             title="Import test file", 
             filetypes=(("Text Files", "*.txt"),)
         )
         if(file):
-            self.currentTestCase = 0
-            self.testCases = testCaseParser(file)
-            if(len(self.testCases) == 0):
+            # only the first case is read to check the file, the rest is read when it is run
+            try:
+                firstCase = next(iterTestCases(file, useMmap=True), None)
+            except ValueError:
+                firstCase = None
+            if(firstCase == None):
                 messagebox.showerror("Error", "Format Error or empty set file")
             else:
+                self.testFile = file
+                self.testCases = iterTestCases(file, useMmap=True)
                 messagebox.showinfo("Success", "successfully import the test cases")
 
     def importVoronoiFile(self):
+        if(self.isBuilding()):
+            return
         file = filedialog.askopenfilename(
             title="Import voronoi diagram", 
-            filetypes=(("Text Files", "*.txt"),)
+            filetypes=(("Text Files", "*.txt"), ("Voronoi Binary Files", "*.vor"))
         )
         if(file):
-            points, edges = voronoiFileParser(file)
+            if(file.endswith('.vor')):
+                try:
+                    with openVoronoiBinaryFile(file) as binaryFile:
+                        points, edges = binaryFile.getPoints(), binaryFile.getEdges()
+                except ValueError as error:
+                    messagebox.showerror("Error", f"Fail to import file: {error}")
+                    return
+            else:
+                points, edges = voronoiFileParser(file, useMmap=True)
             self.clear()
+            # the points of the app change with the clicks while the diagram keeps its own, so hasDiagram sees the edit
             self.points = points
-            self.voronoi.points = points
+            self.voronoi.points = list(points)
             self.voronoi.edges = edges
             self.drawVoronoi()
             messagebox.showinfo("Success", "successfully import the voronoi graph")
@@ -261,17 +528,23 @@ class App(Tk):
 
     
     def clear(self):
-        self.pointListBox.delete(0, END)
-        self.canvas.delete('all')
+        # the running build is dropped, its result is not drawn
+        self.cancelBuild()
+        self.clearScreen()
         self.points.clear()
         self.voronoi.clear()
     
     def clearScreen(self):
         self.pointListBox.delete(0, END)
         self.canvas.delete('all')
+        self.dotItems.clear()
+        self.edgeItems.clear()
+        self.listedPoints = []
+        self.stepLayers.clear()
+        self.stepLayerRecords = None
+        self.shownStepLayers = []
         
 if __name__ == '__main__':
-    sys.setrecursionlimit(2 ** 20) # something real big
     app = App()
     app.mainloop()
 
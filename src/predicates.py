@@ -0,0 +1,89 @@
+"""
+exact fallbacks of the adaptive geometric predicates of voronoi.py
+
+the predicates are computed in floating point first with a bound of their rounding error, and only when the result is
+within the bound they are computed again here with integers. a float is an integer over a power of two, so the floats
+of a line or a point are scaled by their largest denominator to integers without rounding. a point is kept as
+(X, Y, W) for (X / W, Y / W) with W > 0 and a line ax + by = c as integers (A, B, C) of any positive multiple of it
+"""
+
+EPSILON = 2.0 ** -53
+# rounding error of p - q(p, q products of floats) relative to |p| + |q|, with room for the rounding of the bound itself.
+# the same bound holds for (x1-x0)(y2-y0) - (y1-y0)(x2-x0) (shewchuk, adaptive precision floating-point arithmetic)
+DETERMINANT_ERROR_BOUND = (3 + 16 * EPSILON) * EPSILON
+# the same when each of the 4 factors is within EPSILON of its exact value relatively. it also bounds the rounding error
+# of a(x_1+x_2)/2 + b(y_1+y_2)/2 with a = x_2-x_1 and b = y_2-y_1 relative to |a(x_1+x_2)/2| + |b(y_1+y_2)/2|
+INEXACT_DETERMINANT_ERROR_BOUND = (5 + 32 * EPSILON) * EPSILON
+# error of a cramer's rule intersection relative to (|c_1|n_2 + |c_2|n_1 + (|x| + |y|)n_1n_2) / (|D| - error of D) with
+# n = |a| + |b|, from the errors of the determinants and the rounding of the division. |D| <= n_1n_2 lets the rounding
+# of x and y share the factor
+INTERSECTION_ERROR_BOUND = 2 * (INEXACT_DETERMINANT_ERROR_BOUND + 2 * EPSILON)
+# the static filter of findIntersection for the lines that are not nearly parallel, |D| * CONDITION_LIMIT > n_1n_2. the
+# intersection is on both lines so |x| + |y| <= 2(|c_1|n_2 + |c_2|n_1) / |D|, and the error of INTERSECTION_ERROR_BOUND is
+# within WELL_CONDITIONED_ERROR_BOUND * (s_1 + s_2) with s = constantBound / n of each line, without the coordinates
+CONDITION_LIMIT = 32
+WELL_CONDITIONED_ERROR_BOUND = INTERSECTION_ERROR_BOUND * CONDITION_LIMIT * (2 * CONDITION_LIMIT + 2)
+
+def getScaledIntegers(*values: float) -> tuple[list[int], int]:
+    """
+    the values times their common denominator as integers, and the denominator
+    """
+    ratios = [value.as_integer_ratio() for value in values]
+    denominator = max(ratio[1] for ratio in ratios)
+    return [numerator * (denominator // valueDenominator) for numerator, valueDenominator in ratios], denominator
+
+def getIntegerPoint(x: float, y: float) -> tuple[int, int, int]:
+    # getScaledIntegers of two values without the lists, the points of the predicates are converted the most often
+    xNumerator, xDenominator = x.as_integer_ratio()
+    yNumerator, yDenominator = y.as_integer_ratio()
+    if(xDenominator < yDenominator):
+        return xNumerator * (yDenominator // xDenominator), yNumerator, yDenominator
+    return xNumerator, yNumerator * (xDenominator // yDenominator), xDenominator
+
+def getIntegerLine(xCoefficient: float, yCoefficient: float, constant: float) -> tuple[int, int, int]:
+    return tuple(getScaledIntegers(xCoefficient, yCoefficient, constant)[0])
+
+def getIntegerBisector(x1: float, y1: float, x2: float, y2: float) -> tuple[int, int, int]:
+    """
+    (x_2-x_1)x + (y_2-y_1)y = (x_2^2+y_2^2-x_1^2-y_1^2) / 2 times 2W^2
+    """
+    # getScaledIntegers of the four values without the lists, every tie of a grid converts the bisectors around it
+    X1, W1 = x1.as_integer_ratio()
+    Y1, V1 = y1.as_integer_ratio()
+    X2, W2 = x2.as_integer_ratio()
+    Y2, V2 = y2.as_integer_ratio()
+    W = max(W1, V1, W2, V2)
+    if(W != 1):
+        X1 = X1 * (W // W1)
+        Y1 = Y1 * (W // V1)
+        X2 = X2 * (W // W2)
+        Y2 = Y2 * (W // V2)
+    return 2 * W * (X2 - X1), 2 * W * (Y2 - Y1), X2 * X2 + Y2 * Y2 - X1 * X1 - Y1 * Y1
+
+def getExactIntersection(xCoefficient1: int, yCoefficient1: int, constant1: int, xCoefficient2: int, yCoefficient2: int, constant2: int) -> tuple[int, int, int]:
+    """
+    the intersection of the lines by cramer's rule, None if the lines are parallel
+    """
+    D = xCoefficient1 * yCoefficient2 - xCoefficient2 * yCoefficient1
+    if(D == 0):
+        return None
+    X = constant1 * yCoefficient2 - constant2 * yCoefficient1
+    Y = xCoefficient1 * constant2 - xCoefficient2 * constant1
+    return (X, Y, D) if D > 0 else (-X, -Y, -D)
+
+def getExactOrientation(origin: tuple[int, int, int], point1: tuple[int, int, int], point2: tuple[int, int, int]) -> int:
+    """
+    the sign of (x1-originX)(y2-originY) - (y1-originY)(x2-originX), it is multiplied by originW^2 * W1 * W2 > 0
+    """
+    originX, originY, originW = origin
+    x1, y1, w1 = point1
+    x2, y2, w2 = point2
+    product = (x1 * originW - originX * w1) * (y2 * originW - originY * w2) - (y1 * originW - originY * w1) * (x2 * originW - originX * w2)
+    return (product > 0) - (product < 0)
+
+def compareExact(value1: int, weight1: int, value2: int, weight2: int) -> int:
+    """
+    -1, 0 or 1 as value1 / weight1 is less than, equal to or greater than value2 / weight2, the weights are positive
+    """
+    difference = value1 * weight2 - value2 * weight1
+    return (difference > 0) - (difference < 0)
@@ -0,0 +1,148 @@
+"""
+cache of the edges built by Voronoi.buildVoronoiDiagram, keyed by the hash of the sorted sites, the canvas size and the
+algorithm. the recent results are kept in memory, and in a directory of binary diagram files if one is given
+"""
+import hashlib
+import os
+import struct
+import sys
+from array import array
+from collections import OrderedDict
+from diagramfile import createVoronoiBinaryFile, openVoronoiBinaryFile
+from voronoi import Edge, Point
+
+class VoronoiResultCache():
+    """
+    least recently used results in memory, the least recently used files are deleted when the directory is larger than
+    maxDiskBytes. several processes can share the directory, a file is only seen after it is completely written
+    """
+    maxSize: int
+    directory: str
+    maxDiskBytes: int
+    hits: int
+    diskHits: int
+    misses: int
+
+    def __init__(self, maxSize=32, directory=None, maxDiskBytes=256 * 1024 * 1024):
+        """
+        :param maxSize: number of results kept in memory
+        :param directory: directory of the results on disk, no disk tier if None
+        """
+        self.maxSize = maxSize
+        self.directory = directory
+        self.maxDiskBytes = maxDiskBytes
+        # key to the (n * 4) array of x1, y1, x2, y2 of the edges
+        self.results = OrderedDict()
+        # hits counts the results found in memory or on disk, diskHits only the ones on disk
+        self.hits = 0
+        self.diskHits = 0
+        self.misses = 0
+        if(directory != None):
+            os.makedirs(directory, exist_ok=True)
+
+    def getKey(self, points: list[Point], canvasWidth: float, canvasHeight: float, algorithm: str) -> str:
+        """
+        :param points: the sites sorted without duplicate, as Voronoi.points
+        """
+        coordinates = array('d')
+        for point in points:
+            coordinates.append(point.x)
+            coordinates.append(point.y)
+        if(sys.byteorder != 'little'):
+            coordinates.byteswap()
+        digest = hashlib.sha256(struct.pack('<dd', canvasWidth, canvasHeight) + algorithm.encode())
+        digest.update(coordinates.tobytes())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> list[Edge]:
+        """
+        new Edge objects of the result, so the caller can change them. None if the key is not cached
+        """
+        coordinates = self.results.get(key)
+        if(coordinates != None):
+            self.results.move_to_end(key)
+        elif(self.directory != None):
+            coordinates = self.readFile(key)
+            if(coordinates != None):
+                self.diskHits = self.diskHits + 1
+                self.putMemory(key, coordinates)
+        if(coordinates == None):
+            self.misses = self.misses + 1
+            return None
+        self.hits = self.hits + 1
+        return [Edge(Point(coordinates[i], coordinates[i+1]), Point(coordinates[i+2], coordinates[i+3])) for i in range(0, len(coordinates), 4)]
+
+    def put(self, key: str, points: list[Point], edges: list[Edge], canvasWidth: float, canvasHeight: float):
+        coordinates = array('d')
+        for edge in edges:
+            coordinates.extend((edge.start.x, edge.start.y, edge.end.x, edge.end.y))
+        self.putMemory(key, coordinates)
+        if(self.directory != None):
+            self.writeFile(key, points, edges, canvasWidth, canvasHeight)
+
+    def putMemory(self, key: str, coordinates: array):
+        self.results[key] = coordinates
+        self.results.move_to_end(key)
+        while(len(self.results) > self.maxSize):
+            self.results.popitem(last=False)
+
+    def getPath(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.vor')
+
+    def readFile(self, key: str) -> array:
+        path = self.getPath(key)
+        try:
+            with openVoronoiBinaryFile(path) as binaryFile:
+                coordinates = array('d', binaryFile.edges)
+            # the modified time marks the recently used files for the eviction
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            # a broken file is dropped and built again
+            self.removeFile(path)
+            return None
+        return coordinates
+
+    def writeFile(self, key: str, points: list[Point], edges: list[Edge], canvasWidth: float, canvasHeight: float):
+        path = self.getPath(key)
+        temporaryPath = f'{path}.{os.getpid()}.tmp'
+        createVoronoiBinaryFile(temporaryPath, points, edges, canvasWidth, canvasHeight)
+        os.replace(temporaryPath, path)
+        self.evictFiles()
+
+    def evictFiles(self):
+        files = []
+        for entry in os.scandir(self.directory):
+            if(entry.name.endswith('.vor')):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        totalBytes = sum(size for mtime, size, path in files)
+        files.sort()
+        for mtime, size, path in files:
+            if(totalBytes <= self.maxDiskBytes):
+                break
+            self.removeFile(path)
+            totalBytes = totalBytes - size
+
+    def removeFile(self, path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def getStats(self) -> dict:
+        return {'hits': self.hits, 'diskHits': self.diskHits, 'misses': self.misses, 'memoryEntries': len(self.results)}
+
+    def clear(self):
+        """
+        drop the results in memory and on disk, the counters are kept
+        """
+        self.results.clear()
+        if(self.directory != None):
+            for entry in os.scandir(self.directory):
+                if(entry.name.endswith('.vor')):
+                    self.removeFile(entry.path)
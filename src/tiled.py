@@ -0,0 +1,311 @@
+"""
+build the voronoi diagram of a site file larger than memory
+
+the sites are sorted on disk and cut into slabs of tile sites from left to right, each slab is built and merged onto the frontier with the dividing chain of
+VoronoiGraph.mergeVoronoiDiagram. a face is finished when no site of the later slabs can be nearer to any point of it
+inside the canvas, its edges are written out and only the unfinished faces and their neighbors stay in memory.
+the peak memory depends on the tile size and the frontier, not on the number of sites.
+
+usage: python tiled.py sites.txt -o output.txt [--tile 50000] [--width 600] [--height 600] [--mmap]
+"""
+import argparse
+import heapq
+import os
+import shutil
+import sys
+import tempfile
+import time
+from array import array
+from math import sqrt
+from fortune import clipLine
+from voronoi import Point, VoronoiGraph, iterLines, sortPoints
+
+CANVAS_WIDTH = 600
+CANVAS_HEIGHT = 600
+TILE_SIZE = 50000
+# the most sorted runs of splitSlabs merged at once, so only a few files are open
+MERGE_FAN_IN = 64
+# sites read from a run or a slab file at a time while merging
+RUN_CHUNK = 4096
+# edges shorter than this inside the canvas are not written, the same as isSameDiagram
+EDGE_TOLERANCE = 1e-6
+
+def parseNumber(word: str):
+    try:
+        return int(word)
+    except ValueError:
+        return float(word)
+
+def formatNumber(value: float):
+    return int(value) if value.is_integer() else value
+
+def iterSiteFile(file, useMmap: bool = False):
+    """
+    yield (x, y) of every site of the file one by one, a site is a line of "x y" or "P x y"(the output file format).
+    comments, empty lines and the E lines of an output file are skipped
+    raise ValueError if a line is not a site
+    """
+    for line in iterLines(file, useMmap):
+        words = line.strip().split()
+        if(len(words) == 0 or words[0][0] == '#' or words[0] == 'E'):
+            continue
+        if(words[0] == 'P'):
+            words = words[1:]
+        if(len(words) != 2):
+            raise ValueError(f"unexpected line in site file: {line.strip()}")
+        yield parseNumber(words[0]), parseNumber(words[1])
+
+def writeSites(path: str, coordinates: array):
+    with open(path, 'ab') as writeFile:
+        coordinates.tofile(writeFile)
+
+def iterSlab(path: str, size: int):
+    """
+    yield (x, y) of the sites of a run or a slab file, RUN_CHUNK sites are read at a time
+    """
+    with open(path, 'rb') as readFile:
+        while(size > 0):
+            coordinates = array('d')
+            coordinates.fromfile(readFile, min(size, RUN_CHUNK) * 2)
+            size = size - len(coordinates) // 2
+            for i in range(0, len(coordinates), 2):
+                yield coordinates[i], coordinates[i+1]
+
+def mergeRuns(runs: list[tuple[str, int]], directory: str):
+    """
+    yield (x, y) of the sites of the sorted runs in order, at most MERGE_FAN_IN runs are open at once so the runs are
+    merged into longer runs first if there are more
+    """
+    while(len(runs) > MERGE_FAN_IN):
+        mergedRuns = []
+        for i in range(0, len(runs), MERGE_FAN_IN):
+            group = runs[i:i+MERGE_FAN_IN]
+            path = os.path.join(directory, f'run{i}-{len(runs)}.bin')
+            coordinates = array('d')
+            for site in heapq.merge(*(iterSlab(runPath, size) for runPath, size in group)):
+                coordinates.extend(site)
+                if(len(coordinates) >= RUN_CHUNK * 2):
+                    writeSites(path, coordinates)
+                    coordinates = array('d')
+            writeSites(path, coordinates)
+            for runPath, size in group:
+                os.remove(runPath)
+            mergedRuns.append((path, sum(size for runPath, size in group)))
+        runs = mergedRuns
+    yield from heapq.merge(*(iterSlab(path, size) for path, size in runs))
+    for path, size in runs:
+        os.remove(path)
+
+def splitSlabs(file, directory: str, tileSize: int, useMmap: bool = False) -> list[tuple[str, int, float]]:
+    """
+    write the sites of the file into slabs of tileSize sites(the last one can be smaller), sorted by x and then by y
+    without duplicate. the sites are sorted on disk: runs of tileSize sorted sites are written and merged, so a slab
+    never has more sites however many sites have the same x or are outside the canvas.
+    every site of a slab is on the right of(or has the same x and a larger y as) the sites of the slabs before it
+    :param useMmap: read the site file through mmap
+    :return: (path, number of sites, smallest x) of every slab from left to right
+    """
+    runs = []
+    sites = []
+    for site in iterSiteFile(file, useMmap):
+        sites.append(site)
+        if(len(sites) >= tileSize):
+            runs.append(writeRun(os.path.join(directory, f'run{len(runs)}.bin'), sites))
+            sites = []
+    if(len(sites) > 0):
+        runs.append(writeRun(os.path.join(directory, f'run{len(runs)}.bin'), sites))
+
+    slabs = []
+    coordinates = array('d')
+    previous = None
+    for site in mergeRuns(runs, directory):
+        if(site == previous):
+            continue
+        previous = site
+        coordinates.extend(site)
+        if(len(coordinates) == tileSize * 2):
+            slabs.append(writeSlab(os.path.join(directory, f'slab{len(slabs)}.bin'), coordinates))
+            coordinates = array('d')
+    if(len(coordinates) > 0):
+        slabs.append(writeSlab(os.path.join(directory, f'slab{len(slabs)}.bin'), coordinates))
+    return slabs
+
+def writeRun(path: str, sites: list[tuple]) -> tuple[str, int]:
+    sites.sort()
+    coordinates = array('d')
+    for site in sites:
+        coordinates.extend(site)
+    writeSites(path, coordinates)
+    return path, len(sites)
+
+def writeSlab(path: str, coordinates: array) -> tuple[str, int, float]:
+    writeSites(path, coordinates)
+    return path, len(coordinates) // 2, coordinates[0]
+
+def readSlab(path: str, size: int) -> list[Point]:
+    coordinates = array('d')
+    with open(path, 'rb') as readFile:
+        coordinates.fromfile(readFile, size * 2)
+    return [Point(coordinates[i], coordinates[i+1]) for i in range(0, len(coordinates), 2)]
+
+def getCellPolygon(point: Point, neighbors: list[Point], width: float, height: float) -> list[tuple[float, float]]:
+    """
+    the part of the canvas nearer to point than to every neighbor, a convex polygon clipped one bisector at a time
+    """
+    polygon = [(0, 0), (width, 0), (width, height), (0, height)]
+    for neighbor in neighbors:
+        # nearer to point: a*x + b*y <= c
+        a = neighbor.x - point.x
+        b = neighbor.y - point.y
+        c = (neighbor.x * neighbor.x + neighbor.y * neighbor.y - point.x * point.x - point.y * point.y) / 2
+        clipped = []
+        for i in range(len(polygon)):
+            x1, y1 = polygon[i - 1]
+            x2, y2 = polygon[i]
+            side1 = a * x1 + b * y1 - c
+            side2 = a * x2 + b * y2 - c
+            if(side1 <= 0):
+                clipped.append((x1, y1))
+            if((side1 < 0 and side2 > 0) or (side1 > 0 and side2 < 0)):
+                t = side1 / (side1 - side2)
+                clipped.append((x1 + (x2 - x1) * t, y1 + (y2 - y1) * t))
+        polygon = clipped
+        if(len(polygon) == 0):
+            break
+    return polygon
+
+def isFinished(point: Point, neighbors: list[Point], nextX: float, width: float, height: float) -> bool:
+    """
+    whether no site with x >= nextX can be nearer than point to any point of the face inside the canvas.
+    such a site is at least nextX - x away from (x, y), so every vertex of the face should be nearer to point than that
+    """
+    for x, y in getCellPolygon(point, neighbors, width, height):
+        if(sqrt((x - point.x) ** 2 + (y - point.y) ** 2) >= nextX - x):
+            return False
+    return True
+
+def appendVoronoiGraph(voronoiGraph: VoronoiGraph, rightGraph: VoronoiGraph):
+    """
+    merge rightGraph, whose sites are all on the right of the sites of voronoiGraph, into voronoiGraph
+    """
+    middle = len(voronoiGraph.faces)
+    voronoiGraph.faces = voronoiGraph.faces + rightGraph.faces
+    voronoiGraph.siteFaces.update(rightGraph.siteFaces)
+    voronoiGraph.convexHull = voronoiGraph.mergeVoronoiDiagram(0, middle, len(voronoiGraph.faces), voronoiGraph.convexHull, rightGraph.convexHull)[0]
+
+def iterTiledEdges(slabs: list[tuple[str, int, float]], canvasWidth: float, canvasHeight: float, stats: dict = None):
+    """
+    yield (x1, y1, x2, y2) of every edge clipped to the canvas, in the order the faces are finished.
+    an edge is given when both of its faces are finished, the finished neighbors of the unfinished faces are kept
+    in the frontier so the unfinished faces are the same as in the diagram of every site
+    :param slabs: the slabs of splitSlabs
+    :param stats: filled with the number of slabs and the largest frontier
+    """
+    # None before the first slab and when every face is finished
+    voronoiGraph = None
+    # sites of the frontier that are finished, their edges are given and they are kept until the frontier is built again
+    finished = set()
+    largestFrontier = 0
+    for i in range(len(slabs)):
+        path, size, minX = slabs[i]
+        slabGraph = VoronoiGraph(canvasWidth, canvasHeight)
+        slabGraph.createVoronoiGraph(readSlab(path, size))
+        if(voronoiGraph == None):
+            voronoiGraph = slabGraph
+        else:
+            appendVoronoiGraph(voronoiGraph, slabGraph)
+        largestFrontier = max(largestFrontier, len(voronoiGraph.faces))
+
+        nextX = slabs[i+1][2] if i + 1 < len(slabs) else float('inf')
+        finishing = set()
+        for face in voronoiGraph.faces:
+            site = (face.point.x, face.point.y)
+            if(site not in finished and isFinished(face.point, [edge.twinEdge.face.point for edge in face.edges], nextX, canvasWidth, canvasHeight)):
+                finishing.add(site)
+
+        for face in voronoiGraph.faces:
+            site = (face.point.x, face.point.y)
+            if(site not in finishing):
+                continue
+            for edge in face.edges:
+                neighbor = (edge.twinEdge.face.point.x, edge.twinEdge.face.point.y)
+                # the edges to the faces finished together are given by the smaller site
+                if(neighbor in finished or (neighbor in finishing and site < neighbor)):
+                    clipped = clipLine(edge.start.x, edge.start.y, edge.end.x - edge.start.x, edge.end.y - edge.start.y, 0, 1, canvasWidth, canvasHeight)
+                    if(clipped != None and abs(clipped[2] - clipped[0]) + abs(clipped[3] - clipped[1]) > EDGE_TOLERANCE):
+                        yield clipped
+        finished.update(finishing)
+
+        # the frontier only needs the unfinished faces and their neighbors. it is kept and the next slab is merged onto
+        # it, it is built again from these faces only when that drops at least as many faces as it keeps, so the
+        # rebuild costs a constant time per dropped face and the frontier is at most twice the faces it needs
+        kept = {}
+        for face in voronoiGraph.faces:
+            if((face.point.x, face.point.y) in finished):
+                continue
+            kept[(face.point.x, face.point.y)] = face.point
+            for edge in face.edges:
+                kept[(edge.twinEdge.face.point.x, edge.twinEdge.face.point.y)] = edge.twinEdge.face.point
+        if(len(voronoiGraph.faces) - len(kept) >= len(kept)):
+            finished = finished & kept.keys()
+            voronoiGraph = None
+            if(len(kept) > 0):
+                voronoiGraph = VoronoiGraph(canvasWidth, canvasHeight)
+                voronoiGraph.createVoronoiGraph(sortPoints(list(kept.values())))
+
+    if(stats != None):
+        stats['slabs'] = len(slabs)
+        stats['largestFrontier'] = largestFrontier
+
+def buildTiledVoronoiFile(file, outputFile, tileSize: int = TILE_SIZE, canvasWidth: float = CANVAS_WIDTH, canvasHeight: float = CANVAS_HEIGHT, stats: dict = None, useMmap: bool = False):
+    """
+    write the voronoi diagram of the sites of the file in the output file format.
+    the points are sorted, the edges are clipped to the canvas and in the order they are finished instead of sorted
+    """
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(outputFile))) as directory:
+        slabs = splitSlabs(file, directory, tileSize, useMmap)
+        edgeFile = os.path.join(directory, 'edges.txt')
+        edgeCount = 0
+        with open(edgeFile, 'w') as writeFile:
+            for x1, y1, x2, y2 in iterTiledEdges(slabs, canvasWidth, canvasHeight, stats):
+                if(x2 < x1 or x2 == x1 and y2 < y1):
+                    x1, y1, x2, y2 = x2, y2, x1, y1
+                writeFile.write(f"E {round(x1)} {round(y1)} {round(x2)} {round(y2)}\n")
+                edgeCount = edgeCount + 1
+
+        siteCount = 0
+        with open(outputFile, 'w') as writeFile:
+            for path, size, minX in slabs:
+                for point in readSlab(path, size):
+                    writeFile.write(f"P {formatNumber(point.x)} {formatNumber(point.y)}\n")
+                    siteCount = siteCount + 1
+            with open(edgeFile, 'r') as readFile:
+                shutil.copyfileobj(readFile, writeFile)
+
+    if(stats != None):
+        stats['sites'] = siteCount
+        stats['edges'] = edgeCount
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build the voronoi diagram of a site file larger than memory slab by slab')
+    parser.add_argument('siteFile', help='file of "x y" or "P x y" lines')
+    parser.add_argument('-o', '--output', required=True, help='output file')
+    parser.add_argument('--tile', type=int, default=TILE_SIZE, help='number of sites of a slab')
+    parser.add_argument('--width', type=int, default=CANVAS_WIDTH, help='canvas width')
+    parser.add_argument('--height', type=int, default=CANVAS_HEIGHT, help='canvas height')
+    parser.add_argument('--mmap', action='store_true', help='read the site file through mmap')
+    args = parser.parse_args(argv)
+
+    stats = {}
+    startTime = time.perf_counter()
+    try:
+        buildTiledVoronoiFile(args.siteFile, args.output, max(1, args.tile), args.width, args.height, stats, args.mmap)
+    except ValueError as error:
+        print(f'Format Error: {error}', file=sys.stderr)
+        return 1
+    totalTime = time.perf_counter() - startTime
+    print(f"{stats['sites']} sites, {stats['edges']} edges, {stats['slabs']} slabs, largest frontier {stats['largestFrontier']} sites in {totalTime:.3f}s", file=sys.stderr)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""
+numpy batch versions of the geometry functions of voronoi.py
+
+every function takes arrays instead of one Line or Point at a time, lines are the coefficient arrays (a, b, c) of
+ax + by = c and segments are (n, 4) arrays of x1, y1, x2, y2. the arrays broadcast, so findIntersections(a1[:, None],
+b1[:, None], c1[:, None], a2, b2, c2) gives the intersections of every pair. the floats are computed in the same order
+as the scalar functions, so the results are the same bit for bit. numpy is needed by this module only, voronoi.py
+imports it when a batch method is called or the leaves of a large build are made, and builds them one by one without
+it
+"""
+import numpy
+
+from predicates import INEXACT_DETERMINANT_ERROR_BOUND
+
+def createLines(x1, y1, x2, y2) -> tuple:
+    """
+    createLineByPoint of every pair of points
+    :return: (a, b, c) arrays
+    """
+    x1, y1, x2, y2 = (numpy.asarray(value, dtype=numpy.float64) for value in (x1, y1, x2, y2))
+    xCoefficient = y2 - y1
+    yCoefficient = x1 - x2
+    return xCoefficient, yCoefficient, xCoefficient * x1 + yCoefficient * y1
+
+def getPerpendicularLines(xCoefficient, yCoefficient, x, y) -> tuple:
+    """
+    getPerpendicularLine of every line through the point of the same index
+    """
+    xCoefficient = numpy.asarray(xCoefficient, dtype=numpy.float64)
+    yCoefficient = numpy.asarray(yCoefficient, dtype=numpy.float64)
+    return -yCoefficient, xCoefficient, -yCoefficient * x + xCoefficient * y
+
+def getBisectors(x1, y1, x2, y2) -> tuple:
+    """
+    getBisector of every pair of sites
+    :return: (a, b, c, constantBound) arrays, constantBound is the bound of |c| with its rounding error of Line
+    """
+    x1, y1, x2, y2 = (numpy.asarray(value, dtype=numpy.float64) for value in (x1, y1, x2, y2))
+    xCoefficient = x2 - x1
+    yCoefficient = y2 - y1
+    xTerm = xCoefficient * ((x1 + x2) / 2)
+    yTerm = yCoefficient * ((y1 + y2) / 2)
+    constant = xTerm + yTerm
+    return xCoefficient, yCoefficient, constant, numpy.abs(constant) + numpy.abs(xTerm) + numpy.abs(yTerm)
+
+def findIntersections(xCoefficient1, yCoefficient1, constant1, xCoefficient2, yCoefficient2, constant2) -> tuple:
+    """
+    findIntersection(cramer's rule) of the lines of the same index
+    :return: (x, y) arrays, nan where the lines are parallel within the rounding error of the determinant. those are
+    left to findIntersection, which computes them exactly
+    """
+    xCoefficient1, yCoefficient1, constant1, xCoefficient2, yCoefficient2, constant2 = numpy.broadcast_arrays(*(numpy.asarray(value, dtype=numpy.float64) for value in (xCoefficient1, yCoefficient1, constant1, xCoefficient2, yCoefficient2, constant2)))
+    D = xCoefficient1 * yCoefficient2 - xCoefficient2 * yCoefficient1
+    # the filter of findIntersection, |a_1b_2| + |a_2b_1| <= (|a_1| + |b_1|)(|a_2| + |b_2|)
+    normProduct = (numpy.abs(xCoefficient1) + numpy.abs(yCoefficient1)) * (numpy.abs(xCoefficient2) + numpy.abs(yCoefficient2))
+    parallel = numpy.abs(D) <= INEXACT_DETERMINANT_ERROR_BOUND * normProduct
+    D = numpy.where(parallel, 1, D)
+    x = (constant1 * yCoefficient2 - constant2 * yCoefficient1) / D
+    y = (xCoefficient1 * constant2 - xCoefficient2 * constant1) / D
+    return numpy.where(parallel, numpy.nan, x), numpy.where(parallel, numpy.nan, y)
+
+def getIntersectionsOfCanvas(width: float, height: float, xCoefficient, yCoefficient, constant):
+    """
+    the first and the last point of getIntersectionOfCanvas in the order of sortDownward, the end points of the
+    hyperplane. a horizontal or vertical line gives its points on the borders like the scalar version, even outside
+    the canvas
+    :return: (n, 4) array, the rows of the lines missing the canvas are nan
+    """
+    xCoefficient, yCoefficient, constant = numpy.broadcast_arrays(*(numpy.asarray(value, dtype=numpy.float64) for value in (xCoefficient, yCoefficient, constant)))
+    horizontal = (xCoefficient == 0) & (yCoefficient != 0)
+    vertical = (yCoefficient == 0) & (xCoefficient != 0)
+    general = (xCoefficient != 0) & (yCoefficient != 0)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        # getXbyY and getYbyX at the borders, in the order the scalar version appends them: lower, left, upper, right
+        pointX = numpy.stack(((constant - yCoefficient * height) / xCoefficient, numpy.zeros_like(constant), (constant - yCoefficient * 0) / xCoefficient, numpy.full_like(constant, width)), axis=-1)
+        pointY = numpy.stack((numpy.full_like(constant, height), (constant - xCoefficient * 0) / yCoefficient, numpy.zeros_like(constant), (constant - xCoefficient * width) / yCoefficient), axis=-1)
+    valid = (pointX >= 0) & (pointX <= width) & (pointY >= 0) & (pointY <= height) & general[..., None]
+    valid[..., 1] |= horizontal
+    valid[..., 3] |= horizontal
+    valid[..., 0] |= vertical
+    valid[..., 2] |= vertical
+    # the sort is stable, so the first point is the first smallest key and the last point the last largest key
+    key = xCoefficient[..., None] * pointY - yCoefficient[..., None] * pointX
+    first = numpy.argmin(numpy.where(valid, key, numpy.inf), axis=-1)
+    last = 3 - numpy.argmax(numpy.where(valid, key, -numpy.inf)[..., ::-1], axis=-1)
+    take = lambda values, index: numpy.take_along_axis(values, index[..., None], axis=-1)[..., 0]
+    segments = numpy.stack((take(pointX, first), take(pointY, first), take(pointX, last), take(pointY, last)), axis=-1)
+    segments[~valid.any(axis=-1)] = numpy.nan
+    return segments
+
+def clipRays(width: float, height: float, x, y, directionX, directionY, tMin, tMax):
+    """
+    liang-barsky clipping of the points (x, y) + t * (directionX, directionY) with tMin <= t <= tMax to the canvas
+    :return: (n, 4) array, the rows missing the canvas are nan
+    """
+    x, y, directionX, directionY, tMin, tMax = numpy.broadcast_arrays(*(numpy.asarray(value, dtype=numpy.float64) for value in (x, y, directionX, directionY, tMin, tMax)))
+    low = tMin.copy()
+    high = tMax.copy()
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        for p, q in ((-directionX, x), (directionX, width - x), (-directionY, y), (directionY, height - y)):
+            t = q / p
+            # p < 0 enters the canvas, p > 0 leaves it, p == 0 is parallel to the border and misses it if q < 0
+            low = numpy.where(p < 0, numpy.maximum(low, t), low)
+            high = numpy.where(p > 0, numpy.minimum(high, t), high)
+            low = numpy.where((p == 0) & (q < 0), numpy.inf, low)
+        missing = ~(low <= high)
+        segments = numpy.stack((x + low * directionX, y + low * directionY, x + high * directionX, y + high * directionY), axis=-1)
+    # the rounding error of x + t * direction may fall just outside the canvas
+    segments[..., 0::2] = numpy.clip(segments[..., 0::2], 0, width)
+    segments[..., 1::2] = numpy.clip(segments[..., 1::2], 0, height)
+    segments[missing] = numpy.nan
+    return segments
+
+def clipSegments(width: float, height: float, segments):
+    """
+    the part of every segment inside the canvas
+    :param segments: (n, 4) array of x1, y1, x2, y2
+    :return: (clipped segments, index of them in segments), the segments missing the canvas are dropped
+    """
+    segments = numpy.asarray(segments, dtype=numpy.float64).reshape(-1, 4)
+    clipped = clipRays(width, height, segments[:, 0], segments[:, 1], segments[:, 2] - segments[:, 0], segments[:, 3] - segments[:, 1], 0, 1)
+    index = numpy.flatnonzero(~numpy.isnan(clipped[:, 0]))
+    return clipped[index], index
+
+def normalizeSegments(segments):
+    """
+    swap the ends of the segments to start from the left(or the top) and sort them like getEdges
+    """
+    segments = numpy.asarray(segments, dtype=numpy.float64).reshape(-1, 4)
+    swap = (segments[:, 2] < segments[:, 0]) | ((segments[:, 2] == segments[:, 0]) & (segments[:, 3] < segments[:, 1]))
+    segments = numpy.where(swap[:, None], segments[:, [2, 3, 0, 1]], segments)
+    # lexsort uses the last key first
+    return segments[numpy.lexsort((segments[:, 3], segments[:, 2], segments[:, 1], segments[:, 0]))]
+
+def edgesToArray(edges: list) -> 'numpy.ndarray':
+    """
+    (n, 4) array of the start and end points of the edges
+    """
+    return numpy.fromiter((value for edge in edges for value in (edge.start.x, edge.start.y, edge.end.x, edge.end.y)), dtype=numpy.float64, count=4 * len(edges)).reshape(-1, 4)
+
+def formatSegments(points: list, segments) -> str:
+    """
+    formatVoronoi of the (n, 4) array of segments
+    """
+    lines = [f"P {point.x} {point.y}\n" for point in points]
+    # numpy rounds half to even like round()
+    rounded = numpy.rint(numpy.asarray(segments, dtype=numpy.float64).reshape(-1, 4)).astype(numpy.int64)
+    lines.extend(f"E {x1} {y1} {x2} {y2}\n" for x1, y1, x2, y2 in rounded.tolist())
+    return ''.join(lines)
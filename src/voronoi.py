@@ -1,13 +1,53 @@
+import bisect
+import mmap
+import os
+import time
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
 from copy import deepcopy
-from math import sqrt
+from math import inf, sqrt
+from fortune import buildFortuneEdges, clipLine
+from locator import SiteLocator
+from predicates import CONDITION_LIMIT, DETERMINANT_ERROR_BOUND, EPSILON, INEXACT_DETERMINANT_ERROR_BOUND, INTERSECTION_ERROR_BOUND, WELL_CONDITIONED_ERROR_BOUND, compareExact, getExactIntersection, getExactOrientation, getIntegerBisector, getIntegerLine, getIntegerPoint
 
 def crossProduct(origin: 'Point', point1: 'Point', point2: 'Point'):
+    """
+    the sign is exact for the exact points(getExactPoint), it is computed again exactly when it is within the error of
+    the rounding and of the intersections among the points
+    """
     line1X = point1.x - origin.x
     line1Y = point1.y - origin.y
     line2X = point2.x - origin.x
     line2Y = point2.y - origin.y
 
-    return line1X * line2Y - line1Y * line2X
+    left = line1X * line2Y
+    right = line1Y * line2X
+    product = left - right
+    if(origin.error + point1.error + point2.error == 0):
+        # the signs of the differences and the products are not changed by the rounding, so only the products of the
+        # same sign can cancel and need the bound(the orientation filter of shewchuk)
+        if(left > 0):
+            if(right <= 0):
+                return product
+            error = DETERMINANT_ERROR_BOUND * (left + right)
+        elif(left < 0):
+            if(right >= 0):
+                return product
+            error = DETERMINANT_ERROR_BOUND * -(left + right)
+        else:
+            return product
+    else:
+        # every coordinate of a point moves the product by its error times the other vector
+        error1 = origin.error + point1.error
+        error2 = origin.error + point2.error
+        error = DETERMINANT_ERROR_BOUND * ((left if left > 0 else -left) + (right if right > 0 else -right))
+        error = error + 2 * (error1 * (abs(line2X) + abs(line2Y) + error2) + error2 * (abs(line1X) + abs(line1Y)))
+    if(product > error or -product > error):
+        return product
+    if(origin == point1 or origin == point2 or point1 == point2):
+        return 0
+    return getExactOrientation(getExactPoint(origin), getExactPoint(point1), getExactPoint(point2))
 
 def getMidPoint(point1: 'Point', point2: 'Point') -> 'Point':
     return Point((point1.x+point2.x) / 2, (point1.y+point2.y)/2)
@@ -18,6 +58,35 @@ def distance(point1:'Point', point2:'Point'):
 def getPerpendicularLine(line: 'Line', point: 'Point') -> 'Line':
     return Line(-line.yCoefficient, line.xCoefficient, -line.yCoefficient * point.x + line.xCoefficient * point.y)
 
+def getBisector(point1: 'Point', point2: 'Point') -> 'Line':
+    """
+    getPerpendicularLine of the line from point1 to point2 at their midpoint, with the points kept for the exact predicates
+    """
+    xCoefficient = point2.x - point1.x
+    yCoefficient = point2.y - point1.y
+    midX = (point1.x + point2.x) / 2
+    midY = (point1.y + point2.y) / 2
+    xTerm = xCoefficient * midX
+    yTerm = yCoefficient * midY
+    constant = xTerm + yTerm
+    # the rounding error of the constant is within INEXACT_DETERMINANT_ERROR_BOUND of |a(x_1+x_2)/2| + |b(y_1+y_2)/2|
+    constantBound = (constant if constant > 0 else -constant) + (xTerm if xTerm > 0 else -xTerm) + (yTerm if yTerm > 0 else -yTerm)
+    return Line(xCoefficient, yCoefficient, constant, point1, point2, constantBound)
+
+def getExactLine(line: 'Line') -> tuple[int, int, int]:
+    """
+    integer coefficients of the bisector of the sites without rounding, of the other lines as they are
+    """
+    # computed once and kept in the unset exactLine slot, so the line is not made bigger until it is needed
+    exactLine = getattr(line, 'exactLine', None)
+    if(exactLine == None):
+        if(line.site1 == None):
+            exactLine = getIntegerLine(line.xCoefficient, line.yCoefficient, line.constant)
+        else:
+            exactLine = getIntegerBisector(line.site1.x, line.site1.y, line.site2.x, line.site2.y)
+        line.exactLine = exactLine
+    return exactLine
+
 def createLineByPoint(point1: 'Point', point2: 'Point') -> 'Line':
     """
     ax_1 + by_1 = c
@@ -41,7 +110,13 @@ def getYbyX(line: 'Line', x: float):
     return (line.constant - line.xCoefficient * x) / line.yCoefficient
 
 def isIntersect(line1: 'Line', line2: 'Line') -> bool:
-    return line1.xCoefficient * line2.yCoefficient != line2.xCoefficient * line1.yCoefficient
+    left = line1.xCoefficient * line2.yCoefficient
+    right = line2.xCoefficient * line1.yCoefficient
+    if(abs(left - right) > INEXACT_DETERMINANT_ERROR_BOUND * (abs(left) + abs(right))):
+        return True
+    xCoefficient1, yCoefficient1, constant1 = getExactLine(line1)
+    xCoefficient2, yCoefficient2, constant2 = getExactLine(line2)
+    return xCoefficient1 * yCoefficient2 != xCoefficient2 * yCoefficient1
 
 def findIntersection(line1: 'Line', line2: 'Line') -> 'Point':
     """
@@ -62,40 +137,125 @@ def findIntersection(line1: 'Line', line2: 'Line') -> 'Point':
     
     x = D_x / D
     y = D_y / D
+
+    the error of x and y from the exact lines(getExactLine) is bounded from the rounding of the coefficients and the
+    determinants. the determinant within its error is computed again exactly, so the nearly parallel lines do not give
+    a wrong point or a division by zero. the bound is computed only for the lines at a small angle, the others are
+    within the static WELL_CONDITIONED_ERROR_BOUND of their scale
     """
-    if(isIntersect(line1, line2) == False):
-        return None
-    D = line1.xCoefficient * line2.yCoefficient - line2.xCoefficient * line1.yCoefficient
-    Dx = line1.constant * line2.yCoefficient - line2.constant * line1.yCoefficient
-    Dy = line1.xCoefficient * line2.constant - line2.xCoefficient * line1.constant
-    x = Dx / D
-    y = Dy / D
-    return Point(x, y)
+    xCoefficient1 = line1.xCoefficient
+    yCoefficient1 = line1.yCoefficient
+    xCoefficient2 = line2.xCoefficient
+    yCoefficient2 = line2.yCoefficient
+    norm1 = line1.norm
+    norm2 = line2.norm
+    normProduct = norm1 * norm2
+    D = xCoefficient1 * yCoefficient2 - xCoefficient2 * yCoefficient1
+    absoluteD = D if D > 0 else -D
+    constant1 = line1.constant
+    constant2 = line2.constant
+    if(absoluteD * CONDITION_LIMIT > normProduct):
+        x = (constant1 * yCoefficient2 - constant2 * yCoefficient1) / D
+        y = (xCoefficient1 * constant2 - xCoefficient2 * constant1) / D
+        return Intersection(x, y, WELL_CONDITIONED_ERROR_BOUND * (line1.scale + line2.scale), line1, line2)
+    # |a_1b_2| + |a_2b_1| <= (|a_1| + |b_1|)(|a_2| + |b_2|), the looser bound is cheaper and only nearly parallel lines are within it
+    errorD = INEXACT_DETERMINANT_ERROR_BOUND * normProduct
+    if(absoluteD <= errorD):
+        # a coefficient of a bisector is 0 only if the sites have the same x or y, so the lines are exactly parallel
+        if(xCoefficient1 == 0 and xCoefficient2 == 0 or yCoefficient1 == 0 and yCoefficient2 == 0):
+            return None
+        exactPoint = getExactIntersection(*getExactLine(line1), *getExactLine(line2))
+        if(exactPoint == None):
+            return None
+        # the integer division is rounded once
+        x = exactPoint[0] / exactPoint[2]
+        y = exactPoint[1] / exactPoint[2]
+        intersection = Intersection(x, y, EPSILON * (abs(x) + abs(y)), line1, line2)
+        intersection.exactPoint = exactPoint
+        return intersection
+
+    x = (constant1 * yCoefficient2 - constant2 * yCoefficient1) / D
+    y = (xCoefficient1 * constant2 - xCoefficient2 * constant1) / D
+    # the errors of D_x and D_y are within 2 * INEXACT_DETERMINANT_ERROR_BOUND * (|c_1|(|a_2| + |b_2|) + |c_2|(|a_1| + |b_1|)),
+    # with the error of D and the rounding of x and y they are all within INTERSECTION_ERROR_BOUND
+    size = (x if x > 0 else -x) + (y if y > 0 else -y)
+    error = INTERSECTION_ERROR_BOUND * (line1.constantBound * norm2 + line2.constantBound * norm1 + size * normProduct) / (absoluteD - errorD)
+    return Intersection(x, y, error, line1, line2)
+
+def getExactPoint(point: 'Point') -> tuple[int, int, int]:
+    """
+    (X, Y, W) of predicates.py, the intersection of the exact lines for an intersection
+    """
+    if(point.line1 == None):
+        return getIntegerPoint(point.x, point.y)
+    # kept as the exactLine of getExactLine
+    exactPoint = getattr(point, 'exactPoint', None)
+    if(exactPoint == None):
+        exactPoint = point.exactPoint = getExactIntersection(*getExactLine(point.line1), *getExactLine(point.line2))
+    return exactPoint
+
+def compareY(point1: 'Point', point2: 'Point') -> int:
+    """
+    -1, 0 or 1 as point1 is above, level with or below point2. the intersections closer than their errors are compared
+    exactly from their lines, the other points are exact as they are
+    """
+    difference = point1.y - point2.y
+    error = point1.error + point2.error
+    if(difference > error or -difference > error or error == 0):
+        return (difference > 0) - (difference < 0)
+    exactPoint1 = getExactPoint(point1)
+    exactPoint2 = getExactPoint(point2)
+    return compareExact(exactPoint1[1], exactPoint1[2], exactPoint2[1], exactPoint2[2])
+
+def compareX(point1: 'Point', point2: 'Point') -> int:
+    difference = point1.x - point2.x
+    error = point1.error + point2.error
+    if(difference > error or -difference > error or error == 0):
+        return (difference > 0) - (difference < 0)
+    exactPoint1 = getExactPoint(point1)
+    exactPoint2 = getExactPoint(point2)
+    return compareExact(exactPoint1[0], exactPoint1[2], exactPoint2[0], exactPoint2[2])
+
+def isSamePoint(point1: 'Point', point2: 'Point') -> bool:
+    error = point1.error + point2.error
+    differenceX = point1.x - point2.x
+    differenceY = point1.y - point2.y
+    if(differenceX > error or -differenceX > error or differenceY > error or -differenceY > error):
+        return False
+    return compareY(point1, point2) == 0 and compareX(point1, point2) == 0
 
 def isInDistrict(width, height, x, y):
     return x >= 0 and x <= width and y >= 0 and y <= height
 
-def getIntersectionOfCanvas(width: int, height: int, line: 'Line') -> list['Point']:
+def isInsideDistrict(width, height, x, y):
+    # the infinite end of an edge is placed on the border of the canvas, so it is moved past a voronoi point which is
+    # not strictly inside
+    return x > 0 and x < width and y > 0 and y < height
+
+def getIntersectionOfCanvas(width: int, height: int, line: 'Line') -> list['Vertex']:
+    """
+    the points are used as the end points of the hyperplane, so they are created as Vertex
+    """
     res = []
 
     if(line.xCoefficient == 0 or line.yCoefficient == 0):
         # perpendicular line
         if(line.xCoefficient == 0 and line.yCoefficient !=0 ):
-            leftBound = Point(0, getYbyX(line, 0))
-            rightBound = Point(width, getYbyX(line, width))
+            leftBound = Vertex(0, getYbyX(line, 0))
+            rightBound = Vertex(width, getYbyX(line, width))
             res.append(leftBound)
             res.append(rightBound)
         # horizontal line
         elif(line.yCoefficient == 0 and line.xCoefficient != 0):
-            lowerBound = Point(getXbyY(line, height), height)
-            upperBound = Point(getXbyY(line, 0), 0)
+            lowerBound = Vertex(getXbyY(line, height), height)
+            upperBound = Vertex(getXbyY(line, 0), 0)
             res.append(upperBound)
             res.append(lowerBound)
     else:
-        lowerBound = Point(getXbyY(line, height), height)
-        upperBound = Point(getXbyY(line, 0), 0)
-        leftBound = Point(0 ,getYbyX(line, 0))
-        rightBound = Point(width ,getYbyX(line, width))
+        lowerBound = Vertex(getXbyY(line, height), height)
+        upperBound = Vertex(getXbyY(line, 0), 0)
+        leftBound = Vertex(0 ,getYbyX(line, 0))
+        rightBound = Vertex(width ,getYbyX(line, width))
         
         if(isInDistrict(width, height, lowerBound.x, lowerBound.y)):
             res.append(lowerBound)
@@ -108,19 +268,432 @@ def getIntersectionOfCanvas(width: int, height: int, line: 'Line') -> list['Poin
 
     return res
 
-def mergeConvexHull(leftConvexHull: list['Point'], rightConvexHull: list['Point']):
-    # leftConvexHull start point(right most)
-    leftConvexHullRightestPointIdx = 0
-    for i in range(1,len(leftConvexHull)):
-        if(leftConvexHull[i].x > leftConvexHull[leftConvexHullRightestPointIdx].x or leftConvexHull[i].x == leftConvexHull[leftConvexHullRightestPointIdx].x and leftConvexHull[i].y > leftConvexHull[leftConvexHullRightestPointIdx].y):
-            leftConvexHullRightestPointIdx = i
-    
+def sortDownward(points: list['Point'], line: 'Line'):
+    """
+    sort the points on the bisector of a left and a right site(getBisector(left, right)) in place in the direction of
+    the hyperplane, (-b, a) with a = right.x - left.x >= 0, which is down or to the left when the line is horizontal.
+    the points on the canvas boundary are far apart along the line, so the projection gives the order even when
+    their y are rounded to the same value
+    """
+    points.sort(key= lambda point: line.xCoefficient * point.y - line.yCoefficient * point.x)
+
+def getNextEdgeOnCircle(edges: list['Edge'], pivot: 'Face', prevFace: 'Face') -> 'Edge':
+    """
+    the edge to the next face of the hyperplane when the hyperplane of pivot and prevFace meets several edges at a voronoi
+    point. the sites of the faces around the point are on a circle, and the next face is the one next to pivot on the
+    side away from prevFace: every other site is on the side of prevFace from the chord of pivot and it.
+    :return: the first edge if no site is found
+    """
+    for edge in edges:
+        site = edge.twinEdge.face.point
+        side = crossProduct(pivot.point, site, prevFace.point) > 0
+        if(all(other == edge or (crossProduct(pivot.point, site, other.twinEdge.face.point) > 0) == side for other in edges)):
+            return edge
+    return edges[0]
+
+def isBeyondHyperPlane(edge: 'Edge', nextEdge: 'Edge', point: 'Point', side: int) -> bool:
+    """
+    whether the point is on the side(the sign of crossProduct) of the hyperplane around the voronoi point between the
+    hyperplane edges. the hyperplane turns there, so the side of the next edge alone is wrong past the turn
+    """
+    voronoiPoint = edge.end
+    nextSide = crossProduct(voronoiPoint, nextEdge.end, point) * side > 0
+    prevSide = crossProduct(edge.start, voronoiPoint, point) * side > 0
+    # the side is the part inside the turn when the hyperplane turns to it, else the part outside
+    if(crossProduct(edge.start, voronoiPoint, nextEdge.end) * side > 0):
+        return nextSide and prevSide
+    return nextSide or prevSide
+
+def getEdgesAroundEdge(edge: 'Edge') -> list['Edge']:
+    """
+    the edges starting from or ending at the end points of the edge
+    """
+    edges = []
+    for point in (edge.start, edge.end):
+        for pointEdge in point.edges:
+            edges.append(pointEdge)
+            edges.append(pointEdge.twinEdge)
+    return edges
+
+# the faces with fewer edges are scanned as a whole, which is faster than walking their boundary and keeping it linked
+WALK_MIN_EDGES = 16
+
+def isOnEdge(edge: 'Edge', point: 'Point') -> bool:
+    """
+    whether the point on the line of the edge is between the start and end point.
+    the infinite side of the edge is unbounded, its direction is taken from the face(on the left of the edge)
+    since the point far away on the infinite side is only a placeholder.
+    the points on the line are in the order of x, or of y for a line closer to vertical, so they are compared exactly
+    """
+    if(edge.startInfinity and edge.endInfinity):
+        return True
+    xCoefficient = edge.line.xCoefficient
+    yCoefficient = edge.line.yCoefficient
+    byX = abs(yCoefficient) >= abs(xCoefficient)
+    compare = compareX if byX else compareY
+    if(edge.startInfinity or edge.endInfinity):
+        directionX = yCoefficient
+        directionY = -xCoefficient
+        origin = edge.end if edge.startInfinity else edge.start
+        if(directionY * (edge.face.point.x - origin.x) - directionX * (edge.face.point.y - origin.y) < 0):
+            directionX = -directionX
+            directionY = -directionY
+        sign = compare(point, origin)
+        if((directionX if byX else directionY) < 0):
+            sign = -sign
+        return sign <= 0 if edge.startInfinity else sign >= 0
+
+    startSign = compare(point, edge.start)
+    endSign = compare(point, edge.end)
+    # not on an edge of no length
+    return startSign * endSign <= 0 and (startSign != 0 or endSign != 0)
+
+def getFaceCrossings(edges: list['Edge'], line: 'Line', prevIntersection: 'Point', prevIntersectedEdges: set, findCrossedEdge: bool = False, stats: 'MergeStats' = None):
+    """
+    intersections of the line and the edges below prevIntersection, the edges twin to prevIntersectedEdges are skipped
+    :param findCrossedEdge: also find the uppest edge crossed between its end points
+    :param stats: counts the intersection tests when the build is profiled
+    :return: ([(edge, intersection)], the crossed edge or None)
+    """
+    crossings = []
+    crossedEdge = None
+    crossedIntersection = None
+    # the static filter of findIntersection inline, the line and prevIntersection are read once for all the edges
+    xCoefficient1 = line.xCoefficient
+    yCoefficient1 = line.yCoefficient
+    constant1 = line.constant
+    norm1 = line.norm
+    scale1 = line.scale
+    # every intersection is below a missing prevIntersection
+    prevY = -inf
+    prevError = 0.0
+    if(prevIntersection != None):
+        prevY = prevIntersection.y
+        prevError = prevIntersection.error
+    for edge in edges:
+        if(edge.twinEdge in prevIntersectedEdges):
+            continue
+        if(stats != None):
+            stats.intersectionTests = stats.intersectionTests + 1
+        edgeLine = edge.line
+        xCoefficient2 = edgeLine.xCoefficient
+        yCoefficient2 = edgeLine.yCoefficient
+        D = xCoefficient1 * yCoefficient2 - xCoefficient2 * yCoefficient1
+        if((D if D > 0 else -D) * CONDITION_LIMIT > norm1 * edgeLine.norm):
+            constant2 = edgeLine.constant
+            y = (xCoefficient1 * constant2 - xCoefficient2 * constant1) / D
+            error = WELL_CONDITIONED_ERROR_BOUND * (scale1 + edgeLine.scale)
+            intersection = None
+        elif(xCoefficient1 == 0 and xCoefficient2 == 0 or yCoefficient1 == 0 and yCoefficient2 == 0):
+            # the parallel bisectors of findIntersection, as the rows and columns of a grid
+            continue
+        else:
+            intersection = findIntersection(line, edgeLine)
+            if(intersection == None):
+                continue
+            y = intersection.y
+            error = intersection.error
+        # the common case of compareY inline, the intersections are far apart. the ones above prevIntersection are
+        # skipped before they are made
+        difference = y - prevY
+        errorSum = error + prevError
+        if(-difference > errorSum):
+            continue
+        if(intersection == None):
+            intersection = Intersection((constant1 * yCoefficient2 - constant2 * yCoefficient1) / D, y, error, line, edgeLine)
+        if(difference <= errorSum):
+            ySign = compareY(intersection, prevIntersection)
+            if(ySign < 0 or (ySign == 0 and compareX(intersection, prevIntersection) == 0)):
+                continue
+        crossings.append((edge, intersection))
+        if(findCrossedEdge and (crossedIntersection == None or compareY(intersection, crossedIntersection) < 0) and isOnEdge(edge, intersection)):
+            crossedEdge = edge
+            crossedIntersection = intersection
+    return crossings, crossedEdge
+
+def walkFaceBoundary(face: 'Face', startEdge: 'Edge', line: 'Line', prevIntersection: 'Point', prevIntersectedEdges: set, counterclockwise: bool, stats: 'MergeStats' = None):
+    """
+    getFaceCrossings of the face boundary from startEdge to the first edge crossed by the line below prevIntersection
+    between its end points, with the two neighbors of that edge since they share its end points
+    :param counterclockwise: follow nextEdge if True, else prevEdge
+    :return: None if the boundary is not linked
+    """
+    walkedEdges = []
+    crossings = []
+    edge = startEdge
+    wrapped = False
+    for _ in range(len(face.edges) + 1):
+        if(edge == None and not wrapped):
+            # the boundary of an unbounded face is open, continue from the other infinite end
+            wrapped = True
+            edge = startEdge
+            while(edge != None and (edge.prevEdge if counterclockwise else edge.nextEdge) not in (None, startEdge)):
+                edge = edge.prevEdge if counterclockwise else edge.nextEdge
+        if(edge == None or (edge == startEdge and len(walkedEdges) > 0)):
+            # no edge is crossed, which is only known when the whole boundary is walked
+            return (crossings, None) if len(walkedEdges) == len(face.edges) else None
+        if(edge.face != face):
+            return None
+        walkedEdges.append(edge)
+        if(edge.twinEdge not in prevIntersectedEdges):
+            if(stats != None):
+                stats.intersectionTests = stats.intersectionTests + 1
+            intersection = findIntersection(line, edge.line)
+            ySign = compareY(intersection, prevIntersection) if intersection != None and prevIntersection != None else 1
+            if(intersection != None and (ySign > 0 or (ySign == 0 and compareX(intersection, prevIntersection) != 0))):
+                crossings.append((edge, intersection))
+                if(isOnEdge(edge, intersection)):
+                    # the neighbors share the end points of the edge, so they are needed when the line crosses one
+                    prevEdge = edge.prevEdge
+                    nextEdge = edge.nextEdge
+                    if(prevEdge == None and not edge.startInfinity or prevEdge != None and prevEdge.nextEdge != edge):
+                        return None
+                    if(nextEdge == None and not edge.endInfinity or nextEdge != None and nextEdge.prevEdge != edge):
+                        return None
+                    for neighbor in (prevEdge, nextEdge):
+                        if(neighbor != None and neighbor.face == face and neighbor not in walkedEdges):
+                            crossings.extend(getFaceCrossings((neighbor,), line, prevIntersection, prevIntersectedEdges, stats=stats)[0])
+                    return crossings, edge
+
+        # the edge removed from the boundary is unlinked from its neighbors
+        if(counterclockwise):
+            nextEdge = edge.nextEdge
+            if(nextEdge == None and not edge.endInfinity or nextEdge != None and nextEdge.prevEdge != edge):
+                return None
+        else:
+            nextEdge = edge.prevEdge
+            if(nextEdge == None and not edge.startInfinity or nextEdge != None and nextEdge.nextEdge != edge):
+                return None
+        edge = nextEdge
+    return None
 
+def linkFace(face: 'Face'):
+    """
+    link nextEdge and prevEdge of the whole boundary of the face, the end of an edge is the start of the next edge
+    """
+    edgeByStart = {}
+    for edge in face.edges:
+        edge.prevEdge = None
+        if(not edge.startInfinity):
+            edgeByStart[edge.start] = edge
+    for edge in face.edges:
+        nextEdge = None if edge.endInfinity else edgeByStart.get(edge.end)
+        edge.nextEdge = nextEdge
+        if(nextEdge != None):
+            nextEdge.prevEdge = edge
+
+def findNearestEdges(leftCrossings: list[tuple['Edge', 'Point']], rightCrossings: list[tuple['Edge', 'Point']]):
+    """
+    the edges crossed first by the hyperplane from the crossings of getFaceCrossings
+    :return: (nearest edges, belong of the nearest edges(0: leftVoronoi, 1: rightVoronoi), nearest intersection)
+    """
+    nearestEdgeList: list[Edge] = []
+    nearestEdgeBelongList: list[int] = [] # 0: leftVoronoi, 1: rightVoronoi
+    nearestIntersection: Point = None
+    # the first crossing is nearer than no intersection
+    nearestY = inf
+    nearestError = 0.0
+
+    for leftEdge, intersection in leftCrossings:
+        # the common case of compareY inline, most crossings are far below the nearest one
+        difference = intersection.y - nearestY
+        error = intersection.error + nearestError
+        if(difference > error):
+            continue
+        ySign = -1 if -difference > error else compareY(intersection, nearestIntersection)
+        xSign = compareX(intersection, nearestIntersection) if ySign == 0 else 0
+        if(ySign < 0 or (ySign == 0 and xSign > 0)):
+            nearestEdgeList.clear()
+            nearestEdgeBelongList.clear()
+            nearestEdgeList.append(leftEdge)
+            nearestEdgeBelongList.append(0)
+            nearestIntersection = intersection
+            nearestY = intersection.y
+            nearestError = intersection.error
+        elif(ySign == 0 and xSign == 0):
+            nearestEdgeList.append(leftEdge)
+            nearestEdgeBelongList.append(0)
+
+    for rightEdge, intersection in rightCrossings:
+        # the common case of compareY inline, most crossings are far below the nearest one
+        difference = intersection.y - nearestY
+        error = intersection.error + nearestError
+        if(difference > error):
+            continue
+        ySign = -1 if -difference > error else compareY(intersection, nearestIntersection)
+        xSign = compareX(intersection, nearestIntersection) if ySign == 0 else 0
+        if(ySign < 0 or (ySign == 0 and xSign < 0)):
+            nearestEdgeList.clear()
+            nearestEdgeBelongList.clear()
+            nearestEdgeList.append(rightEdge)
+            nearestEdgeBelongList.append(1)
+            nearestIntersection = intersection
+            nearestY = intersection.y
+            nearestError = intersection.error
+        elif(ySign == 0 and xSign == 0):
+            nearestEdgeList.append(rightEdge)
+            nearestEdgeBelongList.append(1)
+
+    return nearestEdgeList, nearestEdgeBelongList, nearestIntersection
+
+def getBisectorInFace(point: 'Point', face: 'Face') -> tuple:
+    """
+    the part of the perpendicular bisector of the point and the site of the face inside the face, the bisector is
+    midPoint + t * (face.point.y - point.y, point.x - face.point.x), which has the point on the left
+    :return: (lowest t, faces limiting it, highest t, faces limiting it, faces across the edges parallel to the
+    bisector), the faces limiting an infinite end are empty
+    """
+    directionX = face.point.y - point.y
+    directionY = point.x - face.point.x
+    midX = (point.x + face.point.x) / 2
+    midY = (point.y + face.point.y) / 2
+    low = high = None
+    lowFaces = []
+    highFaces = []
+    parallelFaces = []
+    for edge in face.edges:
+        neighbor = edge.twinEdge.face
+        # the face of the point itself when it is already in the graph
+        if(neighbor.point == point):
+            continue
+        # closer to the site of the face than to the neighbor: a * t <= b
+        differenceX = neighbor.point.x - face.point.x
+        differenceY = neighbor.point.y - face.point.y
+        a = directionX * differenceX + directionY * differenceY
+        b = ((neighbor.point.x * neighbor.point.x + neighbor.point.y * neighbor.point.y - face.point.x * face.point.x - face.point.y * face.point.y) / 2
+            - midX * differenceX - midY * differenceY)
+        if(a == 0):
+            if(b < 0):
+                return None
+            # the sites are collinear, the bisector may go on in the neighbor beside it
+            parallelFaces.append(neighbor)
+            continue
+        t = b / a
+        if(a > 0):
+            if(high == None or t < high):
+                high = t
+                highFaces = [neighbor]
+            elif(t == high and neighbor not in highFaces):
+                highFaces.append(neighbor)
+        else:
+            if(low == None or t > low):
+                low = t
+                lowFaces = [neighbor]
+            elif(t == low and neighbor not in lowFaces):
+                lowFaces.append(neighbor)
+    if(low != None and high != None and low >= high):
+        return None
+    return low, lowFaces, high, highFaces, parallelFaces
+
+def getFarPoint(width: float, height: float, origin: 'Point', directionX: float, directionY: float) -> 'Vertex':
+    """
+    the placeholder of the infinite end of a ray, where the ray leaves the canvas or a point far outside the canvas
+    if the ray does not cross it
+    """
+    clipped = clipLine(origin.x, origin.y, directionX, directionY, 0, float('inf'), width, height)
+    if(clipped != None and (clipped[2] != origin.x or clipped[3] != origin.y)):
+        return Vertex(clipped[2], clipped[3])
+    scale = (width + height) / sqrt(directionX * directionX + directionY * directionY)
+    return Vertex(origin.x + directionX * scale, origin.y + directionY * scale)
+
+def getConvexHull(points: list['Point']) -> list['Point']:
+    """
+    convex hull(counterclockwise on the canvas) with the points on its edges like the convex hull of the merge,
+    collinear points are sorted by x and then by y
+    """
+    points = sorted(points, key=lambda point: (point.x, point.y))
+    if(len(points) <= 2 or all(crossProduct(points[0], points[len(points)-1], point) == 0 for point in points)):
+        return points
+    chains = []
+    for chainPoints in (points, reversed(points)):
+        chain = []
+        for point in chainPoints:
+            while(len(chain) >= 2 and crossProduct(chain[len(chain)-2], chain[len(chain)-1], point) > 0):
+                chain.pop()
+            chain.append(point)
+        chains.append(chain)
+    lowerChain, upperChain = chains
+    # the collinear points on a vertical side can be in both chains
+    lowerPoints = set(lowerChain)
+    return lowerChain[:len(lowerChain)-1] + [point for point in upperChain[:len(upperChain)-1] if point not in lowerPoints]
+
+def getOutputEdge(edge: 'Edge') -> 'Edge':
+    """
+    the one of the twin edges given by getEdges, which starts from the left(or the top)
+    """
+    if(edge.start.x < edge.end.x or edge.start.x == edge.end.x and edge.start.y <= edge.end.y):
+        return edge
+    return edge.twinEdge
+
+def getEdgeSortKey(edge: 'Edge') -> tuple:
+    return (edge.start.x, edge.start.y, edge.end.x, edge.end.y)
+
+def isSameDiagram(edges1: list['Edge'], edges2: list['Edge'], width: float, height: float, tolerance: float = 1e-6) -> bool:
+    """
+    whether the two lists of edges are the same inside the canvas, the end points may differ by the tolerance.
+    the infinite ends are placeholders, so only the parts inside the canvas are compared
+    """
+    segmentLists = []
+    for edges in (edges1, edges2):
+        segments = []
+        for edge in edges:
+            clipped = clipLine(edge.start.x, edge.start.y, edge.end.x - edge.start.x, edge.end.y - edge.start.y, 0, 1, width, height)
+            if(clipped == None or abs(clipped[2] - clipped[0]) + abs(clipped[3] - clipped[1]) <= tolerance):
+                continue
+            if(clipped[2] < clipped[0] or clipped[2] == clipped[0] and clipped[3] < clipped[1]):
+                clipped = (clipped[2], clipped[3], clipped[0], clipped[1])
+            segments.append(clipped)
+        segments.sort()
+        segmentLists.append(segments)
+    segments1, segments2 = segmentLists
+    if(len(segments1) != len(segments2)):
+        return False
+
+    # the order of the segments may change within the tolerance, so match them among the segments starting nearby.
+    # the ends of a nearly vertical segment may be taken in either order, so the reversed segment is matched too
+    matched = [False] * len(segments2)
+    for segment in segments1:
+        for candidate in (segment, (segment[2], segment[3], segment[0], segment[1])):
+            index = bisect.bisect_left(segments2, (candidate[0] - tolerance,))
+            while(index < len(segments2) and segments2[index][0] <= candidate[0] + tolerance):
+                if(not matched[index] and all(abs(candidate[i] - segments2[index][i]) <= tolerance for i in range(4))):
+                    matched[index] = True
+                    break
+                index = index + 1
+            else:
+                continue
+            break
+        else:
+            return False
+    return True
+
+def getConvexHullExtremes(convexHull: list['Point']) -> tuple[int, int]:
+    """
+    index of the leftmost(the uppest if the same x) and rightmost(the lowest if the same x) point of the convex hull
+    """
+    leftestIdx = rightestIdx = 0
+    for i in range(1, len(convexHull)):
+        if(convexHull[i].x < convexHull[leftestIdx].x or convexHull[i].x == convexHull[leftestIdx].x and convexHull[i].y < convexHull[leftestIdx].y):
+            leftestIdx = i
+        if(convexHull[i].x > convexHull[rightestIdx].x or convexHull[i].x == convexHull[rightestIdx].x and convexHull[i].y > convexHull[rightestIdx].y):
+            rightestIdx = i
+    return leftestIdx, rightestIdx
+
+def mergeConvexHull(leftConvexHull: list['Point'], rightConvexHull: list['Point'], leftExtremes: tuple[int, int] = None, rightExtremes: tuple[int, int] = None):
+    """
+    :param leftExtremes: (leftmost index, rightmost index) of the left convex hull, found by scanning if not given
+    :param rightExtremes: (leftmost index, rightmost index) of the right convex hull, found by scanning if not given
+    :return: merged convex hull, upper tangent, lower tangent and (leftmost index, rightmost index) of the merged convex hull
+    """
+    if(leftExtremes == None):
+        leftExtremes = getConvexHullExtremes(leftConvexHull)
+    if(rightExtremes == None):
+        rightExtremes = getConvexHullExtremes(rightConvexHull)
+
+    # leftConvexHull start point(right most)
+    leftConvexHullRightestPointIdx = leftExtremes[1]
     # rightConvexHull start point(left most)
-    rightConvexHullLeftestPointIdx = 0
-    for i in range(1, len(rightConvexHull)):
-        if(rightConvexHull[i].x < rightConvexHull[rightConvexHullLeftestPointIdx].x or rightConvexHull[i].x == rightConvexHull[rightConvexHullLeftestPointIdx].x and rightConvexHull[i].y < rightConvexHull[rightConvexHullLeftestPointIdx].y):
-            rightConvexHullLeftestPointIdx = i 
+    rightConvexHullLeftestPointIdx = rightExtremes[0]
 
     # find the upper tangent
     upperTangentLeft = leftConvexHullRightestPointIdx
@@ -157,20 +730,31 @@ def mergeConvexHull(leftConvexHull: list['Point'], rightConvexHull: list['Point'
         if(lowerTangentLeft == prevLowerTangentLeft and lowerTangentRight == prevLowerTangentRight):
             break
     
+    upperTangent = Edge(rightConvexHull[upperTangentRight], leftConvexHull[upperTangentLeft])
+    lowerTangent = Edge(leftConvexHull[lowerTangentLeft], rightConvexHull[lowerTangentRight])
+    convexHull = joinConvexHull(leftConvexHull, rightConvexHull, upperTangentLeft, lowerTangentLeft, upperTangentRight, lowerTangentRight)
+
+    # the leftmost point is still the one of left convex hull and the rightmost point is the one of right convex hull,
+    # only their position is changed by joining
+    if(rightConvexHull[upperTangentRight] == rightConvexHull[lowerTangentRight] and leftConvexHull[upperTangentLeft] == leftConvexHull[lowerTangentLeft]):
+        extremes = (leftExtremes[0], len(leftConvexHull) + rightExtremes[1])
+    else:
+        leftPartLength = (lowerTangentLeft - upperTangentLeft) % len(leftConvexHull) + 1
+        extremes = ((leftExtremes[0] - upperTangentLeft) % len(leftConvexHull), leftPartLength + (rightExtremes[1] - lowerTangentRight) % len(rightConvexHull))
+
+    return convexHull, upperTangent, lowerTangent, extremes
+
+def joinConvexHull(leftConvexHull: list['Point'], rightConvexHull: list['Point'], upperTangentLeft: int, lowerTangentLeft: int, upperTangentRight: int, lowerTangentRight: int) -> list['Point']:
+    """
+    combine the left and right convex hull(counterclockwise) with the index of upper and lower tangent points
+    """
     convexHull = []
-    upperTangent = lowerTangent = None
 
     # in the same line
     if(rightConvexHull[upperTangentRight] == rightConvexHull[lowerTangentRight] and leftConvexHull[upperTangentLeft] == leftConvexHull[lowerTangentLeft]):
-
-        upperTangent = Edge(rightConvexHull[upperTangentRight], leftConvexHull[upperTangentLeft])
-        lowerTangent = Edge(leftConvexHull[lowerTangentLeft], rightConvexHull[lowerTangentRight])
         convexHull.extend(leftConvexHull)
         convexHull.extend(rightConvexHull)
     else:
-        upperTangent = Edge(rightConvexHull[upperTangentRight], leftConvexHull[upperTangentLeft])
-        lowerTangent = Edge(leftConvexHull[lowerTangentLeft], rightConvexHull[lowerTangentRight])
-
         index = upperTangentLeft
         while(True):
             convexHull.append(leftConvexHull[index])
@@ -185,65 +769,113 @@ def mergeConvexHull(leftConvexHull: list['Point'], rightConvexHull: list['Point'
                 break
             index = (index + 1) % len(rightConvexHull)  
 
-    return convexHull, upperTangent, lowerTangent
+    return convexHull
 
-def testCaseParser(file):
-    testCases = []
-    with open(file,'r') as file:
-        remainingPoint = 0
-        points = []
-        for line in file:
-            if line[0] == '#' or line.strip() == '':
-                continue
+def iterLines(file, useMmap: bool = False):
+    """
+    yield the lines of the file one by one
+    :param useMmap: map the file instead of reading it through a buffer, the pages are loaded by the os as the lines are
+    read. an empty file can't be mapped and has no lines
+    """
+    with open(file, 'rb' if useMmap else 'r') as readFile:
+        if(not useMmap):
+            yield from readFile
+            return
+        try:
+            mappedFile = mmap.mmap(readFile.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return
+        with mappedFile:
+            for line in iter(mappedFile.readline, b''):
+                yield line.decode()
+
+def iterTestCases(file, useMmap: bool = False):
+    """
+    yield the points of the test cases one by one instead of reading the whole file first
+    raise ValueError if the file is not in the test case format
+    """
+    remainingPoint = 0
+    points = []
+    for line in iterLines(file, useMmap):
+        if line[0] == '#' or line.strip() == '':
+            continue
 
-            words = line.strip().split()
-            if(len(words) == 1 and words[0] == '0' and remainingPoint == 0):
-                break
-            elif(len(words) == 1 and words[0] != '0' and remainingPoint == 0):
-                remainingPoint = int(words[0])
-            elif(len(words) == 2 and remainingPoint > 0):
-                points.append((int(words[0]), int(words[1])))
-                remainingPoint = remainingPoint - 1
-            else:
-                testCases.clear()
-                break
+        words = line.strip().split()
+        if(len(words) == 1 and words[0] == '0' and remainingPoint == 0):
+            break
+        elif(len(words) == 1 and words[0] != '0' and remainingPoint == 0):
+            remainingPoint = int(words[0])
+        elif(len(words) == 2 and remainingPoint > 0):
+            points.append((int(words[0]), int(words[1])))
+            remainingPoint = remainingPoint - 1
+        else:
+            raise ValueError(f"unexpected line in test case file: {line.strip()}")
 
-            if(remainingPoint == 0):
-                if(len(points) > 0):
-                    testCases.append(points)
-                    points = []
-    return testCases
+        if(remainingPoint == 0):
+            if(len(points) > 0):
+                yield points
+                points = []
 
-def voronoiFileParser(file):
+def testCaseParser(file):
+    try:
+        return list(iterTestCases(file))
+    except ValueError:
+        return []
+
+def iterVoronoiRecords(file, useMmap: bool = False):
+    """
+    yield the records of a voronoi file one by one in the order of the file, a Point for a P line and an Edge for an E line.
+    other lines are skipped
+    """
+    for line in iterLines(file, useMmap):
+        words = line.split()
+        if(len(words) == 3 and words[0] == 'P'):
+            yield Point(float(words[1]), float(words[2]))
+        elif(len(words) == 5 and words[0] == 'E'):
+            yield Edge(Point(float(words[1]), float(words[2])), Point(float(words[3]), float(words[4])))
+
+def voronoiFileParser(file, useMmap: bool = False):
     points = []
     edges = []
-    with open(file, 'r') as file:
-        for line in file:
-            words = line.strip().split()
-            if(words[0] == 'P'):
-                points.append(Point(float(words[1]), float(words[2])))
-            if(words[0] == 'E'):
-                edges.append(Edge((Point(float(words[1]), float(words[2]))),Point(float(words[3]), float(words[4]))))
+    for record in iterVoronoiRecords(file, useMmap):
+        if(isinstance(record, Edge)):
+            edges.append(record)
+        else:
+            points.append(record)
     return points, edges
 
-def createVoronoiFile(file, points: list['Point'], edges: list['Edge']):
-    writeFile = open(file, 'w')
+def formatVoronoi(points: list['Point'], edges: list['Edge']) -> str:
+    """
+    points and edges in the output file format(P x y, E x1 y1 x2 y2)
+    """
+    lines = []
     for point in points:
-        writeFile.write(f"P {point.x} {point.y}\n")
+        lines.append(f"P {point.x} {point.y}\n")
     
     for edge in edges:
-        writeFile.write(f"E {round(edge.start.x)} {round(edge.start.y)} {round(edge.end.x)} {round(edge.end.y)}\n")
+        lines.append(f"E {round(edge.start.x)} {round(edge.start.y)} {round(edge.end.x)} {round(edge.end.y)}\n")
+
+    return ''.join(lines)
 
-    writeFile.close()
+def createVoronoiFile(file, points: list['Point'], edges: list['Edge']):
+    with open(file, 'w') as writeFile:
+        writeFile.write(formatVoronoi(points, edges))
 
 class Point():
     """
-    point in 2d graph
+    point in 2d graph, also used as the site of a face
     """
+    __slots__ = ('x', 'y')
+    x: float
+    y: float
+    # the coordinates are exact, only an intersection of two lines has a rounding error(see compareY)
+    error = 0.0
+    line1 = None
+    line2 = None
+
     def __init__(self, x: float, y: float):
         self.x = x
         self.y = y
-        self.edges = []
     
     def __add__(self, rhs):
         return Point(self.x + rhs.x, self.y + rhs.y)
@@ -254,10 +886,49 @@ class Point():
         return repr(f"({self.x}, {self.y})")
 
 
+class Intersection(Point):
+    """
+    intersection of two lines from findIntersection, the exact point is the one of the lines and the float
+    coordinates are within error of it in both x and y
+    """
+    __slots__ = ('error', 'line1', 'line2', 'exactPoint')
+    error: float
+    line1: 'Line'
+    line2: 'Line'
+
+    def __init__(self, x: float, y: float, error: float, line1: 'Line', line2: 'Line'):
+        self.x = x
+        self.y = y
+        self.error = error
+        self.line1 = line1
+        self.line2 = line2
+
+
+class Vertex(Point):
+    """
+    end point of the edges in the voronoi graph
+    """
+    __slots__ = ('edges', 'error', 'line1', 'line2', 'exactPoint')
+    edges: dict['Edge', None]
+    error: float
+    line1: 'Line'
+    line2: 'Line'
+
+    def __init__(self, x: float, y: float):
+        super().__init__(x, y)
+        # edges starting from the point, a dict is used as an ordered set so an edge is removed in constant time
+        self.edges = {}
+        # the lines of the intersection the vertex was made from, so it is still compared exactly
+        self.error = 0.0
+        self.line1 = None
+        self.line2 = None
+
+
 class Edge():
     """
     Doubly connected edge list
     """
+    __slots__ = ('start', 'end', 'startInfinity', 'endInfinity', 'nextEdge', 'prevEdge', 'twinEdge', 'line', 'face', 'removed')
     start: Point
     end: Point
     startInfinity: bool
@@ -267,8 +938,9 @@ class Edge():
     twinEdge: 'Edge'
     line: 'Line'
     face: 'Face'
+    removed: bool
 
-    def __init__(self, start:Point = None, end:Point = None, startInfinity:bool = False, endInfinity:bool=False, outOfBound:bool = False, nextEdge=None, prevEdge=None, twinEdge=None, line=None, leftFace = None, rightFace = None, face = None):
+    def __init__(self, start:Point = None, end:Point = None, startInfinity:bool = False, endInfinity:bool=False, nextEdge=None, prevEdge=None, twinEdge=None, line=None, face = None):
         self.start = start
         self.end = end
         self.startInfinity = startInfinity
@@ -277,9 +949,9 @@ class Edge():
         self.prevEdge = prevEdge
         self.twinEdge = twinEdge
         self.line = line
-        self.leftFace = leftFace
-        self.rightFace = rightFace
         self.face = face
+        # removed edges are left in face.edges until the merge ends
+        self.removed = False
     
     def __repr__(self):
         return repr(f"start:({self.start.x}, {self.start.y}) end:({self.end.x}, {self.end.y}) face:({self.face.point.x}, {self.face.point.y})")
@@ -289,13 +961,27 @@ class Line():
     """
     ax+by=c
     """
-    def __init__(self, xCoefficient=None, yCoefficient=None, constant=None):
+    __slots__ = ('xCoefficient', 'yCoefficient', 'constant', 'site1', 'site2', 'norm', 'constantBound', 'scale', 'exactLine')
+
+    def __init__(self, xCoefficient=None, yCoefficient=None, constant=None, site1: 'Point' = None, site2: 'Point' = None, constantBound: float = None):
+        """
+        :param site1, site2: the sites of a bisector(getBisector), its exact coefficients are computed from them
+        :param constantBound: bound of |c| with room for its rounding error, |c| if None
+        """
         self.xCoefficient = xCoefficient
         self.yCoefficient = yCoefficient
         self.constant = constant
+        self.site1 = site1
+        self.site2 = site2
+        # the error bound of findIntersection is made of |a| + |b| and constantBound
+        self.norm = (xCoefficient if xCoefficient > 0 else -xCoefficient) + (yCoefficient if yCoefficient > 0 else -yCoefficient)
+        self.constantBound = constantBound if constantBound != None else abs(constant)
+        # constantBound / norm for the static filter of findIntersection, a line of no norm is parallel to every line
+        self.scale = self.constantBound / self.norm if self.norm != 0 else 0.0
 
 
 class Face():
+    __slots__ = ('point', 'edges')
     point: Point
     edges: list[Edge]
     def __init__(self, point:Point):
@@ -303,255 +989,663 @@ class Face():
         self.edges = []
 
 
+def sortPoints(points: list['Point']) -> list['Point']:
+    """
+    sort the points in place fisrt by x and then by y, return the sorted points without duplicate
+    """
+    points.sort(key=lambda point: (point.x, point.y))
+    remove_duplicate = []
+    remove_duplicate.append(points[0])
+    for i in range(1,len(points)):
+        if(points[i].x == points[i-1].x and points[i].y == points[i-1].y):
+            continue
+        remove_duplicate.append(points[i])
+    return remove_duplicate
+
+def getEdgeKey(edge: 'Edge') -> 'Edge':
+    """
+    the twin edges describe the same line, use the one with smaller id as the key of both
+    """
+    if(id(edge) < id(edge.twinEdge)):
+        return edge
+    return edge.twinEdge
+
+def createVoronoiRecord(faces: list['Face'], convexHull: list['Point']) -> 'VoronoiRecord':
+    """
+    take a full snapshot of the faces, only used for the leaves of the merge (at most 2 points)
+    """
+    points = []
+    edgeState = {}
+    for face in faces:
+        points.append(face.point)
+        for edge in face.edges:
+            edgeState[getEdgeKey(edge)] = (edge.start.x, edge.start.y, edge.end.x, edge.end.y)
+    return VoronoiRecord(points, list(convexHull), edgeState)
+
+
 class VoronoiRecord():
-    edges: list[Edge]
+    """
+    materialized voronoi graph of one step, edges and convexHull are created when first used
+    """
     points: list[Point]
-    convexHull: list[Edge]
-
-    def __init__(self, voronoiGraph: 'VoronoiGraph'):
-        self.edges = []
-        self.points = []
-        self.convexHull = []
-        # the data structure use directed edge to form a polygon(counterclockwise)
-        # In order to print out the line without duplicate, we filter out the duplicate line
-        edge_set = set()
-        for face in voronoiGraph.faces:
-            self.points.append(face.point)
-            for edge in face.edges:
-                if edge in edge_set or edge.twinEdge in edge_set:
-                    continue
-                if(edge.start.x < edge.end.x or (edge.start.x == edge.end.x and edge.start.y <= edge.end.y)):
-                    edge_set.add(edge)
+    convexHullPoints: list[Point]
+    edgeState: dict[Edge, tuple]
+
+    def __init__(self, points: list[Point], convexHullPoints: list[Point], edgeState: dict[Edge, tuple]):
+        self.points = points
+        self.convexHullPoints = convexHullPoints
+        # key: the key edge of the twin edges, value: (start.x, start.y, end.x, end.y) at the time of the step
+        self.edgeState = edgeState
+        self._edges = None
+        self._convexHull = None
+
+    @property
+    def edges(self) -> list[Edge]:
+        if(self._edges == None):
+            # In order to print out the line without duplicate, the line always start from the left(upper) point
+            edge_list = []
+            for startX, startY, endX, endY in self.edgeState.values():
+                if(startX < endX or (startX == endX and startY <= endY)):
+                    edge_list.append(Edge(Point(startX, startY), Point(endX, endY)))
                 else:
-                    edge_set.add(edge.twinEdge)
-        edge_list = []
-        for edge in edge_set:
-            edge_list.append(Edge(Point(edge.start.x, edge.start.y), Point(edge.end.x, edge.end.y)))
-        # edge_list = deepcopy(list(edge_set))
-        edge_list.sort(key= lambda edge: (edge.start.x, edge.start.y, edge.end.x, edge.end.y))
-        self.edges = edge_list
-        if(len(voronoiGraph.convexHull) > 1):
-            for i in range(len(voronoiGraph.convexHull)):
-                self.convexHull.append(Edge(voronoiGraph.convexHull[i], voronoiGraph.convexHull[(i+1) % len(voronoiGraph.convexHull)]))
+                    edge_list.append(Edge(Point(endX, endY), Point(startX, startY)))
+            edge_list.sort(key= lambda edge: (edge.start.x, edge.start.y, edge.end.x, edge.end.y))
+            self._edges = edge_list
+        return self._edges
+
+    @property
+    def convexHull(self) -> list[Edge]:
+        if(self._convexHull == None):
+            self._convexHull = []
+            if(len(self.convexHullPoints) > 1):
+                for i in range(len(self.convexHullPoints)):
+                    self._convexHull.append(Edge(self.convexHullPoints[i], self.convexHullPoints[(i+1) % len(self.convexHullPoints)]))
+        return self._convexHull
+
+
+class VoronoiRecordCache():
+    """
+    LRU of the materialized merge records, shared by all merge records of one voronoi graph
+    """
+    maxSize: int
+
+    def __init__(self, maxSize=8):
+        self.maxSize = maxSize
+        self.records = OrderedDict()
+
+    def get(self, mergeRecord: 'MergeRecord') -> VoronoiRecord:
+        voronoiRecord = self.records.get(mergeRecord)
+        if(voronoiRecord != None):
+            self.records.move_to_end(mergeRecord)
+        return voronoiRecord
+
+    def put(self, mergeRecord: 'MergeRecord', voronoiRecord: VoronoiRecord):
+        self.records[mergeRecord] = voronoiRecord
+        self.records.move_to_end(mergeRecord)
+        while(len(self.records) > self.maxSize):
+            self.records.popitem(last=False)
 
 
 class MergeRecord():
-    leftVoronoiRecord: VoronoiRecord
-    rightVoronoiRecord: VoronoiRecord
+    """
+    only the changes made by one merge are stored: the hyperplane, the trimmed or removed edges and the tangents.
+    left, right and merged voronoi record are rebuilt from the children when asked
+    """
+    leftChild: 'MergeRecord | VoronoiRecord'
+    rightChild: 'MergeRecord | VoronoiRecord'
     hyperPlane: list[Edge]
-    newVornoiRecord: VoronoiRecord
     tangent: list[Edge]
+    changedEdges: dict[Edge, tuple]
 
-    def __init__(self, leftVoronoiRecord: VoronoiRecord, rightVoronoiRecord: VoronoiRecord, hyperPlane: list[Edge], newVoronoiRecord: VoronoiRecord, tangent: list[Edge]):
+    def __init__(self, leftChild: 'MergeRecord | VoronoiRecord', rightChild: 'MergeRecord | VoronoiRecord', hyperPlane: list[Edge], tangent: list[Edge], changedEdges: dict[Edge, tuple], cache: VoronoiRecordCache):
         self.hyperPlane = []
         for edge in hyperPlane:
             self.hyperPlane.append(Edge(Point(edge.start.x, edge.start.y), Point(edge.end.x, edge.end.y)))
 
-        self.leftVoronoiRecord = leftVoronoiRecord
-        self.rightVoronoiRecord = rightVoronoiRecord
-        self.newVornoiRecord = newVoronoiRecord
+        self.leftChild = leftChild
+        self.rightChild = rightChild
         self.tangent = tangent
+        # key: the key edge of the twin edges, value: coordinate after the merge or None if the edge is removed
+        self.changedEdges = changedEdges
+        self.cache = cache
+
+    @property
+    def leftVoronoiRecord(self) -> VoronoiRecord:
+        if(isinstance(self.leftChild, MergeRecord)):
+            return self.leftChild.newVornoiRecord
+        return self.leftChild
+
+    @property
+    def rightVoronoiRecord(self) -> VoronoiRecord:
+        if(isinstance(self.rightChild, MergeRecord)):
+            return self.rightChild.newVornoiRecord
+        return self.rightChild
+
+    @property
+    def newVornoiRecord(self) -> VoronoiRecord:
+        voronoiRecord = self.cache.get(self)
+        if(voronoiRecord == None):
+            leftVoronoiRecord = self.leftVoronoiRecord
+            rightVoronoiRecord = self.rightVoronoiRecord
+
+            # apply the changes of this merge to the union of left and right voronoi
+            edgeState = dict(leftVoronoiRecord.edgeState)
+            edgeState.update(rightVoronoiRecord.edgeState)
+            for edge, coordinate in self.changedEdges.items():
+                if(coordinate == None):
+                    edgeState.pop(edge, None)
+                else:
+                    edgeState[edge] = coordinate
+
+            leftConvexHull = leftVoronoiRecord.convexHullPoints
+            rightConvexHull = rightVoronoiRecord.convexHullPoints
+            upperTangent, lowerTangent = self.tangent
+            convexHull = joinConvexHull(leftConvexHull, rightConvexHull, leftConvexHull.index(upperTangent.end), leftConvexHull.index(lowerTangent.start), rightConvexHull.index(upperTangent.start), rightConvexHull.index(lowerTangent.end))
+
+            voronoiRecord = VoronoiRecord(leftVoronoiRecord.points + rightVoronoiRecord.points, convexHull, edgeState)
+            self.cache.put(self, voronoiRecord)
+        return voronoiRecord
+
+
+# the counters of MergeStats added up by BuildProfile
+MERGE_STAT_FIELDS = ('seconds', 'hyperPlaneEdges', 'intersectionTests', 'removeEdgeCalls', 'cleanupFaces', 'recordSeconds')
+
+class MergeStats():
+    """
+    counters of one merge of a profiled build
+    """
+    sites: int
+    seconds: float
+    hyperPlaneEdges: int
+    intersectionTests: int
+    removeEdgeCalls: int
+    cleanupFaces: int
+    recordSeconds: float
+
+    def __init__(self, sites: int):
+        self.sites = sites
+        # wall time of the whole merge, with the record building
+        self.seconds = 0
+        self.hyperPlaneEdges = 0
+        # hyperplane against face edge, from the scans and the boundary walks
+        self.intersectionTests = 0
+        # also the calls on the edges already removed
+        self.removeEdgeCalls = 0
+        # faces whose edges are checked for unconnected edges or dropped removed edges after the trimming
+        self.cleanupFaces = 0
+        self.recordSeconds = 0
+
+    def toDict(self) -> dict:
+        return dict(self.__dict__)
+
+
+class BuildProfile():
+    """
+    MergeStats of every merge of a build in the order of the merge, children first.
+    the merges done by other processes(workers > 1) are not in it
+    """
+    merges: list[MergeStats]
+
+    def __init__(self):
+        self.merges = []
+
+    def getTotals(self) -> dict:
+        totals = {'merges': len(self.merges)}
+        totals.update((name, 0) for name in MERGE_STAT_FIELDS)
+        for stats in self.merges:
+            for name in MERGE_STAT_FIELDS:
+                totals[name] = totals[name] + getattr(stats, name)
+        return totals
+
+    def getLevels(self) -> list[dict]:
+        """
+        the totals of the merges of the same level, a merge of at most 2^level sites is in level
+        """
+        levels = {}
+        for stats in self.merges:
+            level = (stats.sites - 1).bit_length()
+            if(level not in levels):
+                levels[level] = {'level': level, 'maxSites': 2 ** level, 'merges': 0}
+                levels[level].update((name, 0) for name in MERGE_STAT_FIELDS)
+            total = levels[level]
+            total['merges'] = total['merges'] + 1
+            for name in MERGE_STAT_FIELDS:
+                total[name] = total[name] + getattr(stats, name)
+        return [levels[level] for level in sorted(levels)]
+
+    def toDict(self, withMerges: bool = False) -> dict:
+        """
+        :param withMerges: also list every merge, one entry per merge so it is large for many sites
+        """
+        result = {'totals': self.getTotals(), 'levels': self.getLevels()}
+        if(withMerges):
+            result['merges'] = [stats.toDict() for stats in self.merges]
+        return result
+
+
+class BuildCancelledError(Exception):
+    """
+    raised by the progress callback of VoronoiGraph to stop the build between merges
+    """
+
+
+def getMergeCount(count: int) -> int:
+    """
+    number of merges of createVoronoiGraph for count points, the ranges of the same size are divided the same way so
+    only O(log n) sizes are counted
+    """
+    sizes = {count: 1}
+    mergeCount = 0
+    while(len(sizes) > 0):
+        size, times = sizes.popitem()
+        if(size > 2):
+            mergeCount = mergeCount + times
+            for half in (size // 2, size - size // 2):
+                sizes[half] = sizes.get(half, 0) + times
+    return mergeCount
+
+def getLeafLows(count: int) -> list[int]:
+    """
+    the low index of every range of 2 points of createVoronoiGraph, from left to right
+    """
+    lows = []
+    ranges = [(0, count)]
+    while(len(ranges) > 0):
+        low, high = ranges.pop()
+        if(high - low == 2):
+            lows.append(low)
+        elif(high - low > 2):
+            middle = (low + high) // 2
+            ranges.append((middle, high))
+            ranges.append((low, middle))
+    return lows
 
 
 class VoronoiGraph():
     canvasWidth: int
     canvasHeight: int
     faces: list[Face]
+    siteFaces: dict[Point, Face]
     edges: list[Edge]
     voronoiPoints: list[Point]
     convexHull: list[Point]
     mergeRecords: list[MergeRecord]
+    recordSteps: bool
+    recordCache: VoronoiRecordCache
+    progress: 'Callable[[int, int], None]'
+    profile: BuildProfile
 
-    def __init__(self, canvasWidth, canvasHeight):
+    def __init__(self, canvasWidth, canvasHeight, recordSteps=False, progress=None, profile=False):
+        """
+        :param progress: called with (merges done, total merges) after every merge of createVoronoiGraph, it can raise
+        BuildCancelledError to stop the build. the graph is left half built
+        :param profile: keep the MergeStats of every merge in self.profile, None if False
+        """
         self.faces = []
+        # face of each site, so the merge can find the face of the tangent points directly
+        self.siteFaces = {}
         self.convexHull = []
         self.edges = []
         self.voronoiPoints = []
         self.mergeRecords = []
         self.canvasWidth = canvasWidth
         self.canvasHeight = canvasHeight
+        # the merge records are only used by the step by step execution, skip them when not needed
+        self.recordSteps = recordSteps
+        self.recordCache = VoronoiRecordCache() if recordSteps else None
+        self.progress = progress
+        self.profile = BuildProfile() if profile else None
+        # MergeStats of the merge running in a profiled build
+        self.mergeStats = None
+        # edges removed by the current merge
+        self.removedEdges = []
+        # number of ranges of the last createVoronoiGraph built by other processes
+        self.slabCount = 0
     
-    def createVoronoiGraph(self, points:Point):
-        if(len(points) == 1):
-            self.convexHull.append(points[0])
-            face = Face(points[0])
-            self.faces.append(face)
-            
-        elif(len(points) == 2):
-            # create face by point, left face is the leftest and uppurest
-            leftFace = None
-            rightFace = None
-            points.sort(key= lambda point: (point.x, point.y))
-            leftFace = Face(points[0])
-            rightFace = Face(points[1])               
+    def createVoronoiGraph(self, points: list[Point], workers: int = 1):
+        """
+        points should be sorted by x and then by y without duplicate.
+        the points are divided by index range and merged bottom up with an explicit stack instead of recursion,
+        faces[i] is the face of points[i]
+        :param workers: number of processes, the ranges of the top levels are built by the processes and only their
+        merges run here. the merge records are not supported. at most getAvailableCpus processes are used, the processes
+        sharing a cpu are slower than one build because of packing and loading the ranges
+        """
+        self.faces = [Face(point) for point in points]
+        self.siteFaces = {face.point: face for face in self.faces}
+
+        # future of the ArrayVoronoiGraph of each range built by another process
+        slabGraphs = {}
+        executor = None
+        workers = min(workers, getAvailableCpus())
+        if(workers > 1 and not self.recordSteps and len(points) >= workers * SLAB_MIN_SITES):
+            executor = ProcessPoolExecutor(max_workers=workers)
+        self.slabCount = 0
+        # the leaves of the ranges of other processes are built there
+        leafBisectors = self.getLeafBisectors(points) if executor == None else {}
+        try:
+            if(executor != None):
+                for low, high in getSlabRanges(len(points), workers):
+                    slabX = array('d', (point.x for point in points[low:high]))
+                    slabY = array('d', (point.y for point in points[low:high]))
+                    slabGraphs[(low, high)] = executor.submit(buildSlabGraph, slabX, slabY, self.canvasWidth, self.canvasHeight)
+                self.slabCount = len(slabGraphs)
+
+            totalMerges = getMergeCount(len(points)) if self.progress != None else 0
+            mergeCount = 0
+
+            # (low, high, divided) of the ranges to handle, the left range is on the top
+            workStack = [(0, len(points), False)]
+            # convex hull, (leftmost index, rightmost index) of the convex hull and step record of the finished ranges, the right range is on the top
+            convexHullStack = []
+            extremesStack = []
+            stepRecordStack = []
+            while(len(workStack) > 0):
+                low, high, divided = workStack.pop()
+                middle = (low + high) // 2
+                if((low, high) in slabGraphs):
+                    convexHull = self.loadArrayGraph(self.waitSlabGraph(slabGraphs.pop((low, high)), mergeCount, totalMerges), low)
+                    convexHullStack.append(convexHull)
+                    extremesStack.append(getConvexHullExtremes(convexHull))
+                    if(self.progress != None):
+                        # the merges of the range are done by another process
+                        mergeCount = mergeCount + getMergeCount(high - low)
+                        self.progress(mergeCount, totalMerges)
+                elif(high - low <= 2):
+                    convexHullStack.append(self.createLeafGraph(low, high, leafBisectors.pop(low, None)))
+                    # points are sorted, so the first point is the leftmost and the last point is the rightmost
+                    extremesStack.append((0, high - low - 1))
+                    if(self.recordSteps):
+                        stepRecordStack.append(createVoronoiRecord(self.faces[low:high], convexHullStack[len(convexHullStack)-1]))
+                elif(not divided):
+                    workStack.append((low, high, True))
+                    workStack.append((middle, high, False))
+                    workStack.append((low, middle, False))
+                else:
+                    rightConvexHull = convexHullStack.pop()
+                    leftConvexHull = convexHullStack.pop()
+                    rightExtremes = extremesStack.pop()
+                    leftExtremes = extremesStack.pop()
+                    leftChild = rightChild = None
+                    if(self.recordSteps):
+                        rightChild = stepRecordStack.pop()
+                        leftChild = stepRecordStack.pop()
+                    convexHull, extremes = self.mergeVoronoiDiagram(low, middle, high, leftConvexHull, rightConvexHull, leftExtremes, rightExtremes, leftChild, rightChild)
+                    convexHullStack.append(convexHull)
+                    extremesStack.append(extremes)
+                    if(self.recordSteps):
+                        stepRecordStack.append(self.mergeRecords[len(self.mergeRecords)-1])
+                    if(self.progress != None):
+                        mergeCount = mergeCount + 1
+                        self.progress(mergeCount, totalMerges)
+
+            if(len(convexHullStack) > 0):
+                self.convexHull = convexHullStack[0]
+        finally:
+            if(executor != None):
+                # a cancelled or failed build does not wait for the processes: the ranges not started are dropped
+                # and a range being built is finished by its process, which then exits
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def waitSlabGraph(self, future, mergeCount: int, totalMerges: int) -> 'ArrayVoronoiGraph':
+        """
+        the result of a range built by another process, progress is called again while waiting so it can cancel the build
+        """
+        if(self.progress == None):
+            return future.result()
+        while(True):
+            try:
+                return future.result(timeout=SLAB_POLL_INTERVAL)
+            except FutureTimeoutError:
+                self.progress(mergeCount, totalMerges)
+
+    def loadArrayGraph(self, arrayGraph: 'ArrayVoronoiGraph', low: int) -> list[Point]:
+        """
+        rebuild the edges of faces[low] to faces[low+n-1] from the ArrayVoronoiGraph of the n points from points[low].
+        the lines are not packed, they are computed again from the sites in the same order as the merge.
+        vertex.edges only keeps the edges starting from the vertex, so later merges may round a little differently
+        :return: the convex hull of the points
+        """
+        faces = self.faces[low:low+len(arrayGraph.siteX)]
+        vertices = [Vertex(x, y) for x, y in zip(arrayGraph.vertexX, arrayGraph.vertexY)]
+        halfEdgeOrigin = arrayGraph.halfEdgeOrigin
+        halfEdgeOriginInfinity = arrayGraph.halfEdgeOriginInfinity
+        halfEdgeTwin = arrayGraph.halfEdgeTwin
+        halfEdgeFace = arrayGraph.halfEdgeFace
+        halfEdges = []
+        for i in range(len(halfEdgeOrigin)):
+            twin = halfEdgeTwin[i]
+            edge = Edge(start=vertices[halfEdgeOrigin[i]], end=vertices[halfEdgeOrigin[twin]], startInfinity=bool(halfEdgeOriginInfinity[i]), endInfinity=bool(halfEdgeOriginInfinity[twin]), face=faces[halfEdgeFace[i]])
+            edge.start.edges[edge] = None
+            halfEdges.append(edge)
+        for i in range(len(halfEdges)):
+            edge = halfEdges[i]
+            twin = halfEdgeTwin[i]
+            edge.twinEdge = halfEdges[twin]
+            if(arrayGraph.halfEdgeNext[i] != -1):
+                edge.nextEdge = halfEdges[arrayGraph.halfEdgeNext[i]]
+                edge.nextEdge.prevEdge = edge
+            if(twin > i):
+                # the line of the merge goes from the site of the left range to the site of the right range
+                leftPoint = faces[min(halfEdgeFace[i], halfEdgeFace[twin])].point
+                rightPoint = faces[max(halfEdgeFace[i], halfEdgeFace[twin])].point
+                edge.line = getBisector(leftPoint, rightPoint)
+                edge.twinEdge.line = edge.line
+        faceEdgeOffset = arrayGraph.faceEdgeOffset
+        for i in range(len(faces)):
+            faces[i].edges = halfEdges[faceEdgeOffset[i]:faceEdgeOffset[i+1]]
+        return [faces[i].point for i in arrayGraph.convexHull]
+
+    def getLeafBisectors(self, points: list[Point]) -> dict[int, tuple]:
+        """
+        the bisector and its ends on the canvas of every leaf of 2 points, computed at once by the batch functions of
+        vectorized.py. they are the same as getBisector and getIntersectionOfCanvas, which createLeafGraph uses
+        without numpy, for a few points and for a bisector missing the canvas
+        :return: {low index of the leaf: (Line, first Vertex, last Vertex)}
+        """
+        if(len(points) < BATCH_MIN_SITES):
+            return {}
+        try:
+            from vectorized import getBisectors, getIntersectionsOfCanvas
+        except ImportError:
+            return {}
+        lows = getLeafLows(len(points))
+        x1 = [points[low].x for low in lows]
+        y1 = [points[low].y for low in lows]
+        x2 = [points[low+1].x for low in lows]
+        y2 = [points[low+1].y for low in lows]
+        xCoefficients, yCoefficients, constants, constantBounds = getBisectors(x1, y1, x2, y2)
+        segments = getIntersectionsOfCanvas(self.canvasWidth, self.canvasHeight, xCoefficients, yCoefficients, constants)
+        leafBisectors = {}
+        for low, xCoefficient, yCoefficient, constant, constantBound, (startX, startY, endX, endY) in zip(lows, xCoefficients.tolist(), yCoefficients.tolist(), constants.tolist(), constantBounds.tolist(), segments.tolist()):
+            # the bisector missing the canvas(nan) or only touching a corner of it is left to createLeafGraph
+            if(startX != startX or startX == endX and startY == endY):
+                continue
+            leafBisectors[low] = (Line(xCoefficient, yCoefficient, constant, points[low], points[low+1], constantBound), Vertex(startX, startY), Vertex(endX, endY))
+        return leafBisectors
+
+    def createLeafGraph(self, low: int, high: int, leafBisector: tuple = None) -> list[Point]:
+        """
+        create the voronoi graph of faces[low:high] which has at most 2 faces
+        :param leafBisector: (Line, first Vertex, last Vertex) of getLeafBisectors, computed here if None
+        :return: convex hull of the graph
+        """
+        if(high - low == 1):
+            return [self.faces[low].point]
+
+        # left face is the leftest and uppurest
+        leftFace = self.faces[low]
+        rightFace = self.faces[low+1]
 
+        if(leafBisector != None):
+            perpendicularLine, top, bottom = leafBisector
+            intersectionsOfCanvas = [top, bottom]
+        else:
             # calulate the perpendicular line of left face and right face
-            leftRightLine = createLineByPoint(leftFace.point, rightFace.point)
-            midPoint = getMidPoint(leftFace.point, rightFace.point)
-            perpendicularLine = getPerpendicularLine(leftRightLine, midPoint)
+            perpendicularLine = getBisector(leftFace.point, rightFace.point)
 
-            # create hyperplane edge and sort by the y axis(if y axis of both point are the same, rightmost point are the first)
+            # create hyperplane edge from the top(if the line is horizontal, rightmost point are the first)
             intersectionsOfCanvas = getIntersectionOfCanvas(self.canvasWidth, self.canvasHeight, perpendicularLine)
-            intersectionsOfCanvas.sort(key= lambda point: (point.y, -point.x))
+            sortDownward(intersectionsOfCanvas, perpendicularLine)
 
-            currentEdgeDown = Edge(start=intersectionsOfCanvas[0], end=intersectionsOfCanvas[len(intersectionsOfCanvas)-1], startInfinity=True, endInfinity=True, line=perpendicularLine, face=rightFace)
-            currentEdgeUp = Edge(start=intersectionsOfCanvas[len(intersectionsOfCanvas)-1], end=intersectionsOfCanvas[0], startInfinity=True, endInfinity=True, line=perpendicularLine, face=leftFace)
-            intersectionsOfCanvas[0].edges.append(currentEdgeDown)
-            intersectionsOfCanvas[len(intersectionsOfCanvas)-1].edges.append(currentEdgeUp)
-            currentEdgeDown.twinEdge = currentEdgeUp
-            currentEdgeUp.twinEdge = currentEdgeDown
-            currentEdgeDown.face = rightFace
-            currentEdgeUp.face = leftFace
-            leftFace.edges.append(currentEdgeUp)
-            rightFace.edges.append(currentEdgeDown)
-            self.faces.append(leftFace)
-            self.faces.append(rightFace)
-            self.convexHull.append(leftFace.point)
-            self.convexHull.append(rightFace.point)
-        else:
-            leftVoronoiGraph = VoronoiGraph(self.canvasWidth, self.canvasHeight)
-            leftVoronoiGraph.createVoronoiGraph(points[:len(points) // 2])
-            rightVoronoiGraph = VoronoiGraph(self.canvasWidth, self.canvasHeight)
-            rightVoronoiGraph.createVoronoiGraph(points[len(points) // 2:])
-            self.mergeVoronoiDiagram(leftVoronoiGraph, rightVoronoiGraph)
+        currentEdgeDown = Edge(start=intersectionsOfCanvas[0], end=intersectionsOfCanvas[len(intersectionsOfCanvas)-1], startInfinity=True, endInfinity=True, line=perpendicularLine, face=rightFace)
+        currentEdgeUp = Edge(start=intersectionsOfCanvas[len(intersectionsOfCanvas)-1], end=intersectionsOfCanvas[0], startInfinity=True, endInfinity=True, line=perpendicularLine, face=leftFace)
+        intersectionsOfCanvas[0].edges[currentEdgeDown] = None
+        intersectionsOfCanvas[len(intersectionsOfCanvas)-1].edges[currentEdgeUp] = None
+        currentEdgeDown.twinEdge = currentEdgeUp
+        currentEdgeUp.twinEdge = currentEdgeDown
+        leftFace.edges.append(currentEdgeUp)
+        rightFace.edges.append(currentEdgeDown)
+        return [leftFace.point, rightFace.point]
 
-    def mergeVoronoiDiagram(self, leftVoronoiGraph: 'VoronoiGraph', rightVoronoiGraph: 'VoronoiGraph'):
-        # left and right voronoi Record are used by the step by step execution
-        leftVoronoiRecord = VoronoiRecord(leftVoronoiGraph)
-        rightVoronoiRecord = VoronoiRecord(rightVoronoiGraph)
+    def mergeVoronoiDiagram(self, low: int, middle: int, high: int, leftConvexHull: list[Point], rightConvexHull: list[Point], leftExtremes: tuple[int, int] = None, rightExtremes: tuple[int, int] = None, leftChild: 'MergeRecord | VoronoiRecord' = None, rightChild: 'MergeRecord | VoronoiRecord' = None) -> tuple[list[Point], tuple[int, int]]:
+        """
+        merge the voronoi graph of faces[low:middle] and faces[middle:high]
+        :param leftExtremes: (leftmost index, rightmost index) of the left convex hull
+        :param rightExtremes: (leftmost index, rightmost index) of the right convex hull
+        :param leftChild: step record of the left graph, only used when recording steps
+        :param rightChild: step record of the right graph, only used when recording steps
+        :return: convex hull of the merged graph and (leftmost index, rightmost index) of it
+        """
+        stats = None
+        if(self.profile != None):
+            stats = MergeStats(high - low)
+            self.mergeStats = stats
+            startTime = time.perf_counter()
 
         # find the left and right face as the start scan line
-        convexHull, upperTangent, lowerTangent = mergeConvexHull(leftVoronoiGraph.convexHull, rightVoronoiGraph.convexHull)
-        leftFace: Face = None
-        rightFace: Face = None
-        for face in leftVoronoiGraph.faces:
-            if(face.point == upperTangent.end):
-                leftFace = face
-                break
-        for face in rightVoronoiGraph.faces:
-            if(face.point == upperTangent.start):
-                rightFace = face
-                break
+        convexHull, upperTangent, lowerTangent, extremes = mergeConvexHull(leftConvexHull, rightConvexHull, leftExtremes, rightExtremes)
+        leftFace: Face = self.siteFaces[upperTangent.end]
+        rightFace: Face = self.siteFaces[upperTangent.start]
 
         hyperPlaneDown: list[Edge] = []
         hyperPlaneUp: list[Edge] = []
         prevIntersection: Point = None
-        prevIntersectedEdgeList: list[Edge] = []
+        prevIntersectedEdges: set[Edge] = set()
+        # the edge to start the boundary walk of the face, None for scanning every edge of the face
+        leftWalkEdge: Edge = None
+        rightWalkEdge: Edge = None
         modifiedEdgeList: list[list[Edge]] = []
         modifiedEdgeBelongList: list[list[int]] = []
+        # whether the left or right face of each hyperplane edge was large enough to be walked
+        walkableList: list[bool] = []
         while(True):
             # reach the lower tangent
             if(leftFace.point == lowerTangent.start and rightFace.point == lowerTangent.end):
                 break
 
             # calulate the perpendicular line of two faces as hyperplane
-            leftRightLine = createLineByPoint(leftFace.point, rightFace.point)
-            midPoint = getMidPoint(leftFace.point, rightFace.point)
-            perpendicularLine = getPerpendicularLine(leftRightLine, midPoint)
+            perpendicularLine = getBisector(leftFace.point, rightFace.point)
 
             # find the intersection of perpendicular line and canvas edge(use as default start and end point of edge)
             currentHyperPlaneIntersectionsOfCanvas = getIntersectionOfCanvas(self.canvasWidth, self.canvasHeight, perpendicularLine)
-            currentHyperPlaneIntersectionsOfCanvas.sort(key= lambda point: (point.y, -point.x))
+            sortDownward(currentHyperPlaneIntersectionsOfCanvas, perpendicularLine)
             startPoint = currentHyperPlaneIntersectionsOfCanvas[0]
             startPointInfinity = True
             endPoint = currentHyperPlaneIntersectionsOfCanvas[len(currentHyperPlaneIntersectionsOfCanvas)-1]
             endPointInfinity = True
 
             # find the nearest intersection and nearest edge which is the end point of hyperline
-            nearestEdgeList: list[Edge] = []
-            nearestEdgeBelongList: list[int] = [] # 0: leftVoronoi, 1: rightVoronoi
-            nearestIntersection: Point = None
-
-            for leftEdge in leftFace.edges:
-                if leftEdge.twinEdge in prevIntersectedEdgeList:
-                    continue
+            # the boundary of a face with many edges is walked from where the last step stopped, every edge of it is only
+            # checked at the first step, for the horizontal hyperplane and when the intersection is shared by several edges
+            leftWalk = rightWalk = None
+            leftWalkable = len(leftFace.edges) >= WALK_MIN_EDGES
+            rightWalkable = len(rightFace.edges) >= WALK_MIN_EDGES
+            if(perpendicularLine.xCoefficient != 0):
+                # a boundary not linked(the face was small when it was last changed) is linked for the next walk
+                if(leftWalkable and leftWalkEdge != None):
+                    leftWalk = walkFaceBoundary(leftFace, leftWalkEdge, perpendicularLine, prevIntersection, prevIntersectedEdges, False, stats)
+                    if(leftWalk == None):
+                        linkFace(leftFace)
+                if(rightWalkable and rightWalkEdge != None):
+                    rightWalk = walkFaceBoundary(rightFace, rightWalkEdge, perpendicularLine, prevIntersection, prevIntersectedEdges, True, stats)
+                    if(rightWalk == None):
+                        linkFace(rightFace)
+            leftCrossings, leftCrossedEdge = leftWalk or getFaceCrossings(leftFace.edges, perpendicularLine, prevIntersection, prevIntersectedEdges, leftWalkable, stats)
+            rightCrossings, rightCrossedEdge = rightWalk or getFaceCrossings(rightFace.edges, perpendicularLine, prevIntersection, prevIntersectedEdges, rightWalkable, stats)
+            nearestEdgeList, nearestEdgeBelongList, nearestIntersection = findNearestEdges(leftCrossings, rightCrossings)
+            if((leftWalk != None or rightWalk != None) and (nearestIntersection == None or len(nearestEdgeList) > 1)):
+                leftCrossings, leftCrossedEdge = getFaceCrossings(leftFace.edges, perpendicularLine, prevIntersection, prevIntersectedEdges, leftWalkable, stats)
+                rightCrossings, rightCrossedEdge = getFaceCrossings(rightFace.edges, perpendicularLine, prevIntersection, prevIntersectedEdges, rightWalkable, stats)
+                nearestEdgeList, nearestEdgeBelongList, nearestIntersection = findNearestEdges(leftCrossings, rightCrossings)
 
-                intersection = findIntersection(perpendicularLine, leftEdge.line)
-                if(prevIntersection != None and intersection != None and (intersection.y < prevIntersection.y or (intersection.x == prevIntersection.x and intersection.y == prevIntersection.y))):
-                    continue
-
-                if(intersection != None and (nearestIntersection == None or intersection.y < nearestIntersection.y or (intersection.y == nearestIntersection.y and intersection.x > nearestIntersection.x))):
-                    nearestEdgeList.clear()
-                    nearestEdgeBelongList.clear()
-                    nearestEdgeList.append(leftEdge)
-                    nearestEdgeBelongList.append(0)
-                    nearestIntersection = intersection 
-                elif(intersection != None and nearestIntersection != None and (intersection.y == nearestIntersection.y and intersection.x == nearestIntersection.x)):
-                    nearestEdgeList.append(leftEdge)
-                    nearestEdgeBelongList.append(0)
-
-            for rightEdge in rightFace.edges:
-                if rightEdge.twinEdge in prevIntersectedEdgeList:
-                    continue
-
-                intersection = findIntersection(perpendicularLine, rightEdge.line)
-                if(prevIntersection != None and intersection != None and (intersection.y < prevIntersection.y or (intersection.x == prevIntersection.x and intersection.y == prevIntersection.y))):
-                    continue
-
-                if(intersection != None and (nearestIntersection == None or intersection.y < nearestIntersection.y or (intersection.y == nearestIntersection.y and intersection.x < nearestIntersection.x))):
-                    nearestEdgeList.clear()
-                    nearestEdgeBelongList.clear()
-                    nearestEdgeList.append(rightEdge)
-                    nearestEdgeBelongList.append(1)
-                    nearestIntersection = intersection
-                elif(intersection != None and nearestIntersection != None and (intersection.y == nearestIntersection.y and intersection.x == nearestIntersection.x)):
-                    nearestEdgeList.append(rightEdge)
-                    nearestEdgeBelongList.append(1)
-            
             # nearest intersection are the same as previous
-            if(prevIntersection != None and nearestIntersection.x == prevIntersection.x and nearestIntersection.y == prevIntersection.y):
+            if(prevIntersection != None and isSamePoint(nearestIntersection, prevIntersection)):
                 for i in range(len(nearestEdgeList)):
                     if(nearestEdgeBelongList[i] == 0):
                         leftFace = nearestEdgeList[i].twinEdge.face
+                        leftWalkEdge = nearestEdgeList[i].twinEdge
                     if(nearestEdgeBelongList[i] == 1):
                         rightFace = nearestEdgeList[i].twinEdge.face
+                        rightWalkEdge = nearestEdgeList[i].twinEdge
                 continue
 
             # assign connected edge to the voronoi point, if intersection already exist just use that point as intersection
             leftIntersectCount = len([elem for elem in nearestEdgeBelongList if elem == 0])
             rightIntersectCount = len([elem for elem in nearestEdgeBelongList if elem == 1])
 
+            leftVoronoiPoint = None
             if(leftIntersectCount > 1):
                 edgeIdx = nearestEdgeBelongList.index(0)
-                if(nearestEdgeList[edgeIdx].start.x == nearestIntersection.x and nearestEdgeList[edgeIdx].start.y == nearestIntersection.y):
-                    nearestIntersection = nearestEdgeList[edgeIdx].start
-                elif(nearestEdgeList[edgeIdx].end.x == nearestIntersection.x and nearestEdgeList[edgeIdx].end.y == nearestIntersection.y):
-                    nearestIntersection = nearestEdgeList[edgeIdx].end
+                if(isSamePoint(nearestEdgeList[edgeIdx].start, nearestIntersection)):
+                    nearestIntersection = leftVoronoiPoint = nearestEdgeList[edgeIdx].start
+                elif(isSamePoint(nearestEdgeList[edgeIdx].end, nearestIntersection)):
+                    nearestIntersection = leftVoronoiPoint = nearestEdgeList[edgeIdx].end
 
             if(rightIntersectCount > 1):
                 edgeIdx = nearestEdgeBelongList.index(1)
-                if(nearestEdgeList[edgeIdx].start.x == nearestIntersection.x and nearestEdgeList[edgeIdx].start.y == nearestIntersection.y):
+                if(isSamePoint(nearestEdgeList[edgeIdx].start, nearestIntersection)):
                     nearestIntersection = nearestEdgeList[edgeIdx].start
-                elif(nearestEdgeList[edgeIdx].end.x == nearestIntersection.x and nearestEdgeList[edgeIdx].end.y == nearestIntersection.y):
+                elif(isSamePoint(nearestEdgeList[edgeIdx].end, nearestIntersection)):
                     nearestIntersection = nearestEdgeList[edgeIdx].end
+                # the voronoi points of both graphs at the same place are one voronoi point, the edges of the left one
+                # not trimmed would be left unconnected
+                if(leftVoronoiPoint != None and leftVoronoiPoint != nearestIntersection):
+                    for edge in leftVoronoiPoint.edges:
+                        edge.start = nearestIntersection
+                        edge.twinEdge.end = nearestIntersection
+                        nearestIntersection.edges[edge] = None
+                    leftVoronoiPoint.edges = {}
+
+            # the intersection becomes a voronoi point
+            if(not isinstance(nearestIntersection, Vertex)):
+                intersection = nearestIntersection
+                nearestIntersection = Vertex(intersection.x, intersection.y)
+                nearestIntersection.error = intersection.error
+                nearestIntersection.line1 = intersection.line1
+                nearestIntersection.line2 = intersection.line2
+                # the exact point of a tie is kept, the vertex is compared again with the next intersections
+                exactPoint = getattr(intersection, 'exactPoint', None)
+                if(exactPoint != None):
+                    nearestIntersection.exactPoint = exactPoint
 
             for i in range(len(nearestEdgeList)):
                 if(nearestEdgeBelongList[i] == 0 and leftIntersectCount == 1):
-                    nearestIntersection.edges.append(nearestEdgeList[i].twinEdge)
+                    nearestIntersection.edges[nearestEdgeList[i].twinEdge] = None
                 elif(nearestEdgeBelongList[i] == 1 and rightIntersectCount == 1):
-                    nearestIntersection.edges.append(nearestEdgeList[i])
+                    nearestIntersection.edges[nearestEdgeList[i]] = None
 
             # seting the start point of current hyperplane
             if(len(hyperPlaneDown) > 0):
                 startPoint = hyperPlaneDown[len(hyperPlaneDown)-1].end
                 startPointInfinity = False
             elif(len(hyperPlaneDown) == 0):
-                if(not isInDistrict(self.canvasWidth,self.canvasHeight, nearestIntersection.x, nearestIntersection.y)):
+                if(not isInsideDistrict(self.canvasWidth,self.canvasHeight, nearestIntersection.x, nearestIntersection.y)):
                     # the start point of hyperPlane is infinity, so we find a point outside the canvas and is farther than intersection
-                    if(nearestIntersection.x < 0 and startPoint.x < endPoint.x or nearestIntersection.x > self.canvasWidth and startPoint.x > endPoint.x):
+                    if(nearestIntersection.x <= 0 and startPoint.x < endPoint.x or nearestIntersection.x >= self.canvasWidth and startPoint.x > endPoint.x):
                         if(perpendicularLine.xCoefficient == 0):
                             startPoint.x = nearestIntersection.x - (endPoint.x - startPoint.x)
                         else:
                             startPoint.x = nearestIntersection.x - (endPoint.x - startPoint.x)
                             startPoint.y = getYbyX(perpendicularLine, nearestIntersection.x - (endPoint.x - startPoint.x))
-                    elif(nearestIntersection.y < 0 and startPoint.y < endPoint.y or nearestIntersection.y > self.canvasHeight and startPoint.y > endPoint.y):
+                    elif(nearestIntersection.y <= 0 and startPoint.y < endPoint.y or nearestIntersection.y >= self.canvasHeight and startPoint.y > endPoint.y):
                         if(perpendicularLine.yCoefficient == 0):
                             startPoint.y = nearestIntersection.y - (endPoint.y - startPoint.y)
                         else:
                             startPoint.x = getXbyY(perpendicularLine, nearestIntersection.y - (endPoint.y - startPoint.y))
                             startPoint.y = nearestIntersection.y - (endPoint.y - startPoint.y)
 
-            prevIntersectedEdgeList = nearestEdgeList
+            prevIntersectedEdges = set(nearestEdgeList)
             prevIntersection = nearestIntersection
             endPoint = nearestIntersection
             endPointInfinity = False
@@ -561,38 +1655,54 @@ class VoronoiGraph():
             currentEdgeUp = Edge(start=endPoint, end=startPoint, startInfinity=endPointInfinity, endInfinity=startPointInfinity, line=perpendicularLine, face=leftFace)
             currentEdgeDown.twinEdge = currentEdgeUp
             currentEdgeUp.twinEdge = currentEdgeDown
-            startPoint.edges.append(currentEdgeDown)
-            endPoint.edges.append(currentEdgeUp)
+            startPoint.edges[currentEdgeDown] = None
+            endPoint.edges[currentEdgeUp] = None
             hyperPlaneDown.append(currentEdgeDown)
             hyperPlaneUp.append(currentEdgeUp)
             modifiedEdgeList.append(nearestEdgeList)
             modifiedEdgeBelongList.append(nearestEdgeBelongList)
-
-            # finding the next face
+            walkableList.append(leftWalkable or rightWalkable)
+
+            # finding the next face, the walk of the face not changed continues from the edge nearest to the hyperplane
+            if(leftCrossedEdge != None):
+                leftWalkEdge = leftCrossedEdge
+            if(rightCrossedEdge != None):
+                rightWalkEdge = rightCrossedEdge
+
+            # the next face of a side meeting several edges is the one next to the next face of the other side, if that
+            # is known, on the circle of the sites around the voronoi point
+            nextLeftFace = leftFace if leftIntersectCount == 0 else nearestEdgeList[0].twinEdge.face if leftIntersectCount == 1 else None
+            nextRightFace = rightFace if rightIntersectCount == 0 else nearestEdgeList[leftIntersectCount].twinEdge.face if rightIntersectCount == 1 else None
             if(leftIntersectCount > 1):
                 leftNearestEdge = nearestEdgeList[0:leftIntersectCount]
                 leftNearestEdge.sort(key= lambda edge: (-edge.twinEdge.face.point.y, -edge.twinEdge.face.point.x))
+                if(nextRightFace != None):
+                    leftNearestEdge.insert(0, getNextEdgeOnCircle(leftNearestEdge, nextRightFace, leftFace))
                 leftFace = leftNearestEdge[0].twinEdge.face
+                leftWalkEdge = leftNearestEdge[0].twinEdge
 
             if(rightIntersectCount > 1):
                 rightNearestEdge = nearestEdgeList[leftIntersectCount:leftIntersectCount+rightIntersectCount]
                 rightNearestEdge.sort(key= lambda edge: (-edge.twinEdge.face.point.y, edge.twinEdge.face.point.x))
+                if(nextLeftFace != None):
+                    rightNearestEdge.insert(0, getNextEdgeOnCircle(rightNearestEdge, nextLeftFace, rightFace))
                 rightFace = rightNearestEdge[0].twinEdge.face
+                rightWalkEdge = rightNearestEdge[0].twinEdge
             
             for i in range(len(nearestEdgeList)):
                 if(nearestEdgeBelongList[i] == 0 and leftIntersectCount == 1):
                     leftFace = nearestEdgeList[i].twinEdge.face
+                    leftWalkEdge = nearestEdgeList[i].twinEdge
                 if(nearestEdgeBelongList[i] == 1 and rightIntersectCount == 1):
                     rightFace = nearestEdgeList[i].twinEdge.face
+                    rightWalkEdge = nearestEdgeList[i].twinEdge
 
         ###################################################### Handle last hyperline #######################################################################
         # calulate the perpendicular line of lower tangent as last hyperplane
-        leftRightLine = createLineByPoint(leftFace.point, rightFace.point)
-        midPoint = getMidPoint(leftFace.point, rightFace.point)
-        perpendicularLine = getPerpendicularLine(leftRightLine, midPoint)
+        perpendicularLine = getBisector(leftFace.point, rightFace.point)
 
         currentHyperPlaneIntersectionsOfCanvas = getIntersectionOfCanvas(self.canvasWidth, self.canvasHeight, perpendicularLine)
-        currentHyperPlaneIntersectionsOfCanvas.sort(key= lambda point: (point.y, -point.x))
+        sortDownward(currentHyperPlaneIntersectionsOfCanvas, perpendicularLine)
         startPoint = currentHyperPlaneIntersectionsOfCanvas[0]
         startPointInfinity = True
         endPoint = currentHyperPlaneIntersectionsOfCanvas[len(currentHyperPlaneIntersectionsOfCanvas)-1]
@@ -600,14 +1710,14 @@ class VoronoiGraph():
 
         # intersection not in the canvas
         if(len(hyperPlaneDown) > 0):
-            if(not isInDistrict(self.canvasWidth,self.canvasHeight, hyperPlaneDown[len(hyperPlaneDown)-1].end.x, hyperPlaneDown[len(hyperPlaneDown)-1].end.y)):
-                if(hyperPlaneDown[len(hyperPlaneDown)-1].end.x > self.canvasWidth and endPoint.x > startPoint.x or hyperPlaneDown[len(hyperPlaneDown)-1].end.x < 0 and endPoint.x < startPoint.x):
+            if(not isInsideDistrict(self.canvasWidth,self.canvasHeight, hyperPlaneDown[len(hyperPlaneDown)-1].end.x, hyperPlaneDown[len(hyperPlaneDown)-1].end.y)):
+                if(hyperPlaneDown[len(hyperPlaneDown)-1].end.x >= self.canvasWidth and endPoint.x > startPoint.x or hyperPlaneDown[len(hyperPlaneDown)-1].end.x <= 0 and endPoint.x < startPoint.x):
                     if(perpendicularLine.xCoefficient == 0):
                         endPoint.x = hyperPlaneDown[len(hyperPlaneDown)-1].end.x + (endPoint.x - startPoint.x)
                     else:
                         endPoint.x = hyperPlaneDown[len(hyperPlaneDown)-1].end.x + (endPoint.x - startPoint.x)
                         endPoint.y = getYbyX(perpendicularLine, hyperPlaneDown[len(hyperPlaneDown)-1].end.x + (endPoint.x - startPoint.x))
-                elif(hyperPlaneDown[len(hyperPlaneDown)-1].end.y > self.canvasHeight and endPoint.y > startPoint.y or hyperPlaneDown[len(hyperPlaneDown)-1].end.y < 0 and endPoint.y < startPoint.y):
+                elif(hyperPlaneDown[len(hyperPlaneDown)-1].end.y >= self.canvasHeight and endPoint.y > startPoint.y or hyperPlaneDown[len(hyperPlaneDown)-1].end.y <= 0 and endPoint.y < startPoint.y):
                     if(perpendicularLine.yCoefficient == 0):
                         endPoint.y = hyperPlaneDown[len(hyperPlaneDown)-1].end.y + (endPoint.y - startPoint.y)
                     else:
@@ -620,37 +1730,38 @@ class VoronoiGraph():
         # create hyperplane edge
         currentEdgeDown = Edge(start=startPoint, end=endPoint, startInfinity=startPointInfinity, endInfinity=endPointInfinity, line=perpendicularLine, face=rightFace)
         currentEdgeUp = Edge(start=endPoint, end=startPoint, startInfinity=endPointInfinity, endInfinity=startPointInfinity, line=perpendicularLine, face=leftFace)
-        startPoint.edges.append(currentEdgeDown)
-        endPoint.edges.append(currentEdgeUp)
+        startPoint.edges[currentEdgeDown] = None
+        endPoint.edges[currentEdgeUp] = None
         currentEdgeDown.twinEdge = currentEdgeUp
         currentEdgeUp.twinEdge = currentEdgeDown
         hyperPlaneDown.append(currentEdgeDown)
         hyperPlaneUp.append(currentEdgeUp)
+        walkableList.append(len(leftFace.edges) >= WALK_MIN_EDGES or len(rightFace.edges) >= WALK_MIN_EDGES)
 
         # Intersected Point outside of canvas. If other side of edge is infinity move the other side of point far than the intersected point
         for i in range(len(modifiedEdgeList)):
             for j in range(len(modifiedEdgeList[i])):
                 # left voronoi graph
                 if(modifiedEdgeBelongList[i][j] == 0):
-                    if(modifiedEdgeList[i][j].startInfinity == True and not isInDistrict(self.canvasWidth, self.canvasHeight, hyperPlaneDown[i].end.x, hyperPlaneDown[i].end.y)):
-                        if(hyperPlaneDown[i].end.x > self.canvasWidth and modifiedEdgeList[i][j].start.x > modifiedEdgeList[i][j].end.x or hyperPlaneDown[i].end.x < 0 and modifiedEdgeList[i][j].start.x < modifiedEdgeList[i][j].end.x):
+                    if(modifiedEdgeList[i][j].startInfinity == True and not isInsideDistrict(self.canvasWidth, self.canvasHeight, hyperPlaneDown[i].end.x, hyperPlaneDown[i].end.y)):
+                        if(hyperPlaneDown[i].end.x >= self.canvasWidth and modifiedEdgeList[i][j].start.x > modifiedEdgeList[i][j].end.x or hyperPlaneDown[i].end.x <= 0 and modifiedEdgeList[i][j].start.x < modifiedEdgeList[i][j].end.x):
                             xCoordinate = hyperPlaneDown[i].end.x - (modifiedEdgeList[i][j].end.x - modifiedEdgeList[i][j].start.x)
                             yCoordinate = getYbyX(modifiedEdgeList[i][j].line, xCoordinate)
                             self.changeEdgePoint(modifiedEdgeList[i][j], 'start', xCoordinate, yCoordinate)
 
-                        elif(hyperPlaneDown[i].end.y > self.canvasHeight and modifiedEdgeList[i][j].start.y > modifiedEdgeList[i][j].end.y or hyperPlaneDown[i].end.y < 0 and modifiedEdgeList[i][j].start.y < modifiedEdgeList[i][j].end.y):
+                        elif(hyperPlaneDown[i].end.y >= self.canvasHeight and modifiedEdgeList[i][j].start.y > modifiedEdgeList[i][j].end.y or hyperPlaneDown[i].end.y <= 0 and modifiedEdgeList[i][j].start.y < modifiedEdgeList[i][j].end.y):
                             yCoordinate = hyperPlaneDown[i].end.y - (modifiedEdgeList[i][j].end.y - modifiedEdgeList[i][j].start.y)
                             xCoordinate = getXbyY(modifiedEdgeList[i][j].line, yCoordinate)
                             self.changeEdgePoint(modifiedEdgeList[i][j], 'start', xCoordinate, yCoordinate)
                 # right voronoi graph
                 elif(modifiedEdgeBelongList[i][j] == 1):                    
-                    if(modifiedEdgeList[i][j].endInfinity == True and not isInDistrict(self.canvasWidth, self.canvasHeight, hyperPlaneDown[i].end.x, hyperPlaneDown[i].end.y)):
-                        if(hyperPlaneDown[i].end.x > self.canvasWidth and modifiedEdgeList[i][j].end.x > modifiedEdgeList[i][j].start.x or hyperPlaneDown[i].end.x < 0 and modifiedEdgeList[i][j].end.x < modifiedEdgeList[i][j].start.x):
+                    if(modifiedEdgeList[i][j].endInfinity == True and not isInsideDistrict(self.canvasWidth, self.canvasHeight, hyperPlaneDown[i].end.x, hyperPlaneDown[i].end.y)):
+                        if(hyperPlaneDown[i].end.x >= self.canvasWidth and modifiedEdgeList[i][j].end.x > modifiedEdgeList[i][j].start.x or hyperPlaneDown[i].end.x <= 0 and modifiedEdgeList[i][j].end.x < modifiedEdgeList[i][j].start.x):
                             xCoordinate = hyperPlaneDown[i].end.x + (modifiedEdgeList[i][j].end.x - modifiedEdgeList[i][j].start.x)
                             yCoordinate = getYbyX(modifiedEdgeList[i][j].line, xCoordinate)
                             self.changeEdgePoint(modifiedEdgeList[i][j], 'end', xCoordinate, yCoordinate)
 
-                        elif(hyperPlaneDown[i].end.y > self.canvasHeight and modifiedEdgeList[i][j].end.y > modifiedEdgeList[i][j].start.y or hyperPlaneDown[i].end.y < 0 and modifiedEdgeList[i][j].end.y < modifiedEdgeList[i][j].start.y):
+                        elif(hyperPlaneDown[i].end.y >= self.canvasHeight and modifiedEdgeList[i][j].end.y > modifiedEdgeList[i][j].start.y or hyperPlaneDown[i].end.y <= 0 and modifiedEdgeList[i][j].end.y < modifiedEdgeList[i][j].start.y):
                             yCoordinate = hyperPlaneDown[i].end.y + (modifiedEdgeList[i][j].end.y - modifiedEdgeList[i][j].start.y)
                             xCoordinate = getXbyY(modifiedEdgeList[i][j].line, yCoordinate)
                             self.changeEdgePoint(modifiedEdgeList[i][j], 'end', xCoordinate, yCoordinate)
@@ -663,48 +1774,52 @@ class VoronoiGraph():
                 if(modifiedEdgeBelongList[i][j] == 0):
                     # based on the trimming of extended line, removed the line that connect to the trim out line
                     for edge in modifiedEdgeList[i][j].face.edges:
-                        if(edge != modifiedEdgeList[i][j] and edge.start == modifiedEdgeList[i][j].end and crossProduct(hyperPlaneDown[i].end, hyperPlaneDown[i+1].end, edge.end) < 0):
+                        if(not edge.removed and edge != modifiedEdgeList[i][j] and edge.start == modifiedEdgeList[i][j].end and isBeyondHyperPlane(hyperPlaneDown[i], hyperPlaneDown[i+1], edge.end, -1)):
                             self.removeEdge(edge)
                     for edge in modifiedEdgeList[i][j].twinEdge.face.edges:
-                        if(edge != modifiedEdgeList[i][j].twinEdge and edge.end == modifiedEdgeList[i][j].twinEdge.start and crossProduct(hyperPlaneDown[i].end, hyperPlaneDown[i+1].end, edge.start) < 0):
+                        if(not edge.removed and edge != modifiedEdgeList[i][j].twinEdge and edge.end == modifiedEdgeList[i][j].twinEdge.start and isBeyondHyperPlane(hyperPlaneDown[i], hyperPlaneDown[i+1], edge.start, -1)):
                             self.removeEdge(edge)
                     # trim out the extended line based on the intersected point
                     if(modifiedEdgeList[i][j].start == hyperPlaneDown[i].end):
                         self.removeEdge(modifiedEdgeList[i][j])
                     else:
-                        modifiedEdgeList[i][j].end = hyperPlaneDown[i].end
-                        modifiedEdgeList[i][j].endInfinity = False
-                        modifiedEdgeList[i][j].twinEdge.start = hyperPlaneDown[i].end
-                        modifiedEdgeList[i][j].twinEdge.startInfinity = False
+                        # the end point left behind no longer counts the edge for the unconnected lines below
+                        self.setEdgeEnd(modifiedEdgeList[i][j], False, hyperPlaneDown[i].end)
 
                 # right voronoi graph
                 elif(modifiedEdgeBelongList[i][j] == 1):
                     # based on the trimming of extended line, removed the line that connect to the trim out line
                     for edge in modifiedEdgeList[i][j].face.edges:
-                        if(edge != modifiedEdgeList[i][j] and edge.end == modifiedEdgeList[i][j].start and crossProduct(hyperPlaneDown[i].end, hyperPlaneDown[i+1].end, edge.start) > 0):
+                        if(not edge.removed and edge != modifiedEdgeList[i][j] and edge.end == modifiedEdgeList[i][j].start and isBeyondHyperPlane(hyperPlaneDown[i], hyperPlaneDown[i+1], edge.start, 1)):
                             self.removeEdge(edge)
                     for edge in modifiedEdgeList[i][j].twinEdge.face.edges:
-                        if(edge != modifiedEdgeList[i][j].twinEdge and edge.start == modifiedEdgeList[i][j].twinEdge.end and crossProduct(hyperPlaneDown[i].end, hyperPlaneDown[i+1].end, edge.end) > 0):
+                        if(not edge.removed and edge != modifiedEdgeList[i][j].twinEdge and edge.start == modifiedEdgeList[i][j].twinEdge.end and isBeyondHyperPlane(hyperPlaneDown[i], hyperPlaneDown[i+1], edge.end, 1)):
                             self.removeEdge(edge)
                     # trim out the extended line based on the intersected point
                     if(modifiedEdgeList[i][j].end == hyperPlaneDown[i].end):
                         self.removeEdge(modifiedEdgeList[i][j])
                     else:
-                        modifiedEdgeList[i][j].start = hyperPlaneDown[i].end
-                        modifiedEdgeList[i][j].startInfinity = False
-                        modifiedEdgeList[i][j].twinEdge.end = hyperPlaneDown[i].end
-                        modifiedEdgeList[i][j].twinEdge.endInfinity = False
+                        self.setEdgeEnd(modifiedEdgeList[i][j], True, hyperPlaneDown[i].end)
             
-        # delete the unconnected line
-        for face in leftVoronoiGraph.faces:
-            for edge in face.edges:
-                if((edge.startInfinity == False and len(edge.start.edges) == 1) or (edge.endInfinity == False and len(edge.end.edges) == 1)):
-                    self.removeEdge(edge)
-
-        for face in rightVoronoiGraph.faces:
-            for edge in face.edges:
-                if((edge.startInfinity == False and len(edge.start.edges) == 1) or (edge.endInfinity == False and len(edge.end.edges) == 1)):
-                    self.removeEdge(edge)
+        # delete the unconnected line, only the edges of the faces on the hyperplane and the edges around the removed
+        # edges can be one
+        edgeStack = []
+        hyperPlaneFaces = set(edge.face for edge in hyperPlaneDown) | set(edge.face for edge in hyperPlaneUp)
+        for face in hyperPlaneFaces:
+            edgeStack.extend(face.edges)
+        for edge in self.removedEdges:
+            edgeStack.extend(getEdgesAroundEdge(edge))
+        while(len(edgeStack) > 0):
+            edge = edgeStack.pop()
+            if(not edge.removed and ((edge.startInfinity == False and len(edge.start.edges) == 1) or (edge.endInfinity == False and len(edge.end.edges) == 1))):
+                self.removeEdge(edge)
+                # removing the edge may leave another edge around its end points unconnected
+                edgeStack.extend(getEdgesAroundEdge(edge))
+
+        # drop the removed edges from the faces they were in
+        removedEdgeFaces = set(edge.face for edge in self.removedEdges) | set(edge.twinEdge.face for edge in self.removedEdges)
+        for face in removedEdgeFaces:
+            face.edges = [edge for edge in face.edges if not edge.removed]
 
         hyperPlaneUp.reverse()
         for edge in hyperPlaneUp:
@@ -712,27 +1827,377 @@ class VoronoiGraph():
         for edge in hyperPlaneDown:
             edge.face.edges.insert(0, edge)
 
-        self.convexHull = convexHull
-        self.faces.extend(leftVoronoiGraph.faces)
-        self.faces.extend(rightVoronoiGraph.faces)
+        # only the boundary around the voronoi points of the hyperplane is changed by the merge. the links are only used
+        # by the walk, so they are kept for the faces large enough to be walked and the other faces are linked by
+        # linkFace when they grow
+        for i in range(len(hyperPlaneDown) - 1):
+            if(walkableList[i] or walkableList[i+1]):
+                self.linkVertex(hyperPlaneDown[i].end)
+
+        if(self.recordSteps):
+            recordStartTime = time.perf_counter() if stats != None else 0
+            self.recordMerge(leftChild, rightChild, hyperPlaneDown, modifiedEdgeList, [upperTangent, lowerTangent])
+            if(stats != None):
+                stats.recordSeconds = time.perf_counter() - recordStartTime
+        self.removedEdges = []
+
+        if(stats != None):
+            stats.seconds = time.perf_counter() - startTime
+            stats.hyperPlaneEdges = len(hyperPlaneDown)
+            stats.cleanupFaces = len(hyperPlaneFaces) + len(removedEdgeFaces)
+            self.profile.merges.append(stats)
+            self.mergeStats = None
+        return convexHull, extremes
+
+    def recordMerge(self, leftChild: 'MergeRecord | VoronoiRecord', rightChild: 'MergeRecord | VoronoiRecord', hyperPlane: list[Edge], modifiedEdgeList: list[list[Edge]], tangent: list[Edge]):
+        # only keep the edges changed by this merge
+        changedEdges = {}
+        for edge in self.removedEdges:
+            changedEdges[getEdgeKey(edge)] = None
+        for edges in modifiedEdgeList:
+            for edge in edges:
+                edgeKey = getEdgeKey(edge)
+                if(edgeKey not in changedEdges):
+                    changedEdges[edgeKey] = (edgeKey.start.x, edgeKey.start.y, edgeKey.end.x, edgeKey.end.y)
+        for edge in hyperPlane:
+            edgeKey = getEdgeKey(edge)
+            changedEdges[edgeKey] = (edgeKey.start.x, edgeKey.start.y, edgeKey.end.x, edgeKey.end.y)
+
+        # merge records are in the order of the merge, children first
+        self.mergeRecords.append(MergeRecord(leftChild, rightChild, hyperPlane, tangent, changedEdges, self.recordCache))
+
+    def getEdges(self) -> list[Edge]:
+        """
+        every line of the graph once, sorted by the start point and then the end point
+        """
+        # the data structure use directed edge to form a polygon(counterclockwise)
+        # In order to print out the line without duplicate, we filter out the duplicate line
+        edge_set = set()
+        for face in self.faces:
+            for edge in face.edges:
+                if edge in edge_set or edge.twinEdge in edge_set:
+                    continue
+                if(edge.start.x < edge.end.x or edge.start.x == edge.end.x and edge.start.y <= edge.end.y):
+                    edge_set.add(edge)
+                else:
+                    edge_set.add(edge.twinEdge)
+                    
+        edge_list = list(edge_set)
+        edge_list.sort(key= lambda edge: (edge.start.x, edge.start.y, edge.end.x, edge.end.y))
+        return edge_list
+
+    def findNearestFace(self, point: Point, startFace: Face) -> Face:
+        """
+        walk from startFace to the closest neighbor until no neighbor is closer to the point. the neighbors of the faces
+        form the delaunay triangulation, so the walk stops at the face containing the point
+        """
+        face = startFace
+        faceDistance = (face.point.x - point.x) ** 2 + (face.point.y - point.y) ** 2
+        while(True):
+            nearestFace = face
+            for edge in face.edges:
+                neighbor = edge.twinEdge.face
+                neighborDistance = (neighbor.point.x - point.x) ** 2 + (neighbor.point.y - point.y) ** 2
+                if(neighborDistance < faceDistance):
+                    nearestFace = neighbor
+                    faceDistance = neighborDistance
+            if(nearestFace == face):
+                return face
+            face = nearestFace
+
+    def insertSite(self, point: Point) -> tuple[list[tuple], list[Edge]]:
+        """
+        add a site without rebuilding the graph(green and sibson). the voronoi points closer to the new site are removed,
+        the edges crossing the boundary of the new face are trimmed at it and the boundary is made of one edge in each
+        face next to the new face, the other faces are not touched. the merge records are dropped
+        :return: (sort key and edge of getEdges for each edge changed or removed, taken before the change, edges of
+        getEdges for each edge changed or added) or None if the site is already in the graph
+        """
+        index = bisect.bisect_left(self.faces, (point.x, point.y), key=lambda face: (face.point.x, face.point.y))
+        if(index < len(self.faces) and self.faces[index].point.x == point.x and self.faces[index].point.y == point.y):
+            return None
+        newFace = Face(point)
+        if(len(self.faces) == 0):
+            self.faces.append(newFace)
+            self.siteFaces[point] = newFace
+            self.convexHull = [point]
+            return [], []
+        nearestFace = self.findNearestFace(point, self.faces[min(index, len(self.faces)-1)])
+
+        # the boundary of the new face crosses each neighbor face along the bisector of the two sites, the faces
+        # limiting its ends are the next neighbors around the new face. a new face between two parallel lines has no
+        # face limiting them, so the faces across the parallel edges are searched too. only the sites are used, so the
+        # voronoi points are never tested against the new site
+        boundaries = {}
+        faceStack = [nearestFace]
+        while(len(faceStack) > 0):
+            face = faceStack.pop()
+            if(face in boundaries):
+                continue
+            boundaries[face] = getBisectorInFace(point, face)
+            if(boundaries[face] != None):
+                faceStack.extend(boundaries[face][1] + boundaries[face][3] + boundaries[face][4])
+        neighborFaces = {face: boundary for face, boundary in boundaries.items() if boundary != None}
+
+        # the voronoi point shared by two neighbors, the center of the circle through their sites and the new site
+        voronoiPoints: dict[frozenset, Vertex] = {}
+        ends = {}
+        for face, (low, lowFaces, high, highFaces, parallelFaces) in neighborFaces.items():
+            directionX = face.point.y - point.y
+            directionY = point.x - face.point.x
+            midPoint = getMidPoint(point, face.point)
+            faceEnds = []
+            for t, limitFaces in ((low, lowFaces), (high, highFaces)):
+                if(t == None):
+                    faceEnds.append(None)
+                    continue
+                # more than one face only when the new site is on the circle of a voronoi point
+                limitFace = next((limitFace for limitFace in limitFaces if limitFace in neighborFaces), limitFaces[0])
+                key = frozenset((face, limitFace))
+                if(key not in voronoiPoints):
+                    voronoiPoints[key] = Vertex(midPoint.x + t * directionX, midPoint.y + t * directionY)
+                faceEnds.append(voronoiPoints[key])
+            ends[face] = faceEnds
+
+        # the edges between two neighbors are trimmed at their voronoi point, the others are removed or kept whole
+        removedOutputEdges = []
+        trimmedEdges = []
+        checkedEdges = set()
+        for face in neighborFaces:
+            for edge in list(face.edges):
+                acrossFace = edge.twinEdge.face
+                if(edge.removed or acrossFace not in neighborFaces or edge in checkedEdges):
+                    continue
+                checkedEdges.add(edge.twinEdge)
+                voronoiPoint = voronoiPoints.pop(frozenset((face, acrossFace)), None)
+                if(voronoiPoint == None):
+                    # the edge is not crossed, so it is removed if any point of it is closer to the new site
+                    midPoint = getMidPoint(edge.start, edge.end)
+                    if(distance(midPoint, point) >= distance(midPoint, face.point)):
+                        continue
+                outputEdge = getOutputEdge(edge)
+                removedOutputEdges.append((getEdgeSortKey(outputEdge), outputEdge))
+                if(voronoiPoint == None):
+                    self.removeEdge(edge)
+                    continue
+                # the edge goes in this direction, its end is closer to the new site if the new site is ahead of the face
+                directionX = acrossFace.point.y - face.point.y
+                directionY = face.point.x - acrossFace.point.x
+                # the placeholder of an infinite end left by the merge is not always on the line, so it is placed again
+                if(directionX * (face.point.x - point.x) + directionY * (face.point.y - point.y) < 0):
+                    self.setEdgeEnd(edge, False, voronoiPoint)
+                    if(edge.startInfinity):
+                        self.setEdgeEnd(edge, True, getFarPoint(self.canvasWidth, self.canvasHeight, voronoiPoint, -directionX, -directionY), True)
+                else:
+                    self.setEdgeEnd(edge, True, voronoiPoint)
+                    if(edge.endInfinity):
+                        self.setEdgeEnd(edge, False, getFarPoint(self.canvasWidth, self.canvasHeight, voronoiPoint, directionX, directionY), True)
+                trimmedEdges.append(edge)
+
+        # the edge of the new face in each neighbor goes in this direction with the new face on the left
+        addedEdges = []
+        newVoronoiPoints = set()
+        for face, (start, end) in ends.items():
+            directionX = face.point.y - point.y
+            directionY = point.x - face.point.x
+            startInfinity = start == None
+            endInfinity = end == None
+            if(startInfinity and endInfinity):
+                # the sites are collinear, the new face is between 2 parallel lines
+                midPoint = getMidPoint(point, face.point)
+                start = getFarPoint(self.canvasWidth, self.canvasHeight, midPoint, -directionX, -directionY)
+                end = getFarPoint(self.canvasWidth, self.canvasHeight, midPoint, directionX, directionY)
+            elif(startInfinity):
+                start = getFarPoint(self.canvasWidth, self.canvasHeight, end, -directionX, -directionY)
+            elif(endInfinity):
+                end = getFarPoint(self.canvasWidth, self.canvasHeight, start, directionX, directionY)
+            line = getBisector(point, face.point)
+            edge = Edge(start=start, end=end, startInfinity=startInfinity, endInfinity=endInfinity, line=line, face=newFace)
+            twinEdge = Edge(start=end, end=start, startInfinity=endInfinity, endInfinity=startInfinity, line=line, face=face)
+            edge.twinEdge = twinEdge
+            twinEdge.twinEdge = edge
+            start.edges[edge] = None
+            end.edges[twinEdge] = None
+            newFace.edges.append(edge)
+            face.edges.append(twinEdge)
+            addedEdges.append(edge)
+            newVoronoiPoints.update(vertex for vertex, infinity in ((start, startInfinity), (end, endInfinity)) if not infinity)
+
+        for face in set(edge.face for edge in self.removedEdges) | set(edge.twinEdge.face for edge in self.removedEdges):
+            face.edges = [edge for edge in face.edges if not edge.removed]
+        self.removedEdges = []
+        for voronoiPoint in newVoronoiPoints:
+            self.linkVertex(voronoiPoint)
+
+        self.faces.insert(index, newFace)
+        self.siteFaces[point] = newFace
+        # the new site is on the convex hull when its face is unbounded
+        if(any(edge.startInfinity or edge.endInfinity for edge in newFace.edges)):
+            self.convexHull = getConvexHull(self.convexHull + [point])
+        self.mergeRecords = []
+        self.recordSteps = False
+        self.recordCache = None
+        return removedOutputEdges, [getOutputEdge(edge) for edge in trimmedEdges + addedEdges]
+
+    def removeSite(self, point: Point) -> tuple[list[tuple], list[Edge]]:
+        """
+        remove a site without rebuilding the graph, the reverse of insertSite. inside the removed face the diagram is
+        the voronoi diagram of its neighbors, which is built on its own graph. the edges between neighbors meeting at a
+        voronoi point of the face are extended into it and the edges of the local diagram inside it are added
+        :return: the same as insertSite, or None if the site is not in the graph
+        """
+        index = bisect.bisect_left(self.faces, (point.x, point.y), key=lambda face: (face.point.x, face.point.y))
+        if(index == len(self.faces) or self.faces[index].point.x != point.x or self.faces[index].point.y != point.y):
+            return None
+        removedFace = self.faces[index]
+        point = removedFace.point
+        # the neighbors limiting the edge of the removed face in a neighbor meet it at a voronoi point of the face.
+        # a face meeting it only at a voronoi point on the circle of more than 3 sites shares no edge with it, but
+        # also gets a part of it
+        neighborFaces = {}
+        meetingFaces = set()
+        for edge in removedFace.edges:
+            face = edge.twinEdge.face
+            neighborFaces[face] = None
+            boundary = getBisectorInFace(point, face)
+            if(boundary != None):
+                for limitFace in boundary[1] + boundary[3]:
+                    neighborFaces[limitFace] = None
+                    meetingFaces.add(frozenset((face, limitFace)))
+
+        localGraph = VoronoiGraph(self.canvasWidth, self.canvasHeight)
+        for face in neighborFaces:
+            localGraph.insertSite(face.point)
+        globalFaces = {localFace: self.siteFaces[localFace.point] for localFace in localGraph.faces}
+
+        removedOutputEdges = []
+        for edge in removedFace.edges:
+            outputEdge = getOutputEdge(edge)
+            removedOutputEdges.append((getEdgeSortKey(outputEdge), outputEdge))
+            self.removeEdge(edge)
+
+        newVertices: dict[Vertex, Vertex] = {}
+        getVertex = lambda vertex: newVertices.setdefault(vertex, Vertex(vertex.x, vertex.y))
+        extendedEdges = []
+        addedEdges = []
+        checkedEdges = set()
+        for localFace in localGraph.faces:
+            for localEdge in localFace.edges:
+                if(localEdge in checkedEdges):
+                    continue
+                checkedEdges.add(localEdge.twinEdge)
+                face = globalFaces[localFace]
+                acrossFace = globalFaces[localEdge.twinEdge.face]
+                edge = next((edge for edge in face.edges if edge.twinEdge.face == acrossFace and not edge.removed), None)
+                if(edge == None or frozenset((face, acrossFace)) not in meetingFaces):
+                    # the edge is new, it is inside the removed face if any point of it is
+                    midPoint = getMidPoint(localEdge.start, localEdge.end)
+                    if(distance(midPoint, point) >= distance(midPoint, face.point)):
+                        continue
+                    if(edge != None):
+                        # only an edge left outside the canvas by the merge can be there
+                        outputEdge = getOutputEdge(edge)
+                        removedOutputEdges.append((getEdgeSortKey(outputEdge), outputEdge))
+                        self.removeEdge(edge)
+                    start = getVertex(localEdge.start)
+                    end = getVertex(localEdge.end)
+                    edge = Edge(start=start, end=end, startInfinity=localEdge.startInfinity, endInfinity=localEdge.endInfinity, line=localEdge.line, face=face)
+                    twinEdge = Edge(start=end, end=start, startInfinity=localEdge.endInfinity, endInfinity=localEdge.startInfinity, line=localEdge.line, face=acrossFace)
+                    edge.twinEdge = twinEdge
+                    twinEdge.twinEdge = edge
+                    start.edges[edge] = None
+                    end.edges[twinEdge] = None
+                    face.edges.append(edge)
+                    acrossFace.edges.append(twinEdge)
+                    addedEdges.append(edge)
+                    continue
+
+                outputEdge = getOutputEdge(edge)
+                removedOutputEdges.append((getEdgeSortKey(outputEdge), outputEdge))
+                # both edges go in this direction, the end is on the side of the removed face if the site is ahead
+                directionX = acrossFace.point.y - face.point.y
+                directionY = face.point.x - acrossFace.point.x
+                # an infinite end on the other side is taken from the local diagram like in insertSite
+                if(directionX * (face.point.x - point.x) + directionY * (face.point.y - point.y) < 0):
+                    self.setEdgeEnd(edge, False, getVertex(localEdge.end), localEdge.endInfinity)
+                    if(edge.startInfinity):
+                        self.setEdgeEnd(edge, True, getVertex(localEdge.start), localEdge.startInfinity)
+                else:
+                    self.setEdgeEnd(edge, True, getVertex(localEdge.start), localEdge.startInfinity)
+                    if(edge.endInfinity):
+                        self.setEdgeEnd(edge, False, getVertex(localEdge.end), localEdge.endInfinity)
+                extendedEdges.append(edge)
+
+        for face in set(edge.face for edge in self.removedEdges) | set(edge.twinEdge.face for edge in self.removedEdges):
+            face.edges = [edge for edge in face.edges if not edge.removed]
+        self.removedEdges = []
+        for vertex in newVertices.values():
+            self.linkVertex(vertex)
+
+        del self.faces[index]
+        del self.siteFaces[point]
+        if(point in self.convexHull):
+            self.convexHull = getConvexHull([hullPoint for hullPoint in self.convexHull if hullPoint != point] + [face.point for face in neighborFaces])
+        self.mergeRecords = []
+        self.recordSteps = False
+        self.recordCache = None
+        return removedOutputEdges, [getOutputEdge(edge) for edge in extendedEdges + addedEdges]
 
-        newVoronoiRecord = VoronoiRecord(self)
-        tangent = [upperTangent, lowerTangent]
-        mergeRecord = MergeRecord(leftVoronoiRecord, rightVoronoiRecord, hyperPlaneDown, newVoronoiRecord, tangent)
-        self.mergeRecords.extend(leftVoronoiGraph.mergeRecords)
-        self.mergeRecords.extend(rightVoronoiGraph.mergeRecords)
-        self.mergeRecords.append(mergeRecord)
+    def setEdgeEnd(self, edge: Edge, atStart: bool, vertex: Vertex, infinity: bool = False):
+        """
+        move one end of the twin edges to the voronoi point
+        :param atStart: move the start of the edge(the end of its twin edge), else the end
+        """
+        if(not atStart):
+            edge = edge.twinEdge
+        edge.start.edges.pop(edge, None)
+        edge.start = vertex
+        edge.startInfinity = infinity
+        edge.twinEdge.end = vertex
+        edge.twinEdge.endInfinity = infinity
+        vertex.edges[edge] = None
+
+    def linkVertex(self, point: Vertex):
+        """
+        link nextEdge and prevEdge of the edges around the voronoi point
+        """
+        # point.edges may still hold the edges trimmed away from the point and the edges removed from their face
+        outEdges = []
+        # the edge ending at the point in each face
+        inEdges = {}
+        for edge in point.edges:
+            if(edge.start == point and not edge.removed):
+                outEdges.append(edge)
+                inEdges[edge.twinEdge.face] = edge.twinEdge
+        for edge in outEdges:
+            inEdge = inEdges.get(edge.face)
+            if(inEdge == None or edge.prevEdge == inEdge):
+                continue
+            # the edges linked before the trimming are no longer connected to them
+            if(edge.prevEdge != None and edge.prevEdge.nextEdge == edge):
+                edge.prevEdge.nextEdge = None
+            if(inEdge.nextEdge != None and inEdge.nextEdge.prevEdge == inEdge):
+                inEdge.nextEdge.prevEdge = None
+            edge.prevEdge = inEdge
+            inEdge.nextEdge = edge
 
     def removeEdge(self, edge: Edge):
+        """
+        mark the twin edges as removed in constant time, they are dropped from face.edges at the end of the merge
+        """
+        if(self.mergeStats != None):
+            self.mergeStats.removeEdgeCalls = self.mergeStats.removeEdgeCalls + 1
+        if(edge.removed):
+            return
+        self.removedEdges.append(edge)
         twinEdge = edge.twinEdge
-        if(edge in edge.face.edges):
-            edge.face.edges.remove(edge)
-        if(twinEdge in twinEdge.face.edges):
-            twinEdge.face.edges.remove(twinEdge)
-        if(edge in edge.start.edges):
-            edge.start.edges.remove(edge)
-        if(twinEdge in twinEdge.start.edges):
-            twinEdge.start.edges.remove(twinEdge)
+        for halfEdge in (edge, twinEdge):
+            halfEdge.removed = True
+            if(halfEdge.prevEdge != None and halfEdge.prevEdge.nextEdge == halfEdge):
+                halfEdge.prevEdge.nextEdge = None
+            if(halfEdge.nextEdge != None and halfEdge.nextEdge.prevEdge == halfEdge):
+                halfEdge.nextEdge.prevEdge = None
+            halfEdge.start.edges.pop(halfEdge, None)
 
     def changeEdgePoint(self, edge:Edge, start_end, x, y):
         """
@@ -752,6 +2217,192 @@ class VoronoiGraph():
             edge.twinEdge.start.x = x
             edge.twinEdge.start.y = y
 
+    def toArrayGraph(self) -> 'ArrayVoronoiGraph':
+        """
+        pack the faces, edges and voronoi points into an ArrayVoronoiGraph, the graph itself is kept.
+        it is an export step after the build, the build always uses the objects
+        """
+        arrayGraph = ArrayVoronoiGraph(self.canvasWidth, self.canvasHeight)
+        faceIndex = {}
+        for face in self.faces:
+            faceIndex[face] = len(faceIndex)
+            arrayGraph.siteX.append(face.point.x)
+            arrayGraph.siteY.append(face.point.y)
+        siteIndex = {face.point: index for face, index in faceIndex.items()}
+        for point in self.convexHull:
+            arrayGraph.convexHull.append(siteIndex[point])
+
+        # the half-edges of the faces are numbered first, in the order of the faces
+        halfEdges = []
+        halfEdgeIndex = {}
+        for face in self.faces:
+            for edge in face.edges:
+                halfEdgeIndex[edge] = len(halfEdges)
+                halfEdges.append(edge)
+            arrayGraph.faceEdgeOffset.append(len(halfEdges))
+        # the twin of an unconnected edge may not be in any face
+        for i in range(len(halfEdges)):
+            if(halfEdges[i].twinEdge not in halfEdgeIndex):
+                halfEdgeIndex[halfEdges[i].twinEdge] = len(halfEdges)
+                halfEdges.append(halfEdges[i].twinEdge)
+
+        # the links are only kept for the faces large enough to be walked(see linkFace), so the next half-edge in the face
+        # is found from the end points
+        nextEdges = {}
+        for face in self.faces:
+            edgeByStart = {edge.start: edge for edge in face.edges if not edge.startInfinity}
+            for edge in face.edges:
+                if(not edge.endInfinity and edge.end in edgeByStart):
+                    nextEdges[edge] = edgeByStart[edge.end]
+
+        vertexIndex = {}
+        for edge in halfEdges:
+            if(edge.start not in vertexIndex):
+                vertexIndex[edge.start] = len(vertexIndex)
+                arrayGraph.vertexX.append(edge.start.x)
+                arrayGraph.vertexY.append(edge.start.y)
+            arrayGraph.halfEdgeOrigin.append(vertexIndex[edge.start])
+            arrayGraph.halfEdgeOriginInfinity.append(edge.startInfinity)
+            arrayGraph.halfEdgeTwin.append(halfEdgeIndex[edge.twinEdge])
+            arrayGraph.halfEdgeNext.append(halfEdgeIndex[nextEdges[edge]] if edge in nextEdges else -1)
+            arrayGraph.halfEdgeFace.append(faceIndex[edge.face])
+        return arrayGraph
+
+
+# the fewest sites per worker process of createVoronoiGraph, smaller diagrams cost more to send than to build
+SLAB_MIN_SITES = 2000
+# the leaves of fewer points are not worth the arrays of getLeafBisectors
+BATCH_MIN_SITES = 256
+# seconds between the progress calls while waiting for a worker process, so a cancel does not wait for the range
+SLAB_POLL_INTERVAL = 0.1
+
+def getAvailableCpus() -> int:
+    """
+    number of cpus this process may run on, which may be fewer than os.cpu_count in a container
+    """
+    if(hasattr(os, 'sched_getaffinity')):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def getSlabRanges(count: int, workers: int) -> list[tuple[int, int]]:
+    """
+    the index ranges of the first level of createVoronoiGraph with at least as many ranges as the workers, from left to right
+    """
+    ranges = [(0, count)]
+    while(len(ranges) < workers):
+        ranges = [half for low, high in ranges for half in ((low, (low + high) // 2), ((low + high) // 2, high))]
+    return ranges
+
+def buildSlabGraph(siteX: array, siteY: array, canvasWidth: int, canvasHeight: int) -> 'ArrayVoronoiGraph':
+    """
+    build the voronoi graph of the sorted sites in a worker process of createVoronoiGraph, packed to be sent back
+    """
+    voronoiGraph = VoronoiGraph(canvasWidth, canvasHeight)
+    voronoiGraph.createVoronoiGraph([Point(x, y) for x, y in zip(siteX, siteY)])
+    return voronoiGraph.toArrayGraph()
+
+
+class ArrayVoronoiGraph():
+    """
+    export format of a built VoronoiGraph(toArrayGraph) with the half-edges in parallel arrays, used by the .vor files and
+    to send the ranges of the worker processes back. the build itself always uses the objects, so the arrays do not lower
+    the peak memory of a build, they only make the copy kept or sent small.
+    half-edge i starts from vertex halfEdgeOrigin[i], ends at the origin of halfEdgeTwin[i] and is on the boundary of
+    face halfEdgeFace[i], the half-edges of face f are faceEdgeOffset[f] to faceEdgeOffset[f+1]-1,
+    face f is the face of site f. -1 is used for no half-edge
+    """
+    canvasWidth: int
+    canvasHeight: int
+    siteX: array
+    siteY: array
+    convexHull: array
+    faceEdgeOffset: array
+    vertexX: array
+    vertexY: array
+    halfEdgeOrigin: array
+    halfEdgeOriginInfinity: array
+    halfEdgeTwin: array
+    halfEdgeNext: array
+    halfEdgeFace: array
+
+    COLUMNS = ('siteX', 'siteY', 'convexHull', 'faceEdgeOffset', 'vertexX', 'vertexY', 'halfEdgeOrigin', 'halfEdgeOriginInfinity', 'halfEdgeTwin', 'halfEdgeNext', 'halfEdgeFace')
+
+    def __init__(self, canvasWidth, canvasHeight):
+        self.canvasWidth = canvasWidth
+        self.canvasHeight = canvasHeight
+        self.siteX = array('d')
+        self.siteY = array('d')
+        # site index of the convex hull(counterclockwise)
+        self.convexHull = array('q')
+        self.faceEdgeOffset = array('q', [0])
+        self.vertexX = array('d')
+        self.vertexY = array('d')
+        self.halfEdgeOrigin = array('q')
+        # the origin is only a point far away on the infinite side of the half-edge
+        self.halfEdgeOriginInfinity = array('b')
+        self.halfEdgeTwin = array('q')
+        self.halfEdgeNext = array('q')
+        self.halfEdgeFace = array('q')
+
+    def getEdges(self) -> list[Edge]:
+        """
+        the same edges as VoronoiGraph.getEdges
+        """
+        vertexX = self.vertexX
+        vertexY = self.vertexY
+        halfEdgeOrigin = self.halfEdgeOrigin
+        halfEdgeTwin = self.halfEdgeTwin
+        edgeCoordinates = []
+        for halfEdge in range(self.faceEdgeOffset[len(self.faceEdgeOffset)-1]):
+            twinEdge = halfEdgeTwin[halfEdge]
+            # the half-edge with the smaller index stands for both, the twin not in a face has a larger index
+            if(twinEdge < halfEdge):
+                continue
+            startX = vertexX[halfEdgeOrigin[halfEdge]]
+            startY = vertexY[halfEdgeOrigin[halfEdge]]
+            endX = vertexX[halfEdgeOrigin[twinEdge]]
+            endY = vertexY[halfEdgeOrigin[twinEdge]]
+            if(startX < endX or startX == endX and startY <= endY):
+                edgeCoordinates.append((startX, startY, endX, endY))
+            else:
+                edgeCoordinates.append((endX, endY, startX, startY))
+        edgeCoordinates.sort()
+        return [Edge(Point(startX, startY), Point(endX, endY)) for startX, startY, endX, endY in edgeCoordinates]
+
+    def getEdgeArray(self):
+        """
+        the edges of getEdges as an (n, 4) numpy array of x1, y1, x2, y2, without creating the Edge objects
+        """
+        import numpy
+        from vectorized import normalizeSegments
+        columns = self.toNumpy()
+        halfEdges = numpy.arange(self.faceEdgeOffset[len(self.faceEdgeOffset)-1])
+        twinEdges = columns['halfEdgeTwin'][halfEdges]
+        # the same half-edge of each pair as getEdges
+        kept = twinEdges > halfEdges
+        halfEdges = halfEdges[kept]
+        twinEdges = twinEdges[kept]
+        starts = columns['halfEdgeOrigin'][halfEdges]
+        ends = columns['halfEdgeOrigin'][twinEdges]
+        vertexX = columns['vertexX']
+        vertexY = columns['vertexY']
+        return normalizeSegments(numpy.stack((vertexX[starts], vertexY[starts], vertexX[ends], vertexY[ends]), axis=-1))
+
+    def getColumns(self) -> dict[str, memoryview]:
+        """
+        zero-copy views of the arrays
+        """
+        return {name: memoryview(getattr(self, name)) for name in self.COLUMNS}
+
+    def toNumpy(self) -> dict:
+        """
+        zero-copy numpy arrays of the arrays(or the memoryviews of a mapped diagram file), numpy is only needed by this method
+        """
+        import numpy
+        return {name: numpy.frombuffer(column, dtype=column.format) for name, column in self.getColumns().items()}
+
+
+ALGORITHMS = ('divide', 'fortune')
 
 class Voronoi():
     canvasWidth: int
@@ -760,49 +2411,235 @@ class Voronoi():
     points: list[Point]
     edges: list[Edge]
     currentStep: int
+    recordSteps: bool
+    algorithm: str
+    siteLocator: SiteLocator
+    cache: 'VoronoiResultCache'
+    profile: BuildProfile
 
-    def __init__(self, canvasWidth, canvasHeight):
+    def __init__(self, canvasWidth, canvasHeight, recordSteps=False, algorithm='divide', cache=None):
+        """
+        :param algorithm: 'divide' for divide and conquer, 'fortune' for the sweep line of fortune.py which only gives
+        the edges clipped to the canvas, no graph and no merge records
+        :param cache: VoronoiResultCache(resultcache.py) of the built edges, a cached build only gives the edges and no graph
+        """
+        if(algorithm not in ALGORITHMS):
+            raise ValueError(f'unknown algorithm {algorithm!r}, expected one of {ALGORITHMS}')
         self.canvasWidth = canvasWidth
         self.canvasHeight = canvasHeight
         self.voronoiGraph = None
         self.points = []
         self.edges = []
         self.currentStep = 0
+        self.recordSteps = recordSteps
+        self.algorithm = algorithm
+        # built on the first query after a build, then updated by insertSite and removeSite
+        self.siteLocator = None
+        self.cache = cache
+        # BuildProfile of the last build made with profile=True
+        self.profile = None
     
-    def buildVoronoiDiagram(self, points):
-        # sort the points fisrt by x and then by y
-        points.sort(key=lambda point: (point.x, point.y))
-        remove_duplicate = []
-        remove_duplicate.append(points[0])
-        for i in range(1,len(points)):
-            if(points[i].x == points[i-1].x and points[i].y == points[i-1].y):
-                continue
-            remove_duplicate.append(points[i])
-        self.points = remove_duplicate
+    def buildVoronoiDiagram(self, points, recordSteps=None, algorithm=None, workers=1, progress=None, profile=False):
+        """
+        :param points: the sites of the voronoi diagram
+        :param recordSteps: keep the merge records for step by step execution, default to self.recordSteps
+        :param algorithm: 'divide' or 'fortune', default to self.algorithm
+        :param workers: number of processes building the top levels of divide and conquer, the diagram is the same as
+        with one process up to rounding(isSameDiagram)
+        :param progress: called with (merges done, total merges) after every merge of divide and conquer, see VoronoiGraph.
+        if it raises, the sites are changed but the diagram is not, so a cancelled build should use another Voronoi
+        :param profile: keep the counters of every merge in self.profile(BuildProfile), it stays None when the
+        result comes from the cache or fortune's algorithm since there is no merge
+        """
+        if(recordSteps == None):
+            recordSteps = self.recordSteps
+        if(algorithm == None):
+            algorithm = self.algorithm
+        if(algorithm not in ALGORITHMS):
+            raise ValueError(f'unknown algorithm {algorithm!r}, expected one of {ALGORITHMS}')
+        if(algorithm == 'fortune' and recordSteps):
+            raise ValueError('the merge records of the step by step execution need the divide and conquer algorithm')
+        if(workers > 1 and (algorithm == 'fortune' or recordSteps)):
+            raise ValueError('more than one worker needs the divide and conquer algorithm without the merge records')
+
+        self.points = sortPoints(points)
+        self.siteLocator = None
+        self.profile = None
+
+        # the step by step execution needs the graph, so it is not cached
+        cacheKey = None
+        if(self.cache != None and not recordSteps):
+            cacheKey = self.cache.getKey(self.points, self.canvasWidth, self.canvasHeight, algorithm)
+            edges = self.cache.get(cacheKey)
+            if(edges != None):
+                self.voronoiGraph = None
+                self.edges = edges
+                return
+
+        if(algorithm == 'fortune'):
+            self.voronoiGraph = None
+            self.edges = [Edge(Point(x1, y1), Point(x2, y2)) for x1, y1, x2, y2 in buildFortuneEdges([(point.x, point.y) for point in self.points], self.canvasWidth, self.canvasHeight)]
+            if(cacheKey != None):
+                self.cache.put(cacheKey, self.points, self.edges, self.canvasWidth, self.canvasHeight)
+            return
 
         # build the voronoi diagram base on the points given
-        self.voronoiGraph = VoronoiGraph(self.canvasWidth, self.canvasHeight)
-        self.voronoiGraph.createVoronoiGraph(self.points)
+        voronoiGraph = VoronoiGraph(self.canvasWidth, self.canvasHeight, recordSteps, progress, profile)
+        voronoiGraph.createVoronoiGraph(self.points, workers)
+        self.profile = voronoiGraph.profile
+        self.voronoiGraph = voronoiGraph
+        self.edges = self.voronoiGraph.getEdges()
+        if(cacheKey != None):
+            self.cache.put(cacheKey, self.points, self.edges, self.canvasWidth, self.canvasHeight)
+
+    def insertSite(self, point: Point) -> bool:
+        """
+        add one site to the diagram, only the faces next to it are changed and self.edges is updated in place.
+        the diagram without a VoronoiGraph(algorithm='fortune', a cached build or nothing built) is rebuilt
+        :return: False if the site is already in the diagram
+        """
+        index = bisect.bisect_left(self.points, (point.x, point.y), key=lambda site: (site.x, site.y))
+        if(index < len(self.points) and self.points[index].x == point.x and self.points[index].y == point.y):
+            return False
+        if(self.voronoiGraph == None):
+            self.buildVoronoiDiagram(self.points + [point], recordSteps=False)
+            return True
+
+        removedEdges, addedEdges = self.voronoiGraph.insertSite(point)
+        self.points.insert(index, point)
+        self.updateEdges(removedEdges, addedEdges)
+        # the locator is built again on the next query if the site is outside its grid or the grid no longer fits
+        if(self.siteLocator != None and (not self.siteLocator.insertSite(point) or not self.siteLocator.isBalanced())):
+            self.siteLocator = None
+        return True
+
+    def removeSite(self, point: Point) -> bool:
+        """
+        remove one site from the diagram, only its neighbors are changed and self.edges is updated in place.
+        the diagram without a VoronoiGraph is rebuilt
+        :return: False if the site is not in the diagram
+        """
+        index = bisect.bisect_left(self.points, (point.x, point.y), key=lambda site: (site.x, site.y))
+        if(index == len(self.points) or self.points[index].x != point.x or self.points[index].y != point.y):
+            return False
+        if(self.voronoiGraph == None):
+            points = self.points[:index] + self.points[index+1:]
+            if(len(points) == 0):
+                self.clear()
+            else:
+                self.buildVoronoiDiagram(points, recordSteps=False)
+            return True
 
-        # the data structure use directed edge to form a polygon(counterclockwise)
-        # In order to print out the line without duplicate, we filter out the duplicate line
-        edge_set = set()
-        for face in self.voronoiGraph.faces:
-            for edge in face.edges:
-                if edge in edge_set or edge.twinEdge in edge_set:
-                    continue
-                if(edge.start.x < edge.end.x or edge.start.x == edge.end.x and edge.start.y <= edge.end.y):
-                    edge_set.add(edge)
-                else:
-                    edge_set.add(edge.twinEdge)
-                    
-        edge_list = list(edge_set)
-        edge_list.sort(key= lambda edge: (edge.start.x, edge.start.y, edge.end.x, edge.end.y))
-        self.edges = edge_list
+        removedEdges, addedEdges = self.voronoiGraph.removeSite(point)
+        del self.points[index]
+        self.updateEdges(removedEdges, addedEdges)
+        if(self.siteLocator != None and (not self.siteLocator.removeSite(point) or not self.siteLocator.isBalanced())):
+            self.siteLocator = None
+        return True
+
+    def moveSite(self, point: Point, newPoint: Point) -> bool:
+        """
+        move a site by removing it and inserting it at the new position, both only change the faces around the site
+        :return: False if the site is not in the diagram or the new position is another site
+        """
+        index = bisect.bisect_left(self.points, (newPoint.x, newPoint.y), key=lambda site: (site.x, site.y))
+        if(index < len(self.points) and self.points[index].x == newPoint.x and self.points[index].y == newPoint.y):
+            return False
+        if(not self.removeSite(point)):
+            return False
+        return self.insertSite(newPoint)
+
+    def updateEdges(self, removedEdges: list[tuple], addedEdges: list[Edge]):
+        """
+        update the sorted self.edges with the result of an edit of the graph
+        :param removedEdges: sort key before the edit and edge of each edge changed or removed
+        :param addedEdges: each edge changed or added
+        """
+        # the changed edges still in the list are found by the keys before the change, which keep the list sorted
+        removedKeys = {}
+        for key, edge in removedEdges:
+            removedKeys[edge] = key
+            removedKeys[edge.twinEdge] = key
+        searchKey = lambda edge: removedKeys[edge] if edge in removedKeys else getEdgeSortKey(edge)
+        for key, edge in removedEdges:
+            index = bisect.bisect_left(self.edges, key, key=searchKey)
+            while(self.edges[index] != edge and self.edges[index] != edge.twinEdge):
+                index = index + 1
+            del self.edges[index]
+        for edge in addedEdges:
+            bisect.insort(self.edges, edge, key=getEdgeSortKey)
+        self.currentStep = 0
+
+    def locate(self, x: float, y: float) -> Point:
+        """
+        the site of the face containing (x, y), which is the nearest site. None if there is no site
+        """
+        if(len(self.points) == 0):
+            return None
+        return self.getSiteLocator().locate(x, y)
+
+    def locateMany(self, xs, ys):
+        """
+        locate of every point as a numpy array of indexes into self.points(-1 if there is no site), a list without numpy
+        """
+        return self.getSiteLocator().locateMany(xs, ys)
+
+    def getSiteLocator(self) -> SiteLocator:
+        if(self.siteLocator == None):
+            self.siteLocator = SiteLocator(self.points, self.canvasWidth, self.canvasHeight)
+        return self.siteLocator
+
+    def matchesRebuild(self, tolerance: float = 1e-6) -> bool:
+        """
+        whether the edges are the same as the edges of a full rebuild inside the canvas, the check of insertSite
+        """
+        voronoi = Voronoi(self.canvasWidth, self.canvasHeight, algorithm=self.algorithm)
+        if(len(self.points) > 0):
+            voronoi.buildVoronoiDiagram(list(self.points))
+        return isSameDiagram(self.edges, voronoi.edges, self.canvasWidth, self.canvasHeight, tolerance)
+
+    def getEdgeArray(self):
+        """
+        self.edges as an (n, 4) numpy array of x1, y1, x2, y2, numpy is only needed by this method and getClippedEdges
+        """
+        from vectorized import edgesToArray
+        return edgesToArray(self.edges)
+
+    def getClippedEdges(self):
+        """
+        the part of the edges inside the canvas as an (n, 4) numpy array, the edges outside the canvas are dropped
+        """
+        from vectorized import clipSegments
+        return clipSegments(self.canvasWidth, self.canvasHeight, self.getEdgeArray())[0]
+
+    def toArrayGraph(self) -> ArrayVoronoiGraph:
+        """
+        the graph of the diagram packed by VoronoiGraph.toArrayGraph, None if there is no VoronoiGraph
+        """
+        if(self.voronoiGraph == None):
+            return None
+        return self.voronoiGraph.toArrayGraph()
+
+    def getMergeRecords(self) -> list[MergeRecord]:
+        """
+        merge records are built on demand, rebuild the diagram with step recording if the current one has none
+        """
+        if(self.voronoiGraph == None or not self.voronoiGraph.recordSteps):
+            self.buildVoronoiDiagram(self.points, recordSteps=True, algorithm='divide')
+            self.currentStep = 0
+        return self.voronoiGraph.mergeRecords
+
+    def hasMergeRecords(self) -> bool:
+        """
+        whether the current diagram has merge records, so getMergeRecords returns them without rebuilding
+        """
+        return self.voronoiGraph != None and len(self.voronoiGraph.mergeRecords) > 0
     
     def clear(self):
         self.points = []
         self.edges = []
+        self.siteLocator = None
         self.currentStep = 0
         self.voronoiGraph = None
+        self.profile = None
     
@@ -0,0 +1,178 @@
+"""
+random insertSite, removeSite and moveSite sequences checked against a full rebuild(Voronoi.matchesRebuild) and the
+sweep line of fortune.py
+
+usage: python -m pytest test(or python -m unittest discover test)
+"""
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from voronoi import Edge, Point, Voronoi, getEdgeSortKey, isSameDiagram
+
+CANVAS_WIDTH = 600
+CANVAS_HEIGHT = 600
+SEEDS = 150
+EDITS = 15
+DEGENERATE_SEEDS = 40
+
+def randomPoint(rand: random.Random) -> Point:
+    # the points of the canvas clicks are integers
+    return Point(rand.randint(0, CANVAS_WIDTH), rand.randint(0, CANVAS_HEIGHT))
+
+def getDegeneratePointMakers(rand: random.Random) -> dict:
+    """
+    random point makers of the degenerate inputs: the sites on a horizontal or a vertical line, on a lattice and sharing
+    a few x and y
+    """
+    lineX = rand.randint(0, CANVAS_WIDTH)
+    lineY = rand.randint(0, CANVAS_HEIGHT)
+    spacing = rand.choice((20, 50, 100))
+    sharedX = [rand.randint(0, CANVAS_WIDTH) for _ in range(3)]
+    sharedY = [rand.randint(0, CANVAS_HEIGHT) for _ in range(3)]
+    return {
+        'horizontal': lambda: Point(rand.randint(0, CANVAS_WIDTH), lineY),
+        'vertical': lambda: Point(lineX, rand.randint(0, CANVAS_HEIGHT)),
+        'lattice': lambda: Point(rand.randint(0, CANVAS_WIDTH // spacing) * spacing, rand.randint(0, CANVAS_HEIGHT // spacing) * spacing),
+        'shared': lambda: Point(rand.choice(sharedX), rand.randint(0, CANVAS_HEIGHT)) if rand.random() < 0.5 else Point(rand.randint(0, CANVAS_WIDTH), rand.choice(sharedY)),
+    }
+
+def buildRandomVoronoi(rand: random.Random, count: int, makePoint=None) -> Voronoi:
+    voronoi = Voronoi(CANVAS_WIDTH, CANVAS_HEIGHT)
+    if(makePoint == None):
+        voronoi.buildVoronoiDiagram([randomPoint(rand) for _ in range(count)])
+    else:
+        # the duplicated points are dropped, so a degenerate diagram may have fewer sites
+        voronoi.buildVoronoiDiagram(list({(point.x, point.y): point for point in (makePoint() for _ in range(count))}.values()))
+    return voronoi
+
+
+class IncrementalEditTest(unittest.TestCase):
+    def assertMatchesRebuild(self, voronoi: Voronoi, message: str):
+        self.assertTrue(voronoi.matchesRebuild(), message)
+        # the rebuild is made by the same merge, so the edges are also checked against the sweep line
+        fortune = Voronoi(CANVAS_WIDTH, CANVAS_HEIGHT, algorithm='fortune')
+        if(len(voronoi.points) > 0):
+            fortune.buildVoronoiDiagram(list(voronoi.points))
+        self.assertTrue(isSameDiagram(voronoi.edges, fortune.edges, CANVAS_WIDTH, CANVAS_HEIGHT), message + ' (fortune)')
+        # the edits keep the edges sorted like getEdges
+        keys = [getEdgeSortKey(edge) for edge in voronoi.edges]
+        self.assertEqual(keys, sorted(keys), message)
+
+    def runDegenerateEdits(self, edit: str):
+        for seed in range(DEGENERATE_SEEDS):
+            for kind in ('horizontal', 'vertical', 'lattice', 'shared'):
+                rand = random.Random(seed)
+                makePoint = getDegeneratePointMakers(rand)[kind]
+                voronoi = buildRandomVoronoi(rand, rand.randint(EDITS + 3, 30) if edit == 'remove' else rand.randint(2, 20), makePoint)
+                for step in range(EDITS):
+                    if(edit == 'insert'):
+                        point = makePoint()
+                        voronoi.insertSite(point)
+                        action = f'insert {point}'
+                    elif(edit == 'remove'):
+                        if(len(voronoi.points) == 0):
+                            break
+                        point = rand.choice(voronoi.points)
+                        voronoi.removeSite(point)
+                        action = f'remove {point}'
+                    else:
+                        point = rand.choice(voronoi.points)
+                        newPoint = makePoint()
+                        voronoi.moveSite(point, newPoint)
+                        action = f'move {point} to {newPoint}'
+                    self.assertMatchesRebuild(voronoi, f'{kind} seed {seed} edit {step}: {action}')
+
+    def testInsertSite(self):
+        for seed in range(SEEDS):
+            rand = random.Random(seed)
+            voronoi = buildRandomVoronoi(rand, rand.randint(3, 40))
+            for edit in range(EDITS):
+                point = randomPoint(rand)
+                voronoi.insertSite(point)
+                self.assertMatchesRebuild(voronoi, f'seed {seed} edit {edit}: insert {point}')
+
+    def testRemoveSite(self):
+        for seed in range(SEEDS):
+            rand = random.Random(seed)
+            voronoi = buildRandomVoronoi(rand, rand.randint(EDITS + 3, 60))
+            for edit in range(EDITS):
+                point = rand.choice(voronoi.points)
+                self.assertTrue(voronoi.removeSite(point))
+                self.assertMatchesRebuild(voronoi, f'seed {seed} edit {edit}: remove {point}')
+
+    def testMoveSite(self):
+        for seed in range(SEEDS):
+            rand = random.Random(seed)
+            voronoi = buildRandomVoronoi(rand, rand.randint(3, 40))
+            for edit in range(EDITS):
+                point = rand.choice(voronoi.points)
+                newPoint = randomPoint(rand)
+                voronoi.moveSite(point, newPoint)
+                self.assertMatchesRebuild(voronoi, f'seed {seed} edit {edit}: move {point} to {newPoint}')
+
+    def testMixedEdits(self):
+        for seed in range(SEEDS):
+            rand = random.Random(seed)
+            voronoi = buildRandomVoronoi(rand, rand.randint(3, 40))
+            for edit in range(EDITS):
+                choice = rand.random()
+                if(choice < 0.4 or len(voronoi.points) <= 3):
+                    point = randomPoint(rand)
+                    voronoi.insertSite(point)
+                    action = f'insert {point}'
+                elif(choice < 0.7):
+                    point = rand.choice(voronoi.points)
+                    voronoi.removeSite(point)
+                    action = f'remove {point}'
+                else:
+                    point = rand.choice(voronoi.points)
+                    newPoint = randomPoint(rand)
+                    voronoi.moveSite(point, newPoint)
+                    action = f'move {point} to {newPoint}'
+                self.assertMatchesRebuild(voronoi, f'seed {seed} edit {edit}: {action}')
+
+    def testRemoveEverySite(self):
+        rand = random.Random(0)
+        voronoi = buildRandomVoronoi(rand, 20)
+        while(len(voronoi.points) > 0):
+            self.assertTrue(voronoi.removeSite(rand.choice(voronoi.points)))
+            self.assertMatchesRebuild(voronoi, f'{len(voronoi.points)} sites left')
+        self.assertEqual(voronoi.edges, [])
+
+    def testDegenerateInsertSite(self):
+        self.runDegenerateEdits('insert')
+
+    def testDegenerateRemoveSite(self):
+        self.runDegenerateEdits('remove')
+
+    def testDegenerateMoveSite(self):
+        self.runDegenerateEdits('move')
+
+    def testInsertBetweenCollinearSites(self):
+        # the new face is between 2 parallel lines, the face across the parallel edge gets the other one
+        for sites, point in (([(100, 300), (200, 300), (300, 300)], (160, 300)), ([(300, 160), (300, 520)], (300, 390))):
+            voronoi = Voronoi(CANVAS_WIDTH, CANVAS_HEIGHT)
+            voronoi.buildVoronoiDiagram([Point(x, y) for x, y in sites])
+            self.assertTrue(voronoi.insertSite(Point(*point)))
+            self.assertMatchesRebuild(voronoi, f'insert {point} into {sites}')
+
+    def testNearlyVerticalEdges(self):
+        # the ends of the same segment are taken in another order when x differs by less than the tolerance
+        edges1 = [Edge(Point(447.095, 3.6856), Point(447.095, 0))]
+        edges2 = [Edge(Point(447.095 + 1e-12, 0), Point(447.095, 3.6856))]
+        self.assertTrue(isSameDiagram(edges1, edges2, CANVAS_WIDTH, CANVAS_HEIGHT))
+
+    def testDuplicateAndMissingSites(self):
+        voronoi = buildRandomVoronoi(random.Random(0), 10)
+        point = voronoi.points[0]
+        self.assertFalse(voronoi.insertSite(Point(point.x, point.y)))
+        self.assertFalse(voronoi.removeSite(Point(-1, -1)))
+        self.assertFalse(voronoi.moveSite(point, voronoi.points[1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
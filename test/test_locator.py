@@ -0,0 +1,75 @@
+"""
+Voronoi.locate and locateMany checked against every site while the sites are inserted, removed and moved
+
+usage: python -m pytest test(or python -m unittest discover test)
+"""
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from voronoi import Point, Voronoi
+
+CANVAS_WIDTH = 600
+CANVAS_HEIGHT = 600
+SEEDS = 30
+EDITS = 40
+QUERIES = 30
+
+def findNearest(points: list[Point], x: float, y: float) -> int:
+    # the smallest index of the nearest sites, like locate
+    distances = [(point.x - x) ** 2 + (point.y - y) ** 2 for point in points]
+    return distances.index(min(distances))
+
+
+class SiteLocatorTest(unittest.TestCase):
+    def assertLocates(self, voronoi: Voronoi, rand: random.Random, message: str):
+        # the queries outside the canvas are measured against every site
+        queries = [(rand.uniform(-20, CANVAS_WIDTH + 20), rand.uniform(-20, CANVAS_HEIGHT + 20)) for _ in range(QUERIES)]
+        xs = [x for x, _ in queries]
+        ys = [y for _, y in queries]
+        try:
+            import numpy
+            locatedMany = list(voronoi.locateMany(numpy.array(xs), numpy.array(ys)))
+        except ImportError:
+            locatedMany = voronoi.locateMany(xs, ys)
+        locatedWithoutNumpy = voronoi.getSiteLocator().locateManyWithoutNumpy(xs, ys)
+        for (x, y), manyIndex, index in zip(queries, locatedMany, locatedWithoutNumpy):
+            nearest = findNearest(voronoi.points, x, y)
+            self.assertIs(voronoi.locate(x, y), voronoi.points[nearest], f'{message}: locate({x}, {y})')
+            self.assertEqual(manyIndex, nearest, f'{message}: locateMany({x}, {y})')
+            self.assertEqual(index, nearest, f'{message}: locateMany({x}, {y}) without numpy')
+
+    def testEdits(self):
+        for seed in range(SEEDS):
+            rand = random.Random(seed)
+            # uniform, on a lattice with many ties and clustered
+            if(seed % 3 == 0):
+                randomPoint = lambda: Point(rand.randint(0, CANVAS_WIDTH), rand.randint(0, CANVAS_HEIGHT))
+            elif(seed % 3 == 1):
+                randomPoint = lambda: Point(rand.randint(0, 30) * 20, rand.randint(0, 30) * 20)
+            else:
+                randomPoint = lambda: Point(rand.gauss(300, 20), rand.gauss(300, 20))
+            voronoi = Voronoi(CANVAS_WIDTH, CANVAS_HEIGHT)
+            voronoi.buildVoronoiDiagram([randomPoint() for _ in range(rand.randint(1, 200))])
+            self.assertLocates(voronoi, rand, f'seed {seed}')
+            for edit in range(EDITS):
+                choice = rand.random()
+                if(choice < 0.4 or len(voronoi.points) <= 3):
+                    voronoi.insertSite(randomPoint())
+                elif(choice < 0.7):
+                    voronoi.removeSite(rand.choice(voronoi.points))
+                else:
+                    voronoi.moveSite(rand.choice(voronoi.points), randomPoint())
+                self.assertLocates(voronoi, rand, f'seed {seed} edit {edit}')
+
+    def testEmpty(self):
+        voronoi = Voronoi(CANVAS_WIDTH, CANVAS_HEIGHT)
+        self.assertIsNone(voronoi.locate(10, 10))
+        self.assertEqual(voronoi.getSiteLocator().locateManyWithoutNumpy([10], [10]), [-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
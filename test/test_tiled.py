@@ -0,0 +1,64 @@
+"""
+the slabs of tiled.splitSlabs and the edges of the tiled build checked against a full build
+
+usage: python -m pytest test(or python -m unittest discover test)
+"""
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from tiled import iterTiledEdges, readSlab, splitSlabs
+from voronoi import Edge, Point, Voronoi, isSameDiagram
+
+CANVAS_WIDTH = 600
+CANVAS_HEIGHT = 600
+TILE_SIZE = 100
+
+
+class TiledBuildTest(unittest.TestCase):
+    def buildSlabs(self, sites: list[tuple], directory: str) -> list[tuple[str, int, float]]:
+        path = os.path.join(directory, 'sites.txt')
+        with open(path, 'w') as writeFile:
+            for x, y in sites:
+                writeFile.write(f'{x} {y}\n')
+        return splitSlabs(path, directory, TILE_SIZE)
+
+    def assertSameAsFullBuild(self, sites: list[tuple], message: str):
+        with tempfile.TemporaryDirectory() as directory:
+            slabs = self.buildSlabs(sites, directory)
+            edges = [Edge(Point(x1, y1), Point(x2, y2)) for x1, y1, x2, y2 in iterTiledEdges(slabs, CANVAS_WIDTH, CANVAS_HEIGHT)]
+        voronoi = Voronoi(CANVAS_WIDTH, CANVAS_HEIGHT)
+        voronoi.buildVoronoiDiagram([Point(x, y) for x, y in sites])
+        self.assertTrue(isSameDiagram(edges, voronoi.edges, CANVAS_WIDTH, CANVAS_HEIGHT), message)
+
+    def testSlabSize(self):
+        rand = random.Random(0)
+        # columns of sites with the same x, on the borders of the canvas and duplicated sites
+        sites = [(rand.random() * CANVAS_WIDTH, rand.random() * CANVAS_HEIGHT) for _ in range(300)]
+        sites = sites + [(CANVAS_WIDTH, rand.randint(0, CANVAS_HEIGHT)) for _ in range(250)]
+        sites = sites + [(0, rand.randint(0, CANVAS_HEIGHT)) for _ in range(250)]
+        sites = sites + [(300, rand.random() * CANVAS_HEIGHT) for _ in range(250)]
+        sites = sites + sites[:100]
+        with tempfile.TemporaryDirectory() as directory:
+            slabs = self.buildSlabs(sites, directory)
+            slabSites = [(point.x, point.y) for path, size, minX in slabs for point in readSlab(path, size)]
+        self.assertTrue(all(size <= TILE_SIZE for path, size, minX in slabs))
+        self.assertEqual(slabSites, sorted(set(sites)))
+
+    def testUniform(self):
+        rand = random.Random(1)
+        self.assertSameAsFullBuild([(rand.random() * CANVAS_WIDTH, rand.random() * CANVAS_HEIGHT) for _ in range(800)], 'uniform')
+
+    def testSameX(self):
+        rand = random.Random(2)
+        sites = [(rand.random() * CANVAS_WIDTH, rand.random() * CANVAS_HEIGHT) for _ in range(400)]
+        sites = sites + [(300, rand.random() * CANVAS_HEIGHT) for _ in range(300)]
+        self.assertSameAsFullBuild(sites, 'a column of sites larger than a tile')
+
+
+if __name__ == '__main__':
+    unittest.main()
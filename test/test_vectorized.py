@@ -0,0 +1,108 @@
+"""
+the batch functions of vectorized.py checked element by element against the scalar functions of voronoi.py
+
+usage: python -m pytest test(or python -m unittest discover test)
+"""
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import voronoi
+from voronoi import Point, VoronoiGraph, createLineByPoint, findIntersection, getBisector, getIntersectionOfCanvas, getPerpendicularLine, sortDownward, sortPoints
+
+try:
+    import numpy
+    import vectorized
+except ImportError:
+    numpy = None
+
+CANVAS_WIDTH = 600
+CANVAS_HEIGHT = 600
+PAIRS = 400
+
+def getPairs(rand: random.Random) -> list[tuple[Point, Point]]:
+    # random floats, lattice points and the pairs of the same x or y, whose bisectors are horizontal or vertical
+    pairs = []
+    for _ in range(PAIRS):
+        pairs.append((Point(rand.uniform(0, CANVAS_WIDTH), rand.uniform(0, CANVAS_HEIGHT)), Point(rand.uniform(0, CANVAS_WIDTH), rand.uniform(0, CANVAS_HEIGHT))))
+        point1 = Point(rand.randint(0, 15) * 40, rand.randint(0, 15) * 40)
+        point2 = Point(rand.randint(0, 15) * 40, rand.randint(0, 15) * 40)
+        if(point1 != point2):
+            pairs.append((point1, point2))
+        x = rand.uniform(0, CANVAS_WIDTH)
+        y = rand.uniform(0, CANVAS_HEIGHT)
+        pairs.append((Point(x, rand.uniform(0, CANVAS_HEIGHT)), Point(x, rand.uniform(0, CANVAS_HEIGHT))))
+        pairs.append((Point(rand.uniform(0, CANVAS_WIDTH), y), Point(rand.uniform(0, CANVAS_WIDTH), y)))
+    return [(point1, point2) for point1, point2 in pairs if point1 != point2]
+
+def toArrays(pairs: list[tuple[Point, Point]]) -> tuple:
+    return tuple(numpy.array([getattr(pair[i], axis) for pair in pairs], dtype=numpy.float64) for i in (0, 1) for axis in ('x', 'y'))
+
+
+@unittest.skipIf(numpy == None, 'numpy is not installed')
+class VectorizedTest(unittest.TestCase):
+    def setUp(self):
+        self.pairs = getPairs(random.Random(1))
+        self.bisectors = [getBisector(point1, point2) for point1, point2 in self.pairs]
+
+    def testCreateLines(self):
+        lines = vectorized.createLines(*toArrays(self.pairs))
+        perpendicularLines = vectorized.getPerpendicularLines(lines[0], lines[1], *toArrays(self.pairs)[:2])
+        for i, (point1, point2) in enumerate(self.pairs):
+            line = createLineByPoint(point1, point2)
+            perpendicularLine = getPerpendicularLine(line, point1)
+            self.assertEqual((line.xCoefficient, line.yCoefficient, line.constant), tuple(float(value[i]) for value in lines))
+            self.assertEqual((perpendicularLine.xCoefficient, perpendicularLine.yCoefficient, perpendicularLine.constant), tuple(float(value[i]) for value in perpendicularLines))
+
+    def testGetBisectors(self):
+        bisectors = vectorized.getBisectors(*toArrays(self.pairs))
+        for i, line in enumerate(self.bisectors):
+            self.assertEqual((line.xCoefficient, line.yCoefficient, line.constant, line.constantBound), tuple(float(value[i]) for value in bisectors), self.pairs[i])
+
+    def testGetIntersectionsOfCanvas(self):
+        # the bisectors of the pairs and lines along the borders and beyond them
+        lines = self.bisectors + [createLineByPoint(Point(x1, y1), Point(x2, y2)) for x1, y1, x2, y2 in ((0, 0, 0, 600), (600, 0, 600, 600), (0, 0, 600, 0), (0, 600, 600, 600), (0, 0, 600, 600), (600, 0, 0, 600), (-50, 0, -50, 600), (0, 700, 600, 700), (0, 650, 650, 0))]
+        segments = vectorized.getIntersectionsOfCanvas(CANVAS_WIDTH, CANVAS_HEIGHT, *(numpy.array([getattr(line, name) for line in lines], dtype=numpy.float64) for name in ('xCoefficient', 'yCoefficient', 'constant')))
+        for line, segment in zip(lines, segments):
+            points = getIntersectionOfCanvas(CANVAS_WIDTH, CANVAS_HEIGHT, line)
+            sortDownward(points, line)
+            if(len(points) == 0):
+                self.assertTrue(numpy.isnan(segment).all())
+            else:
+                self.assertEqual((points[0].x, points[0].y, points[-1].x, points[-1].y), tuple(float(value) for value in segment))
+
+    def testFindIntersections(self):
+        lines = self.bisectors[:150]
+        xCoefficient, yCoefficient, constant = (numpy.array([getattr(line, name) for line in lines], dtype=numpy.float64) for name in ('xCoefficient', 'yCoefficient', 'constant'))
+        x, y = vectorized.findIntersections(xCoefficient[:, None], yCoefficient[:, None], constant[:, None], xCoefficient, yCoefficient, constant)
+        for i, line1 in enumerate(lines):
+            for j, line2 in enumerate(lines):
+                # the nearly parallel lines are left to findIntersection
+                if(numpy.isnan(x[i, j])):
+                    continue
+                intersection = findIntersection(line1, line2)
+                self.assertEqual((intersection.x, intersection.y), (float(x[i, j]), float(y[i, j])))
+
+    def testBatchLeaves(self):
+        # the leaves of getLeafBisectors give the same diagram as the scalar leaves
+        rand = random.Random(2)
+        for points in ([(rand.uniform(0, CANVAS_WIDTH), rand.uniform(0, CANVAS_HEIGHT)) for _ in range(600)], [(x * 20, y * 20) for x in range(30) for y in range(30)], [(x * 2, 300) for x in range(300)]):
+            points = sortPoints([Point(x, y) for x, y in points])
+            batchGraph = VoronoiGraph(CANVAS_WIDTH, CANVAS_HEIGHT)
+            self.assertGreater(len(batchGraph.getLeafBisectors(points)), 0)
+            batchGraph.createVoronoiGraph(points)
+            minSites = voronoi.BATCH_MIN_SITES
+            voronoi.BATCH_MIN_SITES = len(points) + 1
+            try:
+                scalarGraph = VoronoiGraph(CANVAS_WIDTH, CANVAS_HEIGHT)
+                scalarGraph.createVoronoiGraph(points)
+            finally:
+                voronoi.BATCH_MIN_SITES = minSites
+            self.assertEqual([(edge.start.x, edge.start.y, edge.end.x, edge.end.y) for edge in batchGraph.getEdges()], [(edge.start.x, edge.start.y, edge.end.x, edge.end.y) for edge in scalarGraph.getEdges()])
+
+
+if __name__ == '__main__':
+    unittest.main()